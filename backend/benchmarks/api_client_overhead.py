@@ -0,0 +1,110 @@
+"""
+Run: python -m benchmarks.api_client_overhead [calls]
+Measures per-call client overhead of query_model against a local stub
+OpenAI-compatible server: a fresh OpenAI client per call (old behaviour)
+versus the shared pooled client, plus concurrent aquery_model calls.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETION = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [
+        {
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {
+                "role": "assistant",
+                "content": '{"actions": [], "impact": {"throughput_change_percent": 0, '
+                '"energy_change_percent": 0, "notes": "stub"}}',
+            },
+        }
+    ],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real provider
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(COMPLETION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main(calls=200):
+    server = start_stub_server()
+    os.environ["MODEL_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("MODEL_API_KEY", "stub")
+    os.environ["MODEL_STREAM"] = "off"  # the stub only serves non-streamed completions
+
+    # Import after the environment points Config at the stub server
+    from openai import OpenAI
+    from src.utils import api_client
+
+    messages = api_client._build_messages("ping", "")
+
+    def fresh_client_call():
+        client = OpenAI(api_key=api_client.API_KEY, base_url=api_client.BASE_URL)
+        client.chat.completions.create(model=api_client.MODEL, messages=messages)
+        client.close()
+
+    def pooled_call():
+        api_client.query_model("ping", "")
+
+    # Warm up imports and the shared pool before measuring
+    fresh_client_call()
+    pooled_call()
+
+    fresh_ms = timed(fresh_client_call, calls)
+    pooled_ms = timed(pooled_call, calls)
+
+    async def concurrent_calls():
+        await asyncio.gather(*(api_client.aquery_model("ping", "") for _ in range(calls)))
+
+    start = time.perf_counter()
+    asyncio.run(concurrent_calls())
+    async_ms = (time.perf_counter() - start) / calls * 1000
+
+    print(f"calls per mode:          {calls}")
+    print(f"fresh client per call:   {fresh_ms:.2f} ms/call")
+    print(f"shared pooled client:    {pooled_ms:.2f} ms/call ({fresh_ms / pooled_ms:.1f}x faster)")
+    print(f"aquery_model (gathered): {async_ms:.2f} ms/call amortised")
+
+    api_client.reset_client()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,267 @@
+"""
+Run: python -m benchmarks.load_test [--duration 20] [--concurrency 16] [--sse-clients 4]
+
+Offline load test of the whole backend. The app is served in-process by a
+threaded werkzeug server with MODEL_BACKEND=stub (deterministic rule-based
+agents with injectable latency and failures, see src/utils/stub_model.py).
+Worker threads drive a weighted mix of /api/agents/* and /api/data/* requests
+while SSE clients stay subscribed to /api/events/stream.
+
+Reports p50/p95/p99 latency, req/s and DB queries per request for every
+endpoint. Without --database-url it runs against a fresh SQLite file.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+AGENT_ENDPOINTS = ["production", "energy", "quality", "maintenance", "supply"]
+
+# (label, method, path, weight)
+REQUEST_MIX = [
+    ("GET /api/data/machines", "GET", "/api/data/machines", 20),
+    ("GET /api/data/orders", "GET", "/api/data/orders?limit=50", 10),
+    ("GET /api/data/energy", "GET", "/api/data/energy?limit=50", 10),
+    ("GET /api/data/energy/series", "GET", "/api/data/energy/series", 5),
+    ("GET /api/data/decisions", "GET", "/api/data/decisions", 10),
+    ("POST /api/agents/<agent>", "POST", None, 10),
+    ("POST /api/agents/run_all", "POST", "/api/agents/run_all", 2),
+]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--concurrency", type=int, default=16, help="request workers")
+    parser.add_argument("--sse-clients", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=200, help="stub model latency")
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="default: a temporary SQLite file")
+    parser.add_argument("--reseed", action="store_true",
+                        help="replace the data in --database-url with the mock data set")
+    parser.add_argument("--cache", choices=["memory", "off"], default="off",
+                        help="decision cache (off so every agent call reaches the model)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)  # label -> [(latency_s, status, db_queries)]
+
+    def add(self, label, latency, status, queries):
+        with self.lock:
+            self.samples[label].append((latency, status, queries))
+
+
+def instrument(app, db):
+    """Count DB statements per request (X-DB-Queries header) and outside requests."""
+    from flask import g, has_request_context
+    from sqlalchemy import event
+
+    background = {"queries": 0}
+    lock = threading.Lock()
+
+    def count(*args):
+        if has_request_context():
+            g.db_queries = g.get("db_queries", 0) + 1
+        else:
+            with lock:
+                background["queries"] += 1
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", count)
+
+    @app.after_request
+    def add_query_header(response):
+        response.headers["X-DB-Queries"] = str(g.get("db_queries", 0))
+        return response
+
+    return background
+
+
+def request_worker(base_url, worker_id, seed, deadline, recorder):
+    import httpx
+
+    rng = random.Random(seed * 1000 + worker_id)
+    weights = [entry[3] for entry in REQUEST_MIX]
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        while time.monotonic() < deadline:
+            label, method, path, _ = rng.choices(REQUEST_MIX, weights)[0]
+            if path is None:
+                path = f"/api/agents/{rng.choice(AGENT_ENDPOINTS)}"
+            start = time.perf_counter()
+            try:
+                response = client.request(method, path)
+                status = response.status_code
+                queries = int(response.headers.get("X-DB-Queries", 0))
+            except httpx.HTTPError:
+                status, queries = 0, 0
+            recorder.add(label, time.perf_counter() - start, status, queries)
+
+
+def sse_client(base_url, stop, counts):
+    import httpx
+
+    try:
+        with httpx.stream("GET", base_url + "/api/events/stream", timeout=None) as response:
+            for line in response.iter_lines():
+                if line.startswith("event:"):
+                    counts[line[6:].strip()] += 1
+                if stop.is_set():
+                    break
+    except httpx.HTTPError:
+        counts["error"] += 1
+
+
+def summarize(recorder, elapsed):
+    rows = []
+    everything = []
+    for label, _, _, _ in REQUEST_MIX:
+        samples = recorder.samples.get(label, [])
+        if not samples:
+            continue
+        everything.extend(samples)
+        rows.append(_stats(label, samples, elapsed))
+    rows.append(_stats("TOTAL", everything, elapsed))
+    return rows
+
+
+def _stats(label, samples, elapsed):
+    latencies = sorted(s[0] * 1000 for s in samples)
+    return {
+        "endpoint": label,
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not 200 <= s[1] < 400),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "req_per_s": round(len(samples) / elapsed, 2),
+        "db_queries_per_req": round(sum(s[2] for s in samples) / len(samples), 2),
+    }
+
+
+def print_report(report):
+    print(
+        f"duration {report['duration_s']}s, {report['concurrency']} workers, "
+        f"{report['sse_clients']} SSE clients, stub latency {report['stub_latency_ms']}ms, "
+        f"{report['model_calls']} model calls"
+    )
+    header = f"{'endpoint':<30}{'reqs':>7}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'q/req':>7}"
+    print(header)
+    print("-" * len(header))
+    for row in report["endpoints"]:
+        print(
+            f"{row['endpoint']:<30}{row['requests']:>7}{row['errors']:>6}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+            f"{row['req_per_s']:>9.2f}{row['db_queries_per_req']:>7.2f}"
+        )
+    print(f"background DB queries (decision writer, etc.): {report['background_db_queries']}")
+    print(f"SSE events received: {report['sse_events']}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    tmp_db = None
+    if not args.database_url:
+        fd, tmp_db = tempfile.mkstemp(suffix=".db", prefix="loadtest-")
+        os.close(fd)
+        args.database_url = f"sqlite:///{tmp_db}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["MODEL_BACKEND"] = "stub"
+    os.environ["DECISION_CACHE_BACKEND"] = args.cache
+    os.environ.setdefault("SSE_HEARTBEAT_SECONDS", "1")  # lets SSE clients notice the stop
+
+    # Import after the environment is set so Config picks it up
+    from werkzeug.serving import make_server
+    from app import app
+    from src.models import db
+    from src.services.decision_writer import decision_writer
+    from src.utils.api_client import set_backend
+    from src.utils.mock_data import seed_data
+    from src.utils.stub_model import StubBackend
+
+    stub = StubBackend(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        invalid_rate=args.invalid_rate,
+        seed=args.seed,
+    )
+    set_backend(stub)
+    if tmp_db or args.reseed:
+        with app.app_context():
+            seed_data(app)
+    background = instrument(app, db)
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no per-request access log
+    logging.getLogger("src").setLevel(logging.WARNING)  # no per-agent info lines
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    stop = threading.Event()
+    sse_counts = defaultdict(int)
+    for _ in range(args.sse_clients):
+        threading.Thread(target=sse_client, args=(base_url, stop, sse_counts), daemon=True).start()
+
+    recorder = Recorder()
+    start = time.monotonic()
+    deadline = start + args.duration
+    workers = [
+        threading.Thread(
+            target=request_worker, args=(base_url, i, args.seed, deadline, recorder)
+        )
+        for i in range(args.concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - start
+
+    stop.set()
+    server.shutdown()
+    # Write the last decisions before the temporary DB goes away
+    decision_writer.shutdown()
+
+    report = {
+        "duration_s": round(elapsed, 2),
+        "concurrency": args.concurrency,
+        "sse_clients": args.sse_clients,
+        "stub_latency_ms": args.latency_ms,
+        "model_calls": stub.calls,
+        "endpoints": summarize(recorder, elapsed),
+        "background_db_queries": background["queries"],
+        "sse_events": dict(sse_counts),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if tmp_db:
+        os.remove(tmp_db)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
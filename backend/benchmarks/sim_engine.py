@@ -0,0 +1,63 @@
+"""
+Run: python -m benchmarks.sim_engine [machines] [hours] [tick_minutes]
+Times FactorySim on a synthetic plant (default: 10,000 machines, one day in
+one-minute ticks). Runs without a database: no checkpoints are written.
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+import numpy as np
+
+
+def main(machines=10_000, hours=24, tick_minutes=1):
+    from src.services.sim_engine import FactorySim
+
+    rng = np.random.default_rng(0)
+    statuses = rng.choice(["running", "idle", "maintenance"], machines, p=[0.8, 0.15, 0.05])
+    now = datetime(2024, 1, 1)
+    orders = [
+        (i, int(rng.integers(100, 5000)), 0.0, now + timedelta(hours=int(rng.integers(1, 72))), "pending")
+        for i in range(1, 501)
+    ]
+    profile = np.where((np.arange(24) >= 17) & (np.arange(24) < 21), 0.30, 0.12)
+    sim = FactorySim(
+        np.arange(1, machines + 1),
+        statuses.tolist(),
+        rng.uniform(20, 95, machines),
+        rng.uniform(2, 20, machines),
+        orders=orders,
+        price_profile=profile,
+        clock=now,
+        seed=0,
+    )
+    actions = [
+        {"machine_id": int(mid), "action": rng.choice(["increase_speed", "reduce_speed", "schedule_maintenance"]),
+         "value": 10}
+        for mid in rng.integers(1, machines + 1, machines // 10)
+    ]
+
+    start = time.perf_counter()
+    sim.apply_actions(actions)
+    actions_ms = (time.perf_counter() - start) * 1000
+
+    dt = tick_minutes / 60
+    ticks = int(round(hours / dt))
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.step(dt)
+    elapsed = time.perf_counter() - start
+
+    summary = sim.summary()
+    print(f"machines:        {machines}")
+    print(f"actions applied: {len(actions)} in {actions_ms:.1f} ms")
+    print(f"simulated:       {hours}h in {ticks} ticks of {tick_minutes} min")
+    print(f"wall time:       {elapsed:.2f} s ({elapsed / ticks * 1000:.2f} ms/tick)")
+    print(f"energy:          {summary['energy_kwh']:.0f} kWh, cost {summary['energy_cost']:.2f}")
+    print(f"units produced:  {summary['units_produced']:.0f}")
+    print(f"orders done:     {sum(o['status'] == 'completed' for o in summary['orders'])}/{len(orders)}")
+
+
+if __name__ == "__main__":
+    args = [float(a) for a in sys.argv[1:]]
+    main(int(args[0]) if args else 10_000, *args[1:])
@@ -0,0 +1,159 @@
+"""structured decisions
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 18:17:20.501534
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backfill():
+    """Copy impact numbers and actions out of the existing decision documents."""
+    bind = op.get_bind()
+    decisions = sa.table(
+        'agent_decisions',
+        sa.column('id', sa.Integer), sa.column('agent_name', sa.String),
+        sa.column('decision', sa.Text), sa.column('created_at', sa.DateTime),
+        sa.column('throughput_change_percent', sa.Float),
+        sa.column('energy_change_percent', sa.Float), sa.column('notes', sa.Text),
+    )
+    actions = sa.table(
+        'agent_actions',
+        sa.column('decision_id', sa.Integer), sa.column('agent_name', sa.String),
+        sa.column('machine_id', sa.Integer), sa.column('action', sa.String),
+        sa.column('value', sa.Float), sa.column('created_at', sa.DateTime),
+    )
+    rows = bind.execute(
+        sa.select(decisions.c.id, decisions.c.agent_name, decisions.c.decision, decisions.c.created_at)
+    ).all()
+    for decision_id, agent_name, raw, created_at in rows:
+        try:
+            decision = json.loads(raw) if isinstance(raw, str) else raw
+        except ValueError:
+            decision = None
+        if not isinstance(decision, dict):
+            # Keep unparseable rows readable as JSON (and castable to jsonb)
+            bind.execute(
+                decisions.update().where(decisions.c.id == decision_id)
+                .values(decision=json.dumps({'raw_string': raw}))
+            )
+            continue
+        impact = decision.get('impact') if isinstance(decision.get('impact'), dict) else {}
+        bind.execute(
+            decisions.update().where(decisions.c.id == decision_id).values(
+                throughput_change_percent=_number(impact.get('throughput_change_percent')),
+                energy_change_percent=_number(impact.get('energy_change_percent')),
+                notes=str(impact['notes']) if impact.get('notes') is not None else None,
+            )
+        )
+        action_rows = []
+        for action in decision.get('actions') or []:
+            if not isinstance(action, dict) or not action.get('action'):
+                continue
+            try:
+                machine_id = int(action.get('machine_id'))
+            except (TypeError, ValueError):
+                machine_id = None
+            action_rows.append({
+                'decision_id': decision_id, 'agent_name': agent_name, 'machine_id': machine_id,
+                'action': str(action['action'])[:30], 'value': _number(action.get('value')),
+                'created_at': created_at,
+            })
+        if action_rows:
+            bind.execute(actions.insert(), action_rows)
+
+
+def _columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    # Decisions become JSONB (JSON text elsewhere) with the impact numbers in typed
+    # columns and one agent_actions row per action. Databases created by seed_db.py
+    # (db.create_all) already have the new columns and no `impact`: nothing to move.
+    existing = _columns('agent_decisions')
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('agent_actions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('decision_id', sa.Integer(), nullable=False),
+    sa.Column('agent_name', sa.String(length=30), nullable=False),
+    sa.Column('machine_id', sa.Integer(), nullable=True),
+    sa.Column('action', sa.String(length=30), nullable=False),
+    sa.Column('value', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['decision_id'], ['agent_decisions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    with op.batch_alter_table('agent_actions', schema=None) as batch_op:
+        batch_op.create_index('ix_agent_actions_agent_name_created_at', ['agent_name', 'created_at'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_agent_actions_created_at', ['created_at'], unique=False, if_not_exists=True)
+        batch_op.create_index(batch_op.f('ix_agent_actions_decision_id'), ['decision_id'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_agent_actions_machine_id_action_created_at', ['machine_id', 'action', 'created_at'], unique=False, if_not_exists=True)
+
+    new_columns = [
+        sa.Column('throughput_change_percent', sa.Float(), nullable=True),
+        sa.Column('energy_change_percent', sa.Float(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+    ]
+    with op.batch_alter_table('agent_decisions', schema=None) as batch_op:
+        for column in new_columns:
+            if column.name not in existing:
+                batch_op.add_column(column)
+
+    if 'impact' not in existing:
+        return
+
+    _backfill()
+
+    with op.batch_alter_table('agent_decisions', schema=None) as batch_op:
+        if op.get_bind().dialect.name == 'postgresql':
+            batch_op.alter_column('decision',
+                   existing_type=sa.TEXT(),
+                   type_=postgresql.JSONB(astext_type=sa.Text()),
+                   existing_nullable=False,
+                   postgresql_using='decision::jsonb')
+        batch_op.drop_column('impact')
+
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('agent_decisions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('impact', sa.VARCHAR(length=100), nullable=True))
+        if op.get_bind().dialect.name == 'postgresql':
+            batch_op.alter_column('decision',
+                   existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                   type_=sa.TEXT(),
+                   existing_nullable=False,
+                   postgresql_using='decision::text')
+        batch_op.drop_column('notes')
+        batch_op.drop_column('energy_change_percent')
+        batch_op.drop_column('throughput_change_percent')
+
+    with op.batch_alter_table('agent_actions', schema=None) as batch_op:
+        batch_op.drop_index('ix_agent_actions_machine_id_action_created_at')
+        batch_op.drop_index(batch_op.f('ix_agent_actions_decision_id'))
+        batch_op.drop_index('ix_agent_actions_created_at')
+        batch_op.drop_index('ix_agent_actions_agent_name_created_at')
+
+    op.drop_table('agent_actions')
+    # ### end Alembic commands ###
@@ -0,0 +1,20 @@
+"""
+Run: python serve_async.py
+Serves the app on gevent instead of the threaded dev server, so each idle SSE
+connection is a greenlet rather than an OS thread. Requires `pip install gevent`.
+"""
+
+from gevent import monkey
+
+# Patch threading/socket before anything else imports them
+monkey.patch_all()
+
+import os
+from gevent.pywsgi import WSGIServer
+from app import app
+
+if __name__ == "__main__":
+    host = os.environ.get("HOST", "127.0.0.1")
+    port = int(os.environ.get("PORT", 5000))
+    print(f"[>] Serving IntelliFactory with gevent on http://{host}:{port}")
+    WSGIServer((host, port), app).serve_forever()
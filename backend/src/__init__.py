@@ -2,25 +2,46 @@ from flask import Flask
 from flask_migrate import Migrate
 from src.config import Config
 from src.models import db
+from src.utils import metrics
+from src.utils.log_config import configure_logging
 from flask_cors import CORS
 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    configure_logging(Config.LOG_LEVEL, Config.LOG_FORMAT)
 
     db.init_app(app)
     Migrate(app, db)
-    CORS(app)
+    # Let browser clients read the pagination cursor and ETag
+    CORS(app, expose_headers=["X-Next-Cursor", "X-Series-Resolution", "ETag"])
+
+    from src.blueprints.events import bus
+    from src.services.decision_writer import decision_writer
+    from src.services.job_queue import job_queue
+    from src.services.scheduler import scheduler
+    from src.services.telemetry import telemetry_buffer
+
+    bus.init_app(app)
+    decision_writer.init_app(app)
+    job_queue.init_app(app)
+    metrics.init_app(app)
+    scheduler.init_app(app)
+    telemetry_buffer.init_app(app)
 
     # Register blueprints
     from src.blueprints.agents import agents_bp
     from src.blueprints.data import data_bp
     from src.blueprints.events import events_bp
+    from src.blueprints.metrics import metrics_bp
+    from src.blueprints.simulation import simulation_bp
 
     app.register_blueprint(agents_bp)
     app.register_blueprint(data_bp)
     app.register_blueprint(events_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(simulation_bp)
 
     return app
 
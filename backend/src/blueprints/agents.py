@@ -1,55 +1,60 @@
-from flask import Blueprint, jsonify
+import logging
+from flask import Blueprint, abort, jsonify, url_for
+from src.config import Config
+from src.services.action_planner import apply_merged
 from src.services.agent_core import run_agent
+from src.services.agent_runner import RUN_ALL_AGENTS, run_agents
+from src.services.decision_cache import get_decision_cache
+from src.services.job_queue import QueueFullError, job_key, job_queue
+from src.services.scheduler import scheduler
 from src.services.simulation import apply_actions
+from src.services.what_if import evaluate_actions, evaluate_proposals
 from src.utils.build_state import build_factory_state
 from flask import request
-from src.blueprints.events import push_event
+
+log = logging.getLogger(__name__)
 
 agents_bp = Blueprint("agents", __name__, url_prefix="/api/agents")
 
 
+def _run_and_apply(agent_name, state):
+    result = run_agent(agent_name, state)
+    updates = apply_actions(result.get("actions", []))
+    return {"agent": agent_name, "decision": result, "updates": updates}
+
+
 @agents_bp.route("/production", methods=["POST"])
 def run_production():
     state = build_factory_state()
-    print("[>] Running Production Agent")
-    result = run_agent("ProductionAgent", state)
-    updates = apply_actions(result.get("actions", []))
-    return jsonify({"agent": "ProductionAgent", "decision": result, "updates": updates})
+    log.debug("Running Production Agent")
+    return _respond("run:ProductionAgent", state, lambda: _run_and_apply("ProductionAgent", state))
 
 
 @agents_bp.route("/energy", methods=["POST"])
 def run_energy():
     state = build_factory_state()
-    result = run_agent("EnergyAgent", state)
-    updates = apply_actions(result.get("actions", []))
-    return jsonify({"agent": "EnergyAgent", "decision": result, "updates": updates})
+    return _respond("run:EnergyAgent", state, lambda: _run_and_apply("EnergyAgent", state))
 
 
 @agents_bp.route("/quality", methods=["POST"])
 def run_quality():
     state = build_factory_state()
-    result = run_agent("QualityAgent", state)
-    updates = apply_actions(result.get("actions", []))
-    return jsonify({"agent": "QualityAgent", "decision": result, "updates": updates})
+    return _respond("run:QualityAgent", state, lambda: _run_and_apply("QualityAgent", state))
 
 
 @agents_bp.route("/maintenance", methods=["POST"])
 def run_maintenance():
     state = build_factory_state()
-    result = run_agent("MaintenanceAgent", state)
-    updates = apply_actions(result.get("actions", []))
-    return jsonify(
-        {"agent": "MaintenanceAgent", "decision": result, "updates": updates}
+    return _respond(
+        "run:MaintenanceAgent", state, lambda: _run_and_apply("MaintenanceAgent", state)
     )
 
 
 @agents_bp.route("/supply", methods=["POST"])
 def run_supply():
     state = build_factory_state()
-    result = run_agent("SupplyChainAgent", state)
-    updates = apply_actions(result.get("actions", []))
-    return jsonify(
-        {"agent": "SupplyChainAgent", "decision": result, "updates": updates}
+    return _respond(
+        "run:SupplyChainAgent", state, lambda: _run_and_apply("SupplyChainAgent", state)
     )
 
 
@@ -57,9 +62,80 @@ def run_supply():
 @agents_bp.route("/suggest/<agent_name>", methods=["POST"])
 def suggest_agent(agent_name):
     state = build_factory_state()
-    result = run_agent(agent_name, state)
-    # don't apply actions, just return the suggested actions
-    return jsonify({"agent": agent_name, "decision": result})
+    horizon = _horizon_arg()
+
+    def work():
+        result = run_agent(agent_name, state)
+        # don't apply actions, just return the suggested actions with their simulated effect
+        evaluation = evaluate_actions(result.get("actions", []), horizon)
+        return {"agent": agent_name, "decision": result, "evaluation": evaluation}
+
+    return _respond(f"suggest:{agent_name}", state, work, params=horizon)
+
+
+# Suggestions from several agents (?agents=ProductionAgent,EnergyAgent; default all),
+# each evaluated side by side against the same baseline
+@agents_bp.route("/suggest", methods=["POST"])
+def suggest_all():
+    requested = request.args.get("agents")
+    agents = RUN_ALL_AGENTS
+    if requested:
+        names = set(requested.split(","))
+        agents = [(key, name) for key, name in RUN_ALL_AGENTS if name in names or key in names]
+    state = build_factory_state()
+    mode = request.args.get("mode")
+    horizon = _horizon_arg()
+
+    def work():
+        results = run_agents(agents, state, mode=mode)
+        evaluations = evaluate_proposals(
+            {key: res.get("actions", []) for key, res in results.items()}, horizon
+        )
+        return {
+            key: {"decision": res, "evaluation": evaluations[key]}
+            for key, res in results.items()
+        }
+
+    return _respond(
+        "suggest:" + ",".join(name for _, name in agents), state, work, params=[mode, horizon]
+    )
+
+
+# What-if: simulate proposals without touching the DB
+# {"actions": [...]} or {"proposals": {"name": [...], ...}}, optional "horizon_hours"
+@agents_bp.route("/evaluate", methods=["POST"])
+def evaluate_endpoint():
+    payload = request.get_json()
+    payload = {} if payload is None else payload
+    if not isinstance(payload, dict):
+        abort(400, description="Expected a JSON object")
+    horizon = _horizon_arg(payload.get("horizon_hours"))
+    if "proposals" in payload:
+        proposals = payload["proposals"]
+        if not isinstance(proposals, dict):
+            abort(400, description="proposals must be an object of {name: [actions]}")
+        proposals = {name: _action_list(actions, f"proposals.{name}") for name, actions in proposals.items()}
+        return jsonify(evaluate_proposals(proposals, horizon))
+    return jsonify(evaluate_actions(_action_list(payload.get("actions", []), "actions"), horizon))
+
+
+def _action_list(actions, name):
+    if not isinstance(actions, list) or not all(isinstance(a, dict) for a in actions):
+        abort(400, description=f"{name} must be a list of action objects")
+    return actions
+
+
+def _horizon_arg(value=None):
+    value = value if value is not None else request.args.get("horizon_hours")
+    if value is None:
+        return None
+    try:
+        horizon = float(value)
+    except (TypeError, ValueError):
+        abort(400, description="horizon_hours must be a number")
+    if not 0 < horizon <= Config.SIM_MAX_HOURS:
+        abort(400, description=f"horizon_hours must be in (0, {Config.SIM_MAX_HOURS:g}]")
+    return horizon
 
 
 # New: apply a list of actions (POST from frontend after user accepts suggestions)
@@ -67,12 +143,9 @@ def suggest_agent(agent_name):
 def apply_actions_endpoint():
     payload = request.get_json() or {}
     actions = payload.get("actions", [])
+    # apply_actions broadcasts the resulting machine deltas
     updates = apply_actions(actions)
 
-    # broadcast updates
-    for u in updates:
-        push_event("machine_update", u)
-
     return jsonify({"updates": updates})
 
 
@@ -80,17 +153,100 @@ def apply_actions_endpoint():
 @agents_bp.route("/run_all", methods=["POST"])
 def run_all():
     state = build_factory_state()
-    results = {
-        "production_agent": run_agent("ProductionAgent", state),
-        "energy_agent": run_agent("EnergyAgent", state),
-        "quality_agent": run_agent("QualityAgent", state),
-        "maintenance_agent": run_agent("MaintenanceAgent", state),
-        "supply_agent": run_agent("SupplyChainAgent", state),
-    }
-
-    # Apply actions from all agents
-    updates = []
-    for res in results.values():
-        updates += apply_actions(res.get("actions", []))
-
-    return jsonify({"agents": results, "updates": updates})
+    # ?mode=sequential forces the one-by-one path; defaults to Config.AGENT_RUN_MODE
+    mode = request.args.get("mode")
+    # ?policy=priority|weighted overrides ACTION_MERGE_POLICY
+    policy = _policy_arg()
+
+    def work():
+        results = run_agents(RUN_ALL_AGENTS, state, mode=mode)
+        # Merge all agents' actions into one conflict-free plan and apply it in one transaction
+        names = dict(RUN_ALL_AGENTS)
+        proposals = [(names[key], res.get("actions", [])) for key, res in results.items()]
+        plan, rationale, updates = apply_merged(proposals, policy=policy)
+        return {"agents": results, "plan": plan, "rationale": rationale, "updates": updates}
+
+    return _respond("run_all", state, work, params=[mode, policy])
+
+
+def _policy_arg():
+    policy = request.args.get("policy")
+    if policy not in (None, "priority", "weighted"):
+        abort(400, description="policy must be priority or weighted")
+    return policy
+
+
+def _respond(kind, state, work, params=None):
+    """
+    Run `work()` inline, or with ?async=1 (default: AGENT_ASYNC) as a background job:
+    202 with the job id right away, result via GET /jobs/<id> and a `job_complete`
+    SSE event. Identical in-flight requests (same kind, state and params) share one job.
+    """
+    wants_async = request.args.get("async", "1" if Config.AGENT_ASYNC else "0")
+    if wants_async.lower() in ("0", "false", "no", "off"):
+        return jsonify(work())
+
+    try:
+        job, created = job_queue.submit(kind, job_key(kind, state, params), work)
+    except QueueFullError as e:
+        response = jsonify({"error": f"Agent job queue is full: {e}"})
+        response.headers["Retry-After"] = str(Config.JOB_RETRY_AFTER)
+        return response, 429
+    status_url = url_for("agents.get_job", job_id=job.id)
+    response = jsonify(
+        {"job_id": job.id, "status": job.status, "deduplicated": not created, "status_url": status_url}
+    )
+    return response, 202, {"Location": status_url}
+
+
+@agents_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404, description="Unknown or expired job")
+    return jsonify(job.to_dict())
+
+
+@agents_bp.route("/jobs", methods=["GET"])
+def job_stats():
+    return jsonify(job_queue.stats())
+
+
+# Periodic agent runs: status, start/stop and a manual scheduling round
+@agents_bp.route("/scheduler", methods=["GET"])
+def scheduler_status():
+    return jsonify(scheduler.status())
+
+
+@agents_bp.route("/scheduler", methods=["POST"])
+def scheduler_control():
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get("enabled"), bool):
+        abort(400, description="Body must be {\"enabled\": true|false}")
+    if data["enabled"]:
+        scheduler.start()
+    else:
+        scheduler.stop()
+    return jsonify(scheduler.status())
+
+
+@agents_bp.route("/scheduler/tick", methods=["POST"])
+def scheduler_tick():
+    return jsonify(scheduler.tick())
+
+
+# Decision cache statistics (hit/miss counters) and manual invalidation
+@agents_bp.route("/cache", methods=["GET"])
+def cache_stats():
+    cache = get_decision_cache()
+    if cache is None:
+        return jsonify({"backend": "off"})
+    return jsonify(cache.stats())
+
+
+@agents_bp.route("/cache", methods=["DELETE"])
+def clear_cache():
+    cache = get_decision_cache()
+    if cache is not None:
+        cache.clear()
+    return jsonify({"cleared": cache is not None})
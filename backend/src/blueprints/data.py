@@ -1,30 +1,51 @@
 # backend\src\blueprints\data.py
 
-from flask import Blueprint, jsonify, request
-from src.models import Machine, Order, EnergyPrice, AgentDecision
+from datetime import datetime, timedelta
+from flask import Blueprint, abort, jsonify, request
+from sqlalchemy import func, select
+from src.config import Config
+from src.models import MachineTelemetry, Order, EnergyPrice, AgentAction, AgentDecision
 from src.models import db
-from src.blueprints.events import push_event
+from src.blueprints.events import push_machine_update
+from src.services.energy_series import compact_raw, ingest_prices, read_series
+from src.services.machine_state import (
+    VersionConflict, load_machine, machine_etag, parse_if_match, update_machine_versioned,
+)
+from src.services.snapshot import get_snapshot, invalidate_snapshot
+from src.services.telemetry import (
+    READINGS, TelemetryBufferFull, parse_binary, parse_ndjson, telemetry_buffer,
+)
+from src.utils.pagination import keyset_page, page_response, parse_datetime_arg, parse_limit
 
 data_bp = Blueprint("data", __name__, url_prefix="/api/data")
 
 
 @data_bp.route("/machines", methods=["GET"])
 def get_machines():
-    machines = [
-        {
-            "id": m.id,
-            "name": m.name,
-            "status": m.status,
-            "utilization": m.utilization,
-            "energy_usage": m.energy_usage,
-        }
-        for m in Machine.query.all()
-    ]
-    return jsonify(machines)
+    machines = get_snapshot().machines
+    statuses = _list_arg("status")
+    if statuses:
+        machines = [m for m in machines if m["status"] in statuses]
+    return page_response(machines)
 
 
 @data_bp.route("/orders", methods=["GET"])
 def get_orders():
+    """Orders by deadline. Filters: ?status=a,b&due_after=&due_before= ; paged by ?cursor=&limit="""
+    query = Order.query
+    statuses = _list_arg("status")
+    if statuses:
+        query = query.filter(Order.status.in_(statuses))
+    due_after = parse_datetime_arg("due_after")
+    if due_after:
+        query = query.filter(Order.deadline >= due_after)
+    due_before = parse_datetime_arg("due_before")
+    if due_before:
+        query = query.filter(Order.deadline < due_before)
+
+    rows, next_cursor = keyset_page(
+        query, [Order.deadline, Order.id], False, parse_limit(), [datetime, int]
+    )
     orders = [
         {
             "id": o.id,
@@ -33,66 +54,368 @@ def get_orders():
             "deadline": o.deadline.isoformat(),
             "status": o.status,
         }
-        for o in Order.query.all()
+        for o in rows
     ]
-    return jsonify(orders)
+    return page_response(orders, next_cursor)
 
 
 @data_bp.route("/energy", methods=["GET"])
 def get_energy():
+    """Energy prices, newest first. Filters: ?start=&end= (ISO); paged by ?cursor=&limit="""
+    query = EnergyPrice.query
+    start = parse_datetime_arg("start")
+    if start:
+        query = query.filter(EnergyPrice.timestamp >= start)
+    end = parse_datetime_arg("end")
+    if end:
+        query = query.filter(EnergyPrice.timestamp < end)
+
+    rows, next_cursor = keyset_page(
+        query, [EnergyPrice.timestamp, EnergyPrice.id], True, parse_limit(), [datetime, int]
+    )
     prices = [
         {"timestamp": e.timestamp.isoformat(), "price_per_kwh": e.price_per_kwh}
-        for e in EnergyPrice.query.all()
+        for e in rows
     ]
-    return jsonify(prices)
+    return page_response(prices, next_cursor)
+
+
+@data_bp.route("/energy/series", methods=["GET"])
+def get_energy_series():
+    """
+    Price series for a time range, downsampled to fit ?max_points=. Raw points for
+    short recent ranges, hourly or daily rollups (min/avg/max + peak flag) beyond.
+    Filters: ?start=&end= (ISO, default last 24h); ?resolution=raw|hour|day forces one.
+    """
+    end = parse_datetime_arg("end") or datetime.utcnow()
+    start = parse_datetime_arg("start") or end - timedelta(hours=24)
+    if start >= end:
+        abort(400, description="start must be before end")
+    resolution = request.args.get("resolution")
+    if resolution not in (None, "raw", "hour", "day"):
+        abort(400, description="resolution must be raw, hour or day")
+    max_points = request.args.get("max_points", type=int)
+
+    resolution, points = read_series(start, end, max_points, resolution)
+    response = page_response(points)
+    response.headers["X-Series-Resolution"] = resolution
+    return response
+
+
+@data_bp.route("/energy/ingest", methods=["POST"])
+def ingest_energy():
+    """Append price readings: [{"timestamp", "price_per_kwh"}, ...] or {"points": [...]}"""
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get("points")
+    if not isinstance(payload, list):
+        abort(400, description="Expected a list of price points")
+    try:
+        points = [
+            (datetime.fromisoformat(p["timestamp"]), float(p["price_per_kwh"]))
+            for p in payload
+        ]
+    except (KeyError, TypeError, ValueError):
+        abort(400, description="Each point needs an ISO timestamp and a numeric price_per_kwh")
+    return jsonify({"status": "success", "ingested": ingest_prices(points)})
+
+
+@data_bp.route("/energy/compact", methods=["POST"])
+def compact_energy():
+    """Apply the retention policy to raw prices and hourly rollups."""
+    return jsonify({"status": "success", **compact_raw()})
+
+
+@data_bp.route("/telemetry", methods=["POST"])
+def ingest_telemetry():
+    """
+    Buffer machine readings for the next bulk write. Body is NDJSON (one
+    {"machine_id", "ts", "utilization", "energy_usage", "status"} per line; all but
+    machine_id optional) or, with Content-Type application/octet-stream, packed
+    telemetry.BINARY_RECORD structs. Readings for unknown machines are rejected.
+    ?flush=1 writes the buffer before answering. 503 + Retry-After when full.
+    """
+    body = request.get_data(cache=False)
+    try:
+        if request.mimetype == "application/octet-stream":
+            readings = parse_binary(body)
+        else:
+            readings = parse_ndjson(body.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        abort(400, description=f"Invalid telemetry batch: {e}")
+
+    known = {m["id"] for m in get_snapshot().machines}
+    accepted = [r for r in readings if r[0] in known]
+    rejected = len(readings) - len(accepted)
+    if rejected:
+        READINGS.inc(rejected, result="rejected")
+
+    try:
+        buffered = telemetry_buffer.add(accepted)
+    except TelemetryBufferFull as e:
+        response = jsonify({"error": f"Telemetry buffer is full: {e}"})
+        response.headers["Retry-After"] = str(Config.TELEMETRY_RETRY_AFTER)
+        return response, 503
+    result = {"accepted": len(accepted), "rejected": rejected, "buffered": buffered}
+    if request.args.get("flush", "0").lower() in ("1", "true", "yes"):
+        result["written"] = telemetry_buffer.flush()
+        result["buffered"] = telemetry_buffer.buffered()
+    return jsonify(result), 202
+
+
+@data_bp.route("/machines/<int:machine_id>/telemetry", methods=["GET"])
+def get_machine_telemetry(machine_id):
+    """Telemetry history for one machine, newest first. Filters: ?start=&end= ; paged by ?cursor=&limit="""
+    query = MachineTelemetry.query.filter(MachineTelemetry.machine_id == machine_id)
+    start = parse_datetime_arg("start")
+    if start:
+        query = query.filter(MachineTelemetry.ts >= start)
+    end = parse_datetime_arg("end")
+    if end:
+        query = query.filter(MachineTelemetry.ts < end)
+
+    rows, next_cursor = keyset_page(
+        query, [MachineTelemetry.ts, MachineTelemetry.id], True, parse_limit(), [datetime, int]
+    )
+    readings = [
+        {
+            "ts": t.ts.isoformat(),
+            "utilization": t.utilization,
+            "energy_usage": t.energy_usage,
+            "status": t.status,
+        }
+        for t in rows
+    ]
+    return page_response(readings, next_cursor)
 
 
 @data_bp.route("/decisions", methods=["GET"])
 def get_decisions():
+    """
+    Decisions, newest first. Filters: ?agent=a,b&since=&until=, and ?machine_id=&action=
+    for decisions with a matching action ; paged by ?cursor=&limit=
+    """
+    query = AgentDecision.query
+    agents = _list_arg("agent")
+    if agents:
+        query = query.filter(AgentDecision.agent_name.in_(agents))
+    since = parse_datetime_arg("since")
+    if since:
+        query = query.filter(AgentDecision.created_at >= since)
+    until = parse_datetime_arg("until")
+    if until:
+        query = query.filter(AgentDecision.created_at < until)
+    machine_ids = _int_list_arg("machine_id")
+    actions = _list_arg("action")
+    if machine_ids or actions:
+        matching = _filter_actions(select(AgentAction.decision_id), machine_ids, actions)
+        query = query.filter(AgentDecision.id.in_(matching))
+
+    rows, next_cursor = keyset_page(
+        query,
+        [AgentDecision.created_at, AgentDecision.id],
+        True,
+        parse_limit(default=20),
+        [datetime, int],
+    )
     decisions = [
         {
             "id": d.id,
             "agent": d.agent_name,
             "decision": d.decision,
+            "throughput_change_percent": d.throughput_change_percent,
+            "energy_change_percent": d.energy_change_percent,
+            "notes": d.notes,
             "created_at": d.created_at.isoformat(),
         }
-        for d in AgentDecision.query.order_by(AgentDecision.created_at.desc()).limit(20)
+        for d in rows
+    ]
+    return page_response(decisions, next_cursor)
+
+
+@data_bp.route("/actions", methods=["GET"])
+def get_actions():
+    """Individual agent actions, newest first. Filters: ?machine_id=&action=&agent=&since=&until= ; paged"""
+    query = _filter_actions(AgentAction.query, _int_list_arg("machine_id"), _list_arg("action"))
+    agents = _list_arg("agent")
+    if agents:
+        query = query.filter(AgentAction.agent_name.in_(agents))
+    since = parse_datetime_arg("since")
+    if since:
+        query = query.filter(AgentAction.created_at >= since)
+    until = parse_datetime_arg("until")
+    if until:
+        query = query.filter(AgentAction.created_at < until)
+
+    rows, next_cursor = keyset_page(
+        query, [AgentAction.created_at, AgentAction.id], True, parse_limit(), [datetime, int]
+    )
+    actions = [
+        {
+            "id": a.id,
+            "decision_id": a.decision_id,
+            "agent": a.agent_name,
+            "machine_id": a.machine_id,
+            "action": a.action,
+            "value": a.value,
+            "created_at": a.created_at.isoformat(),
+        }
+        for a in rows
     ]
-    return jsonify(decisions)
+    return page_response(actions, next_cursor)
+
+
+ACTION_GROUPS = {
+    "machine": AgentAction.machine_id,
+    "agent": AgentAction.agent_name,
+    "action": AgentAction.action,
+}
+
+
+@data_bp.route("/actions/stats", methods=["GET"])
+def action_stats():
+    """
+    Action counts grouped by ?group_by=machine,agent,action (default machine,action) and
+    optionally per ?bucket=hour|day, over ?since=&until= and the same filters as /actions.
+    Computed in SQL with GROUP BY; each row has the group keys, `count` and `total_value`.
+    """
+    groups = _list_arg("group_by") or ["machine", "action"]
+    unknown = [g for g in groups if g not in ACTION_GROUPS]
+    if unknown:
+        abort(400, description=f"group_by must be among {', '.join(ACTION_GROUPS)}")
+    bucket = request.args.get("bucket")
+    if bucket not in (None, "hour", "day"):
+        abort(400, description="bucket must be hour or day")
+
+    columns = [ACTION_GROUPS[g].label(g) for g in groups]
+    if bucket:
+        columns.append(_time_bucket(AgentAction.created_at, bucket).label("bucket"))
+    query = select(
+        *columns,
+        func.count().label("count"),
+        func.coalesce(func.sum(AgentAction.value), 0).label("total_value"),
+    )
+    query = _filter_actions(query, _int_list_arg("machine_id"), _list_arg("action"))
+    agents = _list_arg("agent")
+    if agents:
+        query = query.where(AgentAction.agent_name.in_(agents))
+    since = parse_datetime_arg("since")
+    if since:
+        query = query.where(AgentAction.created_at >= since)
+    until = parse_datetime_arg("until")
+    if until:
+        query = query.where(AgentAction.created_at < until)
+    keys = [c.name for c in columns]
+    query = query.group_by(*[c.element for c in columns]).order_by(*[c.element for c in columns])
+
+    stats = []
+    for row in db.session.execute(query):
+        item = dict(row._mapping)
+        if bucket and isinstance(item["bucket"], datetime):
+            item["bucket"] = item["bucket"].isoformat()
+        item["total_value"] = float(item["total_value"])
+        stats.append({k: item[k] for k in keys + ["count", "total_value"]})
+    return jsonify(stats)
+
+
+def _filter_actions(query, machine_ids, actions):
+    if machine_ids:
+        query = query.filter(AgentAction.machine_id.in_(machine_ids))
+    if actions:
+        query = query.filter(AgentAction.action.in_(actions))
+    return query
+
+
+def _time_bucket(column, unit):
+    """Start of the hour/day as a GROUP BY expression (ISO string on SQLite)."""
+    if db.engine.dialect.name == "postgresql":
+        return func.date_trunc(unit, column)
+    fmt = "%Y-%m-%dT%H:00:00" if unit == "hour" else "%Y-%m-%dT00:00:00"
+    return func.strftime(fmt, column)
+
+
+def _list_arg(name):
+    value = request.args.get(name)
+    return [v for v in value.split(",") if v] if value else None
+
+
+def _int_list_arg(name):
+    values = _list_arg(name)
+    try:
+        return [int(v) for v in values] if values else None
+    except ValueError:
+        abort(400, description=f"{name} must be a comma-separated list of integers")
+
+
+@data_bp.route("/machines/<int:machine_id>", methods=["GET"])
+def get_machine(machine_id):
+    """One machine; its ETag is the row version to send back in If-Match."""
+    machine = load_machine(machine_id)
+    if machine is None:
+        abort(404)
+    return _machine_response(machine)
 
 
 @data_bp.route("/machines/<int:machine_id>", methods=["PUT"])
 def update_machine(machine_id):
-    """Update machine record in DB and broadcast via SSE"""
+    """
+    Update machine record in DB and broadcast via SSE. The write is conditional on
+    the row version and retried if another writer wins; with If-Match it is not
+    retried, and a stale version gets 412 with the current record.
+    """
     payload = request.get_json() or {}
-    m = Machine.query.get_or_404(machine_id)
-
-    # allowed fields to update
-    if "status" in payload:
-        m.status = payload["status"]
-    if "utilization" in payload:
-        try:
-            m.utilization = float(payload["utilization"])
-        except Exception:
-            pass
-    if "name" in payload:
-        m.name = payload["name"]
-    if "energy_usage" in payload:
-        try:
-            m.energy_usage = float(payload["energy_usage"])
-        except Exception:
-            pass
-
-    db.session.add(m)
-    db.session.commit()
+    try:
+        expected = parse_if_match(request.headers.get("If-Match"))
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    def changes(_current):
+        values = {}
+        # allowed fields to update
+        if "status" in payload:
+            values["status"] = payload["status"]
+        if "name" in payload:
+            values["name"] = payload["name"]
+        for field in ("utilization", "energy_usage"):
+            if field in payload:
+                try:
+                    values[field] = float(payload[field])
+                except Exception:
+                    pass
+        return values
+
+    try:
+        m = update_machine_versioned(machine_id, changes, expected_version=expected)
+    except VersionConflict as e:
+        if e.current is None:
+            abort(404)
+        response = _machine_response(e.current)
+        response.status_code = 412
+        return response
+    if m is None:
+        abort(404)
+    invalidate_snapshot()
 
     # broadcast event to SSE clients
-    push_event("machine_update", {"machine_id": m.id, "new_status": m.status, "new_utilization": m.utilization})
-
-    return jsonify({
-        "id": m.id,
-        "name": m.name,
-        "status": m.status,
-        "utilization": m.utilization,
-        "energy_usage": m.energy_usage,
+    push_machine_update(
+        m["id"],
+        name=m["name"],
+        status=m["status"],
+        utilization=m["utilization"],
+        energy_usage=m["energy_usage"],
+    )
+
+    return _machine_response(m)
+
+
+def _machine_response(machine):
+    response = jsonify({
+        "id": machine["id"],
+        "name": machine["name"],
+        "status": machine["status"],
+        "utilization": machine["utilization"],
+        "energy_usage": machine["energy_usage"],
+        "version": machine["version"],
     })
+    response.headers["ETag"] = machine_etag(machine["version"])
+    return response
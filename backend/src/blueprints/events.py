@@ -1,26 +1,112 @@
-from flask import Blueprint, Response
+from flask import Blueprint, Response, request
 import json
-import time
-import queue
-import threading
+from src.config import Config
+from src.services.event_broker import EventBroker
+from src.services.event_bus import create_event_bus
+from src.services.event_coalescer import MachineUpdateCoalescer
+from src.utils import metrics
 
 events_bp = Blueprint("events", __name__, url_prefix="/api/events")
 
-# Shared queue for broadcasts
-event_queue = queue.Queue()
+# Shared broker for broadcasts; every SSE client reads its own cursor into it
+broker = EventBroker(
+    history_size=Config.SSE_HISTORY_SIZE, buffer_size=Config.SSE_SUBSCRIBER_BUFFER
+)
+
+# Exposed on /api/metrics
+SSE_PUBLISHED = metrics.registry.counter("sse_events_published_total", "Events published to SSE clients", ("event",))
+SSE_DROPPED = metrics.registry.counter("sse_events_dropped_total", "Events skipped by slow SSE clients (sent a resync)")
+metrics.registry.gauge("sse_subscribers", "Connected SSE clients").set_function(
+    lambda: broker.subscriber_count
+)
+metrics.registry.gauge("sse_history_events", "Events held in the SSE history ring").set_function(
+    lambda: broker.stats()["history"]
+)
+metrics.registry.gauge("sse_max_backlog_events", "Largest unread backlog of any SSE client").set_function(
+    lambda: broker.stats()["max_backlog"]
+)
+
+
+def _publish_local(event_type, data):
+    broker.publish(event_type, data)
+    SSE_PUBLISHED.inc(event=event_type)
+
+
+# Machine changes are merged per machine and sent as versioned `machine_delta` events.
+# Versions are per process, so the bus carries the raw `machine_update`s and every
+# process runs its own coalescer.
+coalescer = MachineUpdateCoalescer(
+    _publish_local,
+    window_ms=Config.EVENT_COALESCE_WINDOW_MS,
+    keyframe_every=Config.EVENT_KEYFRAME_EVERY,
+)
+metrics.registry.gauge("machine_updates_pending", "Machines waiting for the next delta flush").set_function(
+    coalescer.pending_count
+)
+
+
+def _deliver(event_type, data):
+    """Fan an event (from this process or another one) out to this process's SSE clients."""
+    if event_type == "machine_update":
+        coalescer.add(data["machine_id"], data["fields"])
+    else:
+        _publish_local(event_type, data)
+
+
+# Shares events between processes (EVENT_BUS=memory|postgres|redis)
+bus = create_event_bus(_deliver, Config)
+metrics.registry.gauge("event_bus_pending", "Events waiting to be sent to the event bus").set_function(
+    lambda: bus.pending()
+)
 
 
 def push_event(event_type, data):
     """Broadcast event to SSE clients"""
-    event_queue.put({"event": event_type, "data": data, "time": time.time()})
+    bus.publish(event_type, data)
+
+
+def push_machine_update(machine_id, **fields):
+    """Queue changed machine fields (status, utilization, ...) for the next delta flush"""
+    bus.publish("machine_update", {"machine_id": machine_id, "fields": fields})
 
 
 @events_bp.route("/stream")
 def stream():
+    # Browsers send Last-Event-ID on reconnect; ?last_event_id= works for manual clients
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    seen_versions = {}  # machine_id -> last machine_delta version sent to this client
+
     def event_stream():
-        while True:
-            event = event_queue.get()  # blocking wait
-            yield f"event: {event['event']}\n"
-            yield f"data: {json.dumps(event['data'])}\n\n"
+        # Subscribe only once the response is being streamed: a client that is gone
+        # before then never starts the generator, so its finally would never run
+        subscription = broker.subscribe(last_event_id)
+        try:
+            yield f"retry: {Config.SSE_RETRY_MS}\n\n"
+            if subscription.needs_resync:
+                # Last-Event-ID came from another worker or before a restart
+                yield f"event: resync\ndata: {json.dumps({'dropped': None})}\n\n"
+            while True:
+                events, dropped = subscription.next_events(timeout=Config.SSE_HEARTBEAT_SECONDS)
+                if dropped:
+                    SSE_DROPPED.inc(dropped)
+                    # Client was too slow or replayed past our history: tell it to refetch
+                    yield f"event: resync\ndata: {json.dumps({'dropped': dropped})}\n\n"
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+                for event_id, event_type, payload, _, data in events:
+                    if event_type == "machine_delta":
+                        view = coalescer.client_view(data, seen_versions)
+                        if view is not None:
+                            if not view["machines"]:
+                                continue
+                            payload = json.dumps(view)
+                    yield f"id: {broker.format_id(event_id)}\nevent: {event_type}\ndata: {payload}\n\n"
+        finally:
+            subscription.close()
 
-    return Response(event_stream(), mimetype="text/event-stream")
+    return Response(
+        event_stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,12 @@
+from flask import Blueprint, Response, abort
+from src.utils import metrics
+
+metrics_bp = Blueprint("metrics", __name__, url_prefix="/api/metrics")
+
+
+# Prometheus scrape target
+@metrics_bp.route("", methods=["GET"])
+def prometheus_metrics():
+    if not metrics.ENABLED:
+        abort(404, description="Metrics are disabled (METRICS=off)")
+    return Response(metrics.registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
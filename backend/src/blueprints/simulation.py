@@ -0,0 +1,59 @@
+from flask import Blueprint, abort, jsonify, request
+from src.config import Config
+from src.services.sim_engine import engine_lock, get_engine
+
+simulation_bp = Blueprint("simulation", __name__, url_prefix="/api/simulation")
+
+
+@simulation_bp.route("/state", methods=["GET"])
+def get_state():
+    with engine_lock:
+        return jsonify(get_engine().summary())
+
+
+@simulation_bp.route("/run", methods=["POST"])
+def run_simulation():
+    """
+    Advance the simulation: {"hours": 1, "tick_minutes": 5, "checkpoint_hours": null,
+    "actions": [...]}. Actions are applied before the first tick; machine and order
+    state is written to the DB at each checkpoint and at the end.
+    """
+    payload = request.get_json(silent=True)
+    payload = {} if payload is None else payload
+    if not isinstance(payload, dict):
+        abort(400, description="Expected a JSON object")
+    actions = payload.get("actions") or []
+    if not isinstance(actions, list) or not all(isinstance(a, dict) for a in actions):
+        abort(400, description="actions must be a list of action objects")
+    try:
+        hours = float(payload.get("hours", 1))
+        tick_minutes = float(payload.get("tick_minutes") or Config.SIM_TICK_MINUTES)
+        checkpoint_hours = payload.get("checkpoint_hours")
+        checkpoint_hours = float(checkpoint_hours) if checkpoint_hours else None
+    except (TypeError, ValueError):
+        abort(400, description="hours, tick_minutes and checkpoint_hours must be numbers")
+    if not 0 < hours <= Config.SIM_MAX_HOURS:
+        abort(400, description=f"hours must be in (0, {Config.SIM_MAX_HOURS:g}]")
+    if not 0 < tick_minutes <= 60:
+        abort(400, description="tick_minutes must be in (0, 60]")
+    if checkpoint_hours is not None and checkpoint_hours <= 0:
+        abort(400, description="checkpoint_hours must be positive")
+
+    with engine_lock:
+        engine = get_engine()
+        applied = engine.apply_actions(actions)
+        timeline = engine.run(hours, tick_minutes, checkpoint_hours)
+        return jsonify(
+            {"applied_actions": applied, "timeline": timeline, "summary": engine.summary()}
+        )
+
+
+@simulation_bp.route("/reset", methods=["POST"])
+def reset_simulation():
+    """Reload the simulation from the DB, dropping clock, order progress and totals. {"seed": int}"""
+    payload = request.get_json(silent=True) or {}
+    seed = payload.get("seed") if isinstance(payload, dict) else None
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int) or seed < 0):
+        abort(400, description="seed must be a non-negative integer")
+    with engine_lock:
+        return jsonify(get_engine(reset=True, seed=seed).summary())
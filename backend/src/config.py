@@ -21,3 +21,137 @@ class Config:
     MODEL_API_KEY = os.environ.get("MODEL_API_KEY")
     MODEL_BASE_URL = os.environ.get("MODEL_BASE_URL", "https://api.scnet.cn/api/llm/v1")
     MODEL = os.environ.get("MODEL", "DeepSeek-R1-Distill-Qwen-7B")
+    # "openai" calls MODEL_BASE_URL; "stub" answers locally with deterministic rule-based agents
+    MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "openai")
+    STUB_LATENCY_MS = float(os.environ.get("STUB_LATENCY_MS", 0))
+    STUB_JITTER_MS = float(os.environ.get("STUB_JITTER_MS", 0))
+    STUB_FAILURE_RATE = float(os.environ.get("STUB_FAILURE_RATE", 0))  # transport errors / rate limits
+    STUB_INVALID_RATE = float(os.environ.get("STUB_INVALID_RATE", 0))  # non-JSON answers
+    STUB_SEED = int(os.environ.get("STUB_SEED", 0))
+    MODEL_TIMEOUT = float(os.environ.get("MODEL_TIMEOUT", 120))  # seconds per request
+    MODEL_POOL_SIZE = int(os.environ.get("MODEL_POOL_SIZE", 10))  # max open connections
+    MODEL_KEEPALIVE_EXPIRY = float(os.environ.get("MODEL_KEEPALIVE_EXPIRY", 60))
+    # Retry / resilience policy for model calls
+    MODEL_MAX_ATTEMPTS = int(os.environ.get("MODEL_MAX_ATTEMPTS", 3))
+    MODEL_BACKOFF_BASE = float(os.environ.get("MODEL_BACKOFF_BASE", 0.5))  # seconds
+    MODEL_BACKOFF_CAP = float(os.environ.get("MODEL_BACKOFF_CAP", 8))  # seconds
+    MODEL_MAX_CONCURRENCY = int(os.environ.get("MODEL_MAX_CONCURRENCY", 8))  # in-flight calls
+    CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_RESET_SECONDS = float(os.environ.get("CIRCUIT_RESET_SECONDS", 30))
+    # Stream completions and stop at the first valid JSON object
+    MODEL_STREAM = os.environ.get("MODEL_STREAM", "on") != "off"
+    # Forward actions to SSE clients (decision_partial) while they are generated
+    STREAM_PARTIAL_EVENTS = os.environ.get("STREAM_PARTIAL_EVENTS", "on") != "off"
+
+    # Agent execution (run_all)
+    AGENT_RUN_MODE = os.environ.get("AGENT_RUN_MODE", "concurrent")  # concurrent | sequential
+    AGENT_MAX_WORKERS = int(os.environ.get("AGENT_MAX_WORKERS", 5))
+    AGENT_TIMEOUT = float(os.environ.get("AGENT_TIMEOUT", 120))  # seconds per agent
+    # Background agent jobs (?async=1 on /api/agents/*, see services/job_queue.py)
+    AGENT_ASYNC = os.environ.get("AGENT_ASYNC", "off") == "on"  # make async the default
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+    JOB_QUEUE_DEPTH = int(os.environ.get("JOB_QUEUE_DEPTH", 32))  # waiting jobs before 429
+    JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", 600))  # seconds results stay pollable
+    JOB_RETRY_AFTER = int(os.environ.get("JOB_RETRY_AFTER", 5))  # Retry-After on 429
+    # Periodic agent runs (services/scheduler.py); enable it in one process only
+    SCHEDULER_ENABLED = os.environ.get("SCHEDULER", "off") == "on"
+    SCHEDULER_TICK_SECONDS = float(os.environ.get("SCHEDULER_TICK_SECONDS", 5))
+    SCHEDULER_MAX_RUNS_PER_MINUTE = int(os.environ.get("SCHEDULER_MAX_RUNS_PER_MINUTE", 6))  # agent runs; each makes 0 (cache hit) to MODEL_MAX_ATTEMPTS model calls
+    SCHEDULER_MIN_GAP_SECONDS = float(os.environ.get("SCHEDULER_MIN_GAP_SECONDS", 30))  # between triggered runs of one agent
+    SCHEDULER_APPLY = os.environ.get("SCHEDULER_APPLY", "on") != "off"  # off: decisions are only recorded
+    AGENT_SCHEDULE = os.environ.get(
+        "AGENT_SCHEDULE",
+        "ProductionAgent=300,EnergyAgent=600,QualityAgent=900,MaintenanceAgent=1800,SupplyChainAgent=900",
+    )  # agent=seconds between runs
+    TRIGGER_PRICE_THRESHOLD = float(os.environ.get("TRIGGER_PRICE_THRESHOLD", 0.2))  # $/kWh
+    TRIGGER_UTILIZATION_JUMP = float(os.environ.get("TRIGGER_UTILIZATION_JUMP", 20))  # points
+
+    # Logging and metrics (utils/log_config.py, utils/metrics.py, GET /api/metrics)
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")  # DEBUG shows per-agent prompt and write details
+    LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # text | json
+    METRICS_ENABLED = os.environ.get("METRICS", "on") != "off"
+
+    # Agent decision cache: memory | redis | off
+    DECISION_CACHE_BACKEND = os.environ.get("DECISION_CACHE_BACKEND", "memory")
+    DECISION_CACHE_TTL = int(os.environ.get("DECISION_CACHE_TTL", 300))  # seconds
+    DECISION_CACHE_MAX_ENTRIES = int(os.environ.get("DECISION_CACHE_MAX_ENTRIES", 512))
+    REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")  # optional
+
+    # Factory snapshot cache. Writes in this process invalidate it; set a max age
+    # (seconds) when several workers write to the same database. 0 = no expiry.
+    SNAPSHOT_MAX_AGE = float(os.environ.get("SNAPSHOT_MAX_AGE", 0))
+
+    # Per-agent state compaction before prompting (see services/state_compaction.py)
+    STATE_COMPACTION = os.environ.get("STATE_COMPACTION", "on") != "off"
+    # Few-shot examples after the system prompt (part of the cached static prefix)
+    PROMPT_FEW_SHOT = os.environ.get("PROMPT_FEW_SHOT", "off") == "on"
+    PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", 2000))
+
+    # Server-Sent Events
+    SSE_HISTORY_SIZE = int(os.environ.get("SSE_HISTORY_SIZE", 1000))  # replayable events
+    SSE_SUBSCRIBER_BUFFER = int(os.environ.get("SSE_SUBSCRIBER_BUFFER", 256))  # max backlog per client
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", 15))
+    SSE_RETRY_MS = int(os.environ.get("SSE_RETRY_MS", 3000))
+    EVENT_COALESCE_WINDOW_MS = int(os.environ.get("EVENT_COALESCE_WINDOW_MS", 50))  # 0 = flush per update
+    EVENT_KEYFRAME_EVERY = int(os.environ.get("EVENT_KEYFRAME_EVERY", 20))  # flushes between keyframes
+    # Event bus shared by all worker processes: memory (single process), postgres or redis
+    EVENT_BUS = os.environ.get("EVENT_BUS", "memory")
+    EVENT_BUS_CHANNEL = os.environ.get("EVENT_BUS_CHANNEL", "factory_events")
+    EVENT_BUS_BATCH_MS = int(os.environ.get("EVENT_BUS_BATCH_MS", 10))  # publish window per message
+    EVENT_BUS_BATCH_SIZE = int(os.environ.get("EVENT_BUS_BATCH_SIZE", 200))  # max events per message
+    EVENT_BUS_MAX_PENDING = int(os.environ.get("EVENT_BUS_MAX_PENDING", 10000))  # outbox cap while unreachable
+    EVENT_BUS_SEND_ATTEMPTS = int(os.environ.get("EVENT_BUS_SEND_ATTEMPTS", 10))  # then the batch is dropped
+
+    # Decision persistence: "async" batches inserts on a background thread, "sync" commits per decision
+    DECISION_WRITE_MODE = os.environ.get("DECISION_WRITE_MODE", "async")
+    DECISION_BATCH_SIZE = int(os.environ.get("DECISION_BATCH_SIZE", 50))
+    DECISION_FLUSH_INTERVAL = float(os.environ.get("DECISION_FLUSH_INTERVAL", 1.0))  # seconds
+
+    # Versioned machine updates (services/machine_state.py): retries after a lost race
+    MACHINE_UPDATE_RETRIES = int(os.environ.get("MACHINE_UPDATE_RETRIES", 3))
+
+    # Telemetry ingestion (POST /api/data/telemetry, services/telemetry.py)
+    TELEMETRY_FLUSH_INTERVAL = float(os.environ.get("TELEMETRY_FLUSH_INTERVAL", 0.5))  # seconds
+    TELEMETRY_BATCH_SIZE = int(os.environ.get("TELEMETRY_BATCH_SIZE", 5000))  # readings that trigger an early flush
+    TELEMETRY_MAX_BUFFERED = int(os.environ.get("TELEMETRY_MAX_BUFFERED", 200000))  # 503 beyond this
+    TELEMETRY_RETRY_AFTER = int(os.environ.get("TELEMETRY_RETRY_AFTER", 1))  # Retry-After on 503
+
+    # List endpoints (/api/data/*): default and maximum page sizes
+    API_PAGE_SIZE = int(os.environ.get("API_PAGE_SIZE", 200))
+    API_MAX_PAGE_SIZE = int(os.environ.get("API_MAX_PAGE_SIZE", 1000))
+
+    # Energy price history (see services/energy_series.py)
+    STATE_ENERGY_WINDOW_HOURS = int(os.environ.get("STATE_ENERGY_WINDOW_HOURS", 48))  # raw prices in the agent state
+    ENERGY_PEAK_FACTOR = float(os.environ.get("ENERGY_PEAK_FACTOR", 1.2))  # hour avg vs day avg to flag a peak
+    ENERGY_RAW_RETENTION_DAYS = int(os.environ.get("ENERGY_RAW_RETENTION_DAYS", 30))
+    ENERGY_HOURLY_RETENTION_DAYS = int(os.environ.get("ENERGY_HOURLY_RETENTION_DAYS", 365))  # daily rollups are kept forever
+    ENERGY_RAW_MAX_SPAN_HOURS = int(os.environ.get("ENERGY_RAW_MAX_SPAN_HOURS", 48))  # longer ranges read rollups
+    ENERGY_SERIES_MAX_POINTS = int(os.environ.get("ENERGY_SERIES_MAX_POINTS", 500))
+
+    # Time-stepped simulation engine (see services/sim_engine.py)
+    SIM_TICK_MINUTES = float(os.environ.get("SIM_TICK_MINUTES", 5))
+    SIM_MAX_HOURS = float(os.environ.get("SIM_MAX_HOURS", 168))  # longest run per request
+    SIM_MAINTENANCE_HOURS = float(os.environ.get("SIM_MAINTENANCE_HOURS", 4))
+    SIM_UNITS_PER_HOUR = float(os.environ.get("SIM_UNITS_PER_HOUR", 10))  # output of a machine at 100%
+    SIM_UTIL_RELAX = float(os.environ.get("SIM_UTIL_RELAX", 0.5))  # per hour, towards the speed setpoint
+    SIM_UTIL_NOISE = float(os.environ.get("SIM_UTIL_NOISE", 2.0))  # utilization points per sqrt(hour)
+    SIM_IDLE_POWER_FRACTION = float(os.environ.get("SIM_IDLE_POWER_FRACTION", 0.1))  # of rated power
+    SIM_DEFAULT_RATED_KW = float(os.environ.get("SIM_DEFAULT_RATED_KW", 10))
+    SIM_PRICE_HISTORY_DAYS = int(os.environ.get("SIM_PRICE_HISTORY_DAYS", 7))  # for the hourly price profile
+    SIM_EVENT_LIMIT = int(os.environ.get("SIM_EVENT_LIMIT", 200))  # max machine deltas per checkpoint
+
+    # What-if evaluation of agent proposals on forks of the snapshot (see services/what_if.py)
+    WHATIF_HORIZON_HOURS = float(os.environ.get("WHATIF_HORIZON_HOURS", 8))
+    WHATIF_TICK_MINUTES = float(os.environ.get("WHATIF_TICK_MINUTES", 15))
+    WHATIF_SEED = int(os.environ.get("WHATIF_SEED", 0))  # same noise for baseline and proposals
+
+    # Merging all agents' actions in run_all (see services/action_planner.py)
+    ACTION_MERGE_POLICY = os.environ.get("ACTION_MERGE_POLICY", "priority")  # priority | weighted
+    ACTION_AGENT_PRIORITY = os.environ.get(
+        "ACTION_AGENT_PRIORITY",
+        "MaintenanceAgent,QualityAgent,EnergyAgent,ProductionAgent,SupplyChainAgent",
+    )  # highest first
+    ACTION_AGENT_WEIGHTS = os.environ.get(
+        "ACTION_AGENT_WEIGHTS",
+        "MaintenanceAgent=3,QualityAgent=2,EnergyAgent=1.5,ProductionAgent=1,SupplyChainAgent=1",
+    )
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -11,10 +12,27 @@ class Machine(db.Model):
     status = db.Column(db.String(20), default="idle")  # idle, running, maintenance
     utilization = db.Column(db.Float, default=0.0)  # percentage 0–100
     energy_usage = db.Column(db.Float, default=0.0)  # kWh
+    last_seen_at = db.Column(db.DateTime)  # timestamp of the newest telemetry reading applied
+    # Bumped by every write; conditional updates and the PUT If-Match/ETag compare it
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+
+class MachineTelemetry(db.Model):
+    """Append-only history of telemetry readings (services/telemetry.py)."""
+
+    __tablename__ = "machine_telemetry"
+    __table_args__ = (db.Index("ix_machine_telemetry_machine_id_ts", "machine_id", "ts"),)
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    machine_id = db.Column(db.Integer, nullable=False)
+    ts = db.Column(db.DateTime, nullable=False)
+    utilization = db.Column(db.Float)
+    energy_usage = db.Column(db.Float)
+    status = db.Column(db.String(20))
 
 
 class Order(db.Model):
     __tablename__ = "orders"
+    __table_args__ = (db.Index("ix_orders_status_deadline", "status", "deadline"),)
     id = db.Column(db.Integer, primary_key=True)
     customer = db.Column(db.String(50), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
@@ -26,15 +44,60 @@ class Order(db.Model):
 
 class EnergyPrice(db.Model):
     __tablename__ = "energy_prices"
+    __table_args__ = (db.Index("ix_energy_prices_timestamp", "timestamp"),)
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     price_per_kwh = db.Column(db.Float, nullable=False)
 
 
+class EnergyPriceRollup(db.Model):
+    """Precomputed min/avg/max of energy_prices per hour or per day."""
+
+    __tablename__ = "energy_price_rollups"
+    __table_args__ = (
+        db.UniqueConstraint("resolution", "bucket", name="uq_energy_price_rollups_resolution_bucket"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    resolution = db.Column(db.String(8), nullable=False)  # hour, day
+    bucket = db.Column(db.DateTime, nullable=False)  # start of the hour/day
+    min_price = db.Column(db.Float, nullable=False)
+    avg_price = db.Column(db.Float, nullable=False)
+    max_price = db.Column(db.Float, nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False)
+    is_peak = db.Column(db.Boolean, default=False)  # hour: peak window; day: contains one
+
+
 class AgentDecision(db.Model):
     __tablename__ = "agent_decisions"
+    __table_args__ = (
+        db.Index("ix_agent_decisions_created_at", "created_at"),
+        db.Index("ix_agent_decisions_agent_name_created_at", "agent_name", "created_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     agent_name = db.Column(db.String(30), nullable=False)
-    decision = db.Column(db.Text, nullable=False)
-    impact = db.Column(db.String(100))
+    decision = db.Column(db.JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    # Copied out of decision["impact"] so they can be filtered and aggregated
+    throughput_change_percent = db.Column(db.Float)
+    energy_change_percent = db.Column(db.Float)
+    notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class AgentAction(db.Model):
+    """One row per action of an AgentDecision; agent_name and created_at are copied from it."""
+
+    __tablename__ = "agent_actions"
+    __table_args__ = (
+        db.Index("ix_agent_actions_machine_id_action_created_at", "machine_id", "action", "created_at"),
+        db.Index("ix_agent_actions_agent_name_created_at", "agent_name", "created_at"),
+        db.Index("ix_agent_actions_created_at", "created_at"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    decision_id = db.Column(
+        db.Integer, db.ForeignKey("agent_decisions.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    agent_name = db.Column(db.String(30), nullable=False)
+    machine_id = db.Column(db.Integer)  # null when the agent named an unknown machine
+    action = db.Column(db.String(30), nullable=False)
+    value = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, nullable=False)
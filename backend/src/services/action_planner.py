@@ -0,0 +1,228 @@
+# backend\src\services\action_planner.py
+
+from src.config import Config
+from src.blueprints.events import push_event
+from src.services.decision_store import decision_row, insert_decisions
+from src.services.simulation import coerce_machine_id, apply_actions
+from src.services.snapshot import get_snapshot
+
+PLANNER_NAME = "ActionPlanner"
+SPEED_SIGN = {"increase_speed": 1, "reduce_speed": -1}
+KNOWN_ACTIONS = {"increase_speed", "reduce_speed", "schedule_maintenance", "reassign_job"}
+
+
+def _agent_priority():
+    """Agent name -> rank (0 = highest) from ACTION_AGENT_PRIORITY."""
+    names = [n.strip() for n in Config.ACTION_AGENT_PRIORITY.split(",") if n.strip()]
+    return {name: rank for rank, name in enumerate(names)}
+
+
+def _agent_weights():
+    """Agent name -> weight from ACTION_AGENT_WEIGHTS ("Name=2,Other=1"); default 1."""
+    weights = {}
+    for item in Config.ACTION_AGENT_WEIGHTS.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() and weight.strip():
+            weights[name.strip()] = float(weight)
+    return weights
+
+
+def merge_actions(proposals, policy=None):
+    """
+    Merge several agents' proposals ([(agent_name, actions), ...]) into one plan
+    with at most one speed change and one maintenance per machine, and one job
+    reassignment per machine and order. Returns (plan, rationale).
+
+    Per machine:
+      - schedule_maintenance wins over speed changes, which become moot; it is a
+        no-op on a machine already in maintenance
+      - opposing or overlapping speed changes are resolved by `policy`:
+        "priority" keeps the net change of the highest-ranked agent
+        (ACTION_AGENT_PRIORITY), "weighted" takes the weighted mean of every
+        agent's net change (ACTION_AGENT_WEIGHTS)
+      - a speed change that the 0-100 clamp turns into nothing is dropped
+      - reassign_job actions with the same value (order) collapse into one, and
+        none go to a machine heading into maintenance
+
+    Unknown machines and actions are dropped. Every input action appears in the
+    rationale as kept, merged or dropped, with a reason.
+    """
+    policy = policy or Config.ACTION_MERGE_POLICY
+    machines = {m["id"]: m for m in get_snapshot().machines}
+    priority = _agent_priority()
+    weights = _agent_weights()
+
+    by_machine = {}  # machine id -> [(agent, action)], in first-seen order
+    rationale = []
+    for agent, actions in proposals:
+        for action in actions:
+            mid = coerce_machine_id(action.get("machine_id"))
+            entry = _entry(agent, action)
+            if action.get("action") not in KNOWN_ACTIONS:
+                rationale.append({**entry, "outcome": "dropped", "reason": "unknown action"})
+            elif mid not in machines:
+                rationale.append({**entry, "outcome": "dropped", "reason": "unknown machine"})
+            else:
+                by_machine.setdefault(mid, []).append((agent, action))
+
+    plan = []
+    for mid, items in by_machine.items():
+        machine = machines[mid]
+        plan_items, notes = _merge_machine(mid, machine, items, policy, priority, weights)
+        plan += plan_items
+        rationale += notes
+    return plan, rationale
+
+
+def _entry(agent, action):
+    return {
+        "agent": agent,
+        "machine_id": action.get("machine_id"),
+        "action": action.get("action"),
+        "value": action.get("value"),
+    }
+
+
+def _merge_machine(mid, machine, items, policy, priority, weights):
+    plan = []
+    notes = []
+    maintenance = [(a, act) for a, act in items if act["action"] == "schedule_maintenance"]
+    speed = [(a, act) for a, act in items if act["action"] in SPEED_SIGN]
+    reassign = [(a, act) for a, act in items if act["action"] == "reassign_job"]
+
+    # Maintenance
+    going_down = False
+    if maintenance:
+        if machine["status"] == "maintenance":
+            for agent, act in maintenance:
+                notes.append({**_entry(agent, act), "outcome": "dropped", "reason": "already in maintenance"})
+        else:
+            going_down = True
+            agent, act = maintenance[0]
+            plan.append({"machine_id": mid, "action": "schedule_maintenance", "value": 0,
+                         "agents": sorted({a for a, _ in maintenance})})
+            notes.append({**_entry(agent, act), "outcome": "kept", "reason": "maintenance"})
+            for agent, act in maintenance[1:]:
+                notes.append({**_entry(agent, act), "outcome": "merged", "reason": "duplicate maintenance"})
+
+    # Speed changes
+    if speed and going_down:
+        for agent, act in speed:
+            notes.append({**_entry(agent, act), "outcome": "dropped",
+                          "reason": "moot: machine scheduled for maintenance"})
+    elif speed:
+        plan_item, speed_notes = _merge_speed(mid, machine, speed, policy, priority, weights)
+        if plan_item:
+            plan.append(plan_item)
+        notes += speed_notes
+
+    # Job reassignment: one per distinct value, since the value names the order
+    by_value = {}
+    for agent, act in reassign:
+        by_value.setdefault(_value_key(act.get("value")), []).append((agent, act))
+    for same in by_value.values():
+        for n, (agent, act) in enumerate(same):
+            if going_down:
+                notes.append({**_entry(agent, act), "outcome": "dropped",
+                              "reason": "machine scheduled for maintenance"})
+            elif n == 0:
+                plan.append({**act, "machine_id": mid, "agents": sorted({a for a, _ in same})})
+                notes.append({**_entry(agent, act), "outcome": "kept", "reason": "job reassignment"})
+            else:
+                notes.append({**_entry(agent, act), "outcome": "merged", "reason": "duplicate reassignment"})
+    return plan, notes
+
+
+def _value_key(value):
+    """Compare action values loosely: 2, 2.0 and "2" are the same order."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _merge_speed(mid, machine, speed, policy, priority, weights):
+    # Net change each agent asks for (several actions from one agent add up)
+    net = {}
+    for agent, act in speed:
+        try:
+            value = float(act.get("value"))
+        except (TypeError, ValueError):
+            value = 0.0
+        net[agent] = net.get(agent, 0.0) + SPEED_SIGN[act["action"]] * value
+    contenders = {agent: delta for agent, delta in net.items() if delta}
+
+    winners = set()
+    delta = 0.0
+    if contenders and policy == "weighted":
+        total = sum(weights.get(a, 1.0) for a in contenders)
+        delta = sum(weights.get(a, 1.0) * d for a, d in contenders.items()) / total
+        winners = set(contenders)
+        reason = f"weighted mean of {len(contenders)} agent(s)"
+    elif contenders:
+        top = min(contenders, key=lambda a: (priority.get(a, len(priority)), list(net).index(a)))
+        delta = contenders[top]
+        winners = {top}
+        reason = f"priority: {top}"
+
+    # The clamp decides what actually happens to the machine
+    current = machine["utilization"] or 0
+    effective = round(min(100, max(0, current + delta)) - current, 2)
+    plan_item = None
+    if effective:
+        plan_item = {
+            "machine_id": mid,
+            "action": "increase_speed" if effective > 0 else "reduce_speed",
+            "value": abs(effective),
+            "agents": sorted(winners),
+        }
+
+    counts = {}
+    for agent, _ in speed:
+        counts[agent] = counts.get(agent, 0) + 1
+    notes = []
+    for agent, act in speed:
+        if not net[agent]:
+            outcome, why = "dropped", "no-op: the agent's own changes cancel out"
+        elif not effective:
+            outcome, why = "dropped", "no-op: changes cancel out or are clamped away"
+        elif agent not in winners:
+            outcome, why = "dropped", f"overridden ({reason})"
+        elif counts[agent] > 1 or len(winners) > 1:
+            outcome, why = "merged", reason
+        else:
+            outcome, why = "kept", reason
+        notes.append({**_entry(agent, act), "outcome": outcome, "reason": why})
+    return plan_item, notes
+
+
+def apply_merged(proposals, policy=None):
+    """
+    Merge the proposals, apply the plan and store the merge rationale as an
+    ActionPlanner AgentDecision, all in one transaction. The plan adds no
+    agent_actions rows, so /actions counts each proposed action once.
+    Returns (plan, rationale, updates).
+    """
+    policy = policy or Config.ACTION_MERGE_POLICY
+    plan, rationale = merge_actions(proposals, policy)
+    proposed = sum(len(actions) for _, actions in proposals)
+    dropped = sum(1 for r in rationale if r["outcome"] == "dropped")
+    decision = {
+        "actions": plan,
+        "impact": {
+            "throughput_change_percent": 0,
+            "energy_change_percent": 0,
+            "notes": f"Merged {proposed} proposed action(s) into {len(plan)} ({dropped} dropped, {policy} policy)",
+        },
+        "merge": {"policy": policy, "rationale": rationale},
+    }
+    row = decision_row(PLANNER_NAME, decision)
+    # Inserted before apply_actions so its commit covers the plan and the rationale.
+    # The plan's actions are already in agent_actions under the proposing agents.
+    insert_decisions([row], with_actions=False)
+    updates = apply_actions(plan)
+    push_event(
+        "decision",
+        {"agent": PLANNER_NAME, "decision": decision, "created_at": row["created_at"].isoformat()},
+    )
+    return plan, rationale, updates
@@ -1,10 +1,50 @@
 # backend\src\services\agent_core.py
 
 import json
-from src.utils.api_client import query_model
-from src.models import db, AgentDecision
+import logging
+import threading
+import time
+from src.utils import metrics
+from src.utils.api_client import get_backend, query_model
+from src.utils.prompts import prompt_tokens, state_prompt, static_tokens
+from src.utils.resilience import (
+    ModelRateLimitError,
+    ModelTransportError,
+    ModelValidationError,
+    backoff_delay,
+    classify_error,
+    repair_prompt,
+)
+from src.services.decision_cache import get_decision_cache, make_key
+from src.services.state_compaction import compact_state, estimate_tokens
+from src.config import Config
+from src.models import db
+from src.services.decision_store import decision_row, insert_decisions
+from src.services.decision_writer import decision_writer
 from src.blueprints.events import push_event
-from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+MODEL_LATENCY = metrics.registry.histogram(
+    "agent_model_latency_seconds", "Model call latency per attempt", ("agent", "outcome")
+)
+RUN_ATTEMPTS = metrics.registry.histogram(
+    "agent_run_attempts", "Model attempts per agent run", ("agent",), (1, 2, 3, 4, 5, 10)
+)
+RUNS = metrics.registry.counter(
+    "agent_runs_total", "Agent runs by result (valid, fallback, cached, abandoned)", ("agent", "result")
+)
+MODEL_TOKENS = metrics.registry.counter(
+    "agent_model_tokens_total", "Estimated prompt (in) and completion (out) tokens", ("agent", "direction")
+)
+PROMPT_TOKENS = metrics.registry.counter(
+    "agent_prompt_tokens_total",
+    "Estimated prompt tokens by part: static (cacheable prefix) and dynamic (state)",
+    ("agent", "part"),
+)
+CACHE_LOOKUPS = metrics.registry.counter(
+    "agent_cache_lookups_total", "Decision cache lookups by result (hit, miss)", ("agent", "result")
+)
 
 ALLOWED_ACTIONS = [
     "increase_speed",
@@ -37,38 +77,186 @@ AGENT_PROMPTS = {
 }
 
 
-def run_agent(agent_name: str, factory_state: dict):
+# Build every agent's static prompt prefix once, up front
+for _role in AGENT_PROMPTS.values():
+    static_tokens(_role)
+
+
+class RunHandle:
+    """
+    Lets a caller give up on a run_agent() call that runs on another thread.
+    Exactly one side wins: either the run finishes first and its decision stands,
+    or the caller abandons it and the run stops retrying and saves, publishes and
+    caches nothing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    @property
+    def abandoned(self):
+        return self._state == "abandoned"
+
+    def finish(self):
+        return self._settle("finished")
+
+    def abandon(self):
+        return self._settle("abandoned")
+
+    def _settle(self, state):
+        with self._lock:
+            if self._state is None:
+                self._state = state
+            return self._state == state
+
+
+def run_agent(agent_name: str, factory_state: dict, handle: RunHandle = None):
     system_prompt = AGENT_PROMPTS.get(agent_name, "")
-    prompt = f"{agent_name}: Analyze factory state.\n{json.dumps(factory_state)}\n"
 
-    # Try up to 3 times if the agent returns invalid JSON/raw response.
+    # Only send the agent its windowed, tabular view of the state
+    if Config.STATE_COMPACTION:
+        factory_state, stats = compact_state(agent_name, factory_state)
+        log.debug(
+            "%s prompt state: ~%d tokens (~%d saved of %d)", agent_name,
+            stats["compact_tokens"], stats["saved_tokens"], stats["raw_tokens"],
+        )
+
+    # Identical (agent, prompt, model, state) requests reuse the last valid decision
+    cache = get_decision_cache()
+    cache_key = make_key(agent_name, system_prompt, get_backend().model, factory_state)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        CACHE_LOOKUPS.inc(agent=agent_name, result="miss" if cached is None else "hit")
+        if cached is not None:
+            log.debug("%s decision served from cache", agent_name)
+            if handle is not None and not handle.finish():
+                RUNS.inc(agent=agent_name, result="abandoned")
+                return None
+            RUNS.inc(agent=agent_name, result="cached")
+            # Callers apply it like a fresh decision, so it is logged and published like one
+            save_decision(agent_name, cached, cached=True)
+            return cached
+
+    # State goes last, in canonical form, after the byte-stable static prefix
+    prompt = state_prompt(agent_name, factory_state)
+
+    # Retry transport errors and rate limits with jittered backoff, and invalid
+    # answers with a repair prompt; fail fast while the model's circuit is open.
+    max_attempts = Config.MODEL_MAX_ATTEMPTS
     attempts = 0
     last_raw = None
-    while attempts < 3:
+    last_error = None
+    valid = False
+    request_prompt = prompt
+    while attempts < max_attempts:
+        if handle is not None and handle.abandoned:
+            break
+        attempts += 1
+        started = time.perf_counter()
         try:
-            raw = query_model(prompt, agent_system_prompt=system_prompt)
+            raw = query_model(
+                request_prompt,
+                agent_system_prompt=system_prompt,
+                validate=_is_valid_decision,
+                on_action=_partial_action_publisher(agent_name, attempts, handle),
+            )
             last_raw = raw
+            if metrics.ENABLED:
+                _record_tokens(agent_name, system_prompt, request_prompt, raw)
             # Validate and parse; raise on invalid so we can retry
             decision = _validate_and_parse(raw, agent_name, raise_on_invalid=True)
-            # Successful parse — report how many attempts it took (attempts is number of previous failures)
-            print(f"[>] {agent_name} returned valid decision after {attempts + 1} attempt(s)")
+            MODEL_LATENCY.observe(time.perf_counter() - started, agent=agent_name, outcome="valid")
+            log.info(
+                "%s returned valid decision after %d attempt(s)", agent_name, attempts,
+                extra={"agent": agent_name, "attempts": attempts},
+            )
+            valid = True
             break
         except Exception as exc:
-            attempts += 1
-            print(f"[!] {agent_name} returned invalid response (attempt {attempts}): {exc}")
-            # if we've reached max attempts, create a fallback decision and continue
-            if attempts >= 3:
-                # produce a sanitized fallback decision (non-raising)
-                safe_raw = last_raw if last_raw is not None else ""
-                decision = _validate_and_parse(safe_raw, agent_name, raise_on_invalid=False)
-                print(f"[!] {agent_name} failed to return valid response after {attempts} attempts — using fallback decision")
-                break
-
-    save_decision(agent_name, json.dumps(decision))
+            last_error = classify_error(exc)
+            MODEL_LATENCY.observe(time.perf_counter() - started, agent=agent_name, outcome=last_error.kind)
+            log.warning(
+                "%s attempt %d failed (%s): %s", agent_name, attempts, last_error.kind, exc,
+                extra={"agent": agent_name, "attempt": attempts, "error_kind": last_error.kind},
+            )
+            if isinstance(last_error, ModelValidationError):
+                if last_error.raw is not None:
+                    last_raw = last_error.raw
+                request_prompt = repair_prompt(prompt, last_error)
+            elif isinstance(last_error, (ModelTransportError, ModelRateLimitError)):
+                if attempts < max_attempts:
+                    time.sleep(backoff_delay(attempts, getattr(last_error, "retry_after", None)))
+            else:
+                break  # circuit open or a non-retryable API error
+
+    RUN_ATTEMPTS.observe(attempts, agent=agent_name)
+    if handle is not None and not handle.finish():
+        RUNS.inc(agent=agent_name, result="abandoned")
+        log.info("%s was abandoned by its caller; discarding its decision", agent_name)
+        return None
+    RUNS.inc(agent=agent_name, result="valid" if valid else "fallback")
+    if not valid:
+        log.warning(
+            "%s failed to return valid response after %d attempt(s) — using fallback decision",
+            agent_name, attempts, extra={"agent": agent_name, "attempts": attempts},
+        )
+        if last_raw is not None or isinstance(last_error, ModelValidationError):
+            # produce a sanitized fallback decision (non-raising)
+            decision = _validate_and_parse(last_raw or "", agent_name, raise_on_invalid=False)
+        else:
+            decision = {
+                "actions": [],
+                "impact": {
+                    "throughput_change_percent": 0,
+                    "energy_change_percent": 0,
+                    "notes": f"API error: {last_error}",
+                },
+            }
+
+    save_decision(agent_name, decision)
+    # Fallback decisions are not cached so the next request retries the model
+    if cache is not None and valid:
+        cache.set(cache_key, decision)
 
     return decision
 
 
+def _record_tokens(agent_name, system_prompt, prompt, raw):
+    completion = raw if isinstance(raw, str) else json.dumps(raw)
+    tokens = prompt_tokens(prompt, system_prompt)
+    MODEL_TOKENS.inc(tokens["total"], agent=agent_name, direction="in")
+    PROMPT_TOKENS.inc(tokens["static"], agent=agent_name, part="static")
+    PROMPT_TOKENS.inc(tokens["dynamic"], agent=agent_name, part="dynamic")
+    MODEL_TOKENS.inc(estimate_tokens(completion), agent=agent_name, direction="out")
+
+
+def _is_valid_decision(decision):
+    """Validator for streamed responses: lets query_model stop at the first valid object."""
+    try:
+        _validate_and_parse(decision, "", raise_on_invalid=True)
+        return True
+    except Exception:
+        return False
+
+
+def _partial_action_publisher(agent_name, attempt, handle=None):
+    """Forward each streamed action to SSE clients as a `decision_partial` event."""
+    if not Config.STREAM_PARTIAL_EVENTS:
+        return None
+
+    def on_action(action):
+        if handle is not None and handle.abandoned:
+            return
+        if action.get("action") in ALLOWED_ACTIONS:
+            push_event(
+                "decision_partial",
+                {"agent": agent_name, "attempt": attempt, "action": action},
+            )
+
+    return on_action
+
+
 def _validate_and_parse(raw: str, agent_name: str, raise_on_invalid: bool = True):
     """
     Parse and validate the agent response.
@@ -113,33 +301,36 @@ def _validate_and_parse(raw: str, agent_name: str, raise_on_invalid: bool = True
         }
 
 
-def save_decision(agent_name, decision_json):
-    # Convert dict to string if necessary
-    if isinstance(decision_json, dict):
-        decision_str = json.dumps(decision_json)
+def save_decision(agent_name, decision_json, cached=False):
+    """
+    Publish the decision right away and queue it for a batched DB write. Decisions
+    served from the cache are stored and published with `"cached": true`.
+    """
+    # Accept a dict (preferred) or a JSON string from older callers
+    decision = decision_json if isinstance(decision_json, dict) else json.loads(decision_json)
+    if cached:
+        decision = {**decision, "cached": True}
+    row = decision_row(agent_name, decision)
+    created_at = row["created_at"]
+
+    if Config.DECISION_WRITE_MODE == "sync":
+        try:
+            insert_decisions([row])
+            db.session.commit()
+            log.debug("Saved decision for %s", agent_name)
+        except Exception:
+            db.session.rollback()
+            log.exception("Error saving decision for %s", agent_name)
+            return
     else:
-        decision_str = decision_json
+        decision_writer.submit(row)
 
-    d = AgentDecision(
-        agent_name=agent_name,
-        decision=decision_str,
-        impact="parsed",
-        created_at=datetime.utcnow(),
+    # Notify via SSE
+    push_event(
+        "decision",
+        {
+            "agent": agent_name,
+            "decision": decision,
+            "created_at": created_at.isoformat(),
+        },
     )
-    try:
-        db.session.add(d)
-        db.session.commit()
-        print(f"[>] Saved decision for {agent_name}")
-
-        # Notify via SSE
-        push_event(
-            "decision",
-            {
-                "agent": agent_name,
-                "decision": json.loads(decision_str),
-                "created_at": d.created_at.isoformat(),
-            },
-        )
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error saving decision: {e}")
@@ -0,0 +1,106 @@
+# backend\src\services\agent_runner.py
+
+import logging
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from flask import current_app
+from src.services.agent_core import RunHandle, run_agent, save_decision
+
+log = logging.getLogger(__name__)
+
+# Result key -> agent name, in the order their actions are applied by run_all
+RUN_ALL_AGENTS = [
+    ("production_agent", "ProductionAgent"),
+    ("energy_agent", "EnergyAgent"),
+    ("quality_agent", "QualityAgent"),
+    ("maintenance_agent", "MaintenanceAgent"),
+    ("supply_agent", "SupplyChainAgent"),
+]
+
+
+def run_agents(agents, factory_state, mode=None, max_workers=None, timeout=None):
+    """
+    Run several agents against one shared factory state snapshot.
+
+    `agents` is a list of (result_key, agent_name) pairs. The returned dict keeps
+    that order regardless of which agent finishes first, so callers can apply the
+    actions deterministically. In "concurrent" mode the agents are fanned out on a
+    thread pool; an agent that exceeds `timeout` seconds is abandoned (it saves and
+    publishes nothing) and its empty fallback decision is saved in its place, as is
+    the fallback of an agent that crashed.
+    """
+    cfg = current_app.config
+    mode = mode or cfg.get("AGENT_RUN_MODE", "concurrent")
+    max_workers = max_workers or cfg.get("AGENT_MAX_WORKERS", 5)
+    timeout = timeout or cfg.get("AGENT_TIMEOUT", 120)
+
+    if mode == "sequential" or max_workers <= 1 or len(agents) <= 1:
+        return {key: run_agent(name, factory_state) for key, name in agents}
+
+    app = current_app._get_current_object()
+    started = {}
+    handles = {key: RunHandle() for key, _ in agents}
+
+    def _task(key, name):
+        started[key] = time.monotonic()
+        # run_agent persists its decision, so each worker needs its own app context
+        with app.app_context():
+            return run_agent(name, factory_state, handles[key])
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(agents)), thread_name_prefix="agent"
+    )
+    futures = {executor.submit(_task, key, name): key for key, name in agents}
+    names = dict(agents)
+    results = {}
+
+    # Agents queued behind a full pool must still finish within their own slot's budget
+    batch_start = time.monotonic()
+    batch_deadline = batch_start + timeout * math.ceil(len(agents) / max_workers)
+
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as exc:
+                    log.error("%s crashed during concurrent run: %s", names[key], exc)
+                    results[key] = _fallback_decision(names[key], f"failed: {exc}")
+                    save_decision(names[key], results[key])
+
+            now = time.monotonic()
+            for future in list(pending):
+                key = futures[future]
+                t0 = started.get(key)
+                if (t0 is not None and now - t0 > timeout) or now > batch_deadline:
+                    if not handles[key].abandon():
+                        continue  # it finished meanwhile and is saving its decision; wait for it
+                    future.cancel()
+                    pending.discard(future)
+                    log.warning("%s timed out after %gs — using fallback decision", names[key], timeout)
+                    results[key] = _fallback_decision(
+                        names[key], f"timed out after {timeout:g}s"
+                    )
+                    save_decision(names[key], results[key])
+    finally:
+        # Don't block the request on agents that timed out; they finish in the background
+        # without saving anything
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    log.info("Ran %d agents concurrently in %.2fs", len(agents), time.monotonic() - batch_start)
+    return {key: results[key] for key, _ in agents}
+
+
+def _fallback_decision(agent_name, reason):
+    return {
+        "actions": [],
+        "impact": {
+            "throughput_change_percent": 0,
+            "energy_change_percent": 0,
+            "notes": f"{agent_name} {reason}",
+        },
+    }
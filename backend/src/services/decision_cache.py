@@ -0,0 +1,157 @@
+# backend\src\services\decision_cache.py
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from src.config import Config
+
+log = logging.getLogger(__name__)
+
+
+def canonical_json(obj):
+    """Serialize with sorted keys and no whitespace so equal states hash equally."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def make_key(agent_name, system_prompt, model, factory_state):
+    digest = hashlib.sha256(
+        canonical_json([agent_name, system_prompt, model, factory_state]).encode()
+    ).hexdigest()
+    return f"decision:{digest}"
+
+
+class MemoryBackend:
+    """In-process LRU store with a per-entry TTL."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, payload)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, payload):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Shared store for several workers. Entries expire via Redis TTLs; LRU eviction
+    is left to the server's maxmemory-policy (e.g. allkeys-lru).
+    """
+
+    def __init__(self, url, ttl):
+        import redis  # optional dependency, only needed for this backend
+
+        self.ttl = ttl
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        payload = self._redis.get(key)
+        return payload.decode() if payload is not None else None
+
+    def set(self, key, payload):
+        self._redis.set(key, payload, ex=self.ttl)
+
+    def clear(self):
+        for key in self._redis.scan_iter("decision:*"):
+            self._redis.delete(key)
+
+    def size(self):
+        return sum(1 for _ in self._redis.scan_iter("decision:*"))
+
+
+class DecisionCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        try:
+            payload = self.backend.get(key)
+        except Exception as e:
+            log.warning("Decision cache read failed: %s", e)
+            payload = None
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        # Stored as JSON so callers always get a private copy of the decision
+        return json.loads(payload) if payload is not None else None
+
+    def set(self, key, decision):
+        try:
+            self.backend.set(key, json.dumps(decision))
+        except Exception as e:
+            log.warning("Decision cache write failed: %s", e)
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        try:
+            size = self.backend.size()
+        except Exception:
+            size = None
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": size,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_decision_cache():
+    """Return the shared cache, or None when DECISION_CACHE_BACKEND is "off"."""
+    global _cache
+    if _cache is None and Config.DECISION_CACHE_BACKEND != "off":
+        with _cache_lock:
+            if _cache is None:
+                backend = None
+                if Config.DECISION_CACHE_BACKEND == "redis":
+                    try:
+                        backend = RedisBackend(Config.REDIS_URL, Config.DECISION_CACHE_TTL)
+                    except ImportError:
+                        log.warning("redis package not installed — using in-memory decision cache")
+                if backend is None:
+                    backend = MemoryBackend(
+                        Config.DECISION_CACHE_MAX_ENTRIES, Config.DECISION_CACHE_TTL
+                    )
+                _cache = DecisionCache(backend)
+    return _cache
@@ -0,0 +1,73 @@
+# backend\src\services\decision_store.py
+
+from datetime import datetime
+from sqlalchemy import insert
+from src.models import db, AgentAction, AgentDecision
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _machine_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def decision_row(agent_name, decision, created_at=None):
+    """Column values for an AgentDecision, with the impact numbers pulled out."""
+    impact = decision.get("impact") if isinstance(decision, dict) else None
+    impact = impact if isinstance(impact, dict) else {}
+    notes = impact.get("notes")
+    return {
+        "agent_name": agent_name,
+        "decision": decision,
+        "throughput_change_percent": _number(impact.get("throughput_change_percent")),
+        "energy_change_percent": _number(impact.get("energy_change_percent")),
+        "notes": str(notes) if notes is not None else None,
+        "created_at": created_at or datetime.utcnow(),
+    }
+
+
+def action_rows(decision_id, row):
+    """AgentAction rows for a stored decision row."""
+    actions = row["decision"].get("actions") if isinstance(row["decision"], dict) else None
+    return [
+        {
+            "decision_id": decision_id,
+            "agent_name": row["agent_name"],
+            "machine_id": _machine_id(action.get("machine_id")),
+            "action": str(action["action"])[:30],
+            "value": _number(action.get("value")),
+            "created_at": row["created_at"],
+        }
+        for action in actions or []
+        if isinstance(action, dict) and action.get("action")
+    ]
+
+
+def insert_decisions(rows, with_actions=True):
+    """
+    Insert decision rows and their actions in the current transaction (the caller
+    commits): one multi-row INSERT ... RETURNING for the decisions, one for the actions.
+    SQLite cannot return ids in row order, so there the decisions go in row by row.
+    `with_actions=False` stores only the decisions, for documents whose actions are
+    already recorded under the agents that proposed them. Returns the new decision ids.
+    """
+    if not rows:
+        return []
+    ids = db.session.scalars(
+        insert(AgentDecision).returning(AgentDecision.id, sort_by_parameter_order=True),
+        rows,
+    ).all()
+    if not with_actions:
+        return ids
+    actions = [a for decision_id, row in zip(ids, rows) for a in action_rows(decision_id, row)]
+    if actions:
+        db.session.execute(insert(AgentAction), actions)
+    return ids
@@ -0,0 +1,108 @@
+# backend\src\services\decision_writer.py
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from src.models import db
+from src.services.decision_store import insert_decisions
+
+log = logging.getLogger(__name__)
+
+
+class DecisionWriter:
+    """
+    Persist agent decisions off the request path.
+
+    Rows (see decision_store.decision_row) are queued by `submit()` and written by a
+    background thread with one bulk INSERT for the decisions, one for their actions
+    and one commit per batch, flushed when `batch_size` rows are waiting or
+    `flush_interval` seconds after the first queued row. Pending rows are flushed
+    on interpreter shutdown.
+    """
+
+    def __init__(self, batch_size=50, flush_interval=1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stopping = False
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get("DECISION_BATCH_SIZE", self.batch_size)
+        self.flush_interval = app.config.get("DECISION_FLUSH_INTERVAL", self.flush_interval)
+        atexit.register(self.shutdown)
+
+    def submit(self, row):
+        self._queue.put(row)
+        self._ensure_thread()
+
+    def flush(self):
+        """Write everything queued so far on the calling thread."""
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(rows)
+
+    def shutdown(self):
+        self._stopping = True
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)  # wake the writer so it exits promptly
+            thread.join(timeout=5)
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="decision-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            row = self._queue.get()
+            if row is None:
+                break
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is None:
+                    self._stopping = True
+                    break
+                batch.append(row)
+            self._write(batch)
+
+    def _write(self, rows):
+        rows = [r for r in rows if r is not None]
+        if not rows:
+            return
+        with self._write_lock, self.app.app_context():
+            try:
+                insert_decisions(rows)
+                db.session.commit()
+                log.debug("Saved %d decision(s)", len(rows))
+            except Exception:
+                db.session.rollback()
+                log.exception("Error saving %d decision(s)", len(rows))
+
+
+decision_writer = DecisionWriter()
@@ -0,0 +1,341 @@
+# backend\src\services\energy_series.py
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, delete, func, insert, or_, select
+from src.config import Config
+from src.models import db, EnergyPrice, EnergyPriceRollup
+from src.services.snapshot import invalidate_snapshot
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+
+def _hour(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _day(ts):
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _naive_utc(ts):
+    """Timestamps are stored as naive UTC, like the rest of the schema."""
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+def ingest_prices(points):
+    """
+    Append a batch of (timestamp, price_per_kwh) readings and fold them into the
+    hourly and daily rollups of the hours and days they touch. Returns the number of
+    points stored.
+    """
+    rows = [{"timestamp": _naive_utc(ts), "price_per_kwh": float(price)} for ts, price in points]
+    if not rows:
+        return 0
+    db.session.execute(insert(EnergyPrice), rows)
+    _merge_points(rows)
+    db.session.commit()
+    invalidate_snapshot()
+    return len(rows)
+
+
+def rebuild_rollups(start=None, end=None):
+    """Recompute rollups for all raw points in [start, end) (default: everything)."""
+    bounds = db.session.execute(
+        select(func.min(EnergyPrice.timestamp), func.max(EnergyPrice.timestamp))
+    ).one()
+    start = max(filter(None, [start, bounds[0]]), default=None)
+    end = min(filter(None, [end, bounds[1] and bounds[1] + HOUR]), default=None)
+    if start is None or end is None or start >= end:
+        return 0
+    days = set()
+    day = _day(start)
+    while day < end:
+        days.add(day)
+        day += DAY
+    _rebuild_days(days)
+    db.session.commit()
+    return len(days)
+
+
+def _stats(prices):
+    """(min, avg, max, count) of a list of prices."""
+    return min(prices), sum(prices) / len(prices), max(prices), len(prices)
+
+
+def _merge(a, b):
+    """Combine two (min, avg, max, count) summaries; `a` may be None."""
+    if a is None:
+        return b
+    count = a[3] + b[3]
+    return min(a[0], b[0]), (a[1] * a[3] + b[1] * b[3]) / count, max(a[2], b[2]), count
+
+
+def _rebuild_days(days):
+    """Replace the hour and day rollups of the given days from the raw points."""
+    if not days:
+        return
+    first, last = min(days), max(days) + DAY
+    raw = db.session.execute(
+        select(EnergyPrice.timestamp, EnergyPrice.price_per_kwh).where(
+            EnergyPrice.timestamp >= first, EnergyPrice.timestamp < last
+        )
+    ).all()
+
+    prices = {}
+    for ts, price in raw:
+        if _day(ts) in days:
+            prices.setdefault(_hour(ts), []).append(price)
+    hours = {bucket: _stats(values) for bucket, values in prices.items()}
+    day_stats = {}
+    for bucket, stats in hours.items():
+        day_stats[_day(bucket)] = _merge(day_stats.get(_day(bucket)), stats)
+    _replace_days(days, hours, day_stats)
+
+
+def _merge_points(rows):
+    """
+    Fold new raw points into the existing rollups of their days. Unlike
+    _rebuild_days this keeps what the rollups already summarize, so points
+    backfilled into a day whose raw points were compacted away don't erase it.
+    """
+    new = {}
+    for row in rows:
+        new.setdefault(_hour(row["timestamp"]), []).append(row["price_per_kwh"])
+    days = {_day(bucket) for bucket in new}
+
+    existing = db.session.execute(
+        select(
+            EnergyPriceRollup.resolution,
+            EnergyPriceRollup.bucket,
+            EnergyPriceRollup.min_price,
+            EnergyPriceRollup.avg_price,
+            EnergyPriceRollup.max_price,
+            EnergyPriceRollup.sample_count,
+            EnergyPriceRollup.is_peak,
+        ).where(_in_days(days))
+    ).all()
+    hours, day_stats, peak_days = {}, {}, set()
+    for resolution, bucket, low, avg, high, count, peak in existing:
+        if resolution == "hour":
+            hours[bucket] = (low, avg, high, count)
+        else:
+            day_stats[bucket] = (low, avg, high, count)
+            if peak:
+                peak_days.add(bucket)
+    # Days whose hourly rollups were dropped by retention keep their old peak flag
+    peak_days -= {_day(bucket) for bucket in hours}
+
+    for bucket, prices in new.items():
+        stats = _stats(prices)
+        hours[bucket] = _merge(hours.get(bucket), stats)
+        day_stats[_day(bucket)] = _merge(day_stats.get(_day(bucket)), stats)
+    _replace_days(days, hours, day_stats, peak_days)
+
+
+def _in_days(days):
+    # Hour and day rollups of a day both have buckets inside [day, day + 1 day);
+    # consecutive days are merged into one range to keep the expression small
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + DAY
+        else:
+            ranges.append([day, day + DAY])
+    return or_(*[and_(EnergyPriceRollup.bucket >= low, EnergyPriceRollup.bucket < high) for low, high in ranges])
+
+
+def _replace_days(days, hours, day_stats, peak_days=()):
+    """Write the hour and day rollups of `days` from (min, avg, max, count) summaries."""
+    by_day = {}
+    for bucket, stats in sorted(hours.items()):
+        by_day.setdefault(_day(bucket), []).append((bucket, stats))
+
+    rollups = []
+    for day in days:
+        if day not in day_stats:
+            continue
+        day_avg = day_stats[day][1]
+        peak_day = day in peak_days
+        for bucket, stats in by_day.get(day, []):
+            avg = stats[1]
+            # An hour is a peak window when it's priced well above its day's average
+            is_peak = avg >= day_avg * Config.ENERGY_PEAK_FACTOR and avg > day_avg
+            peak_day = peak_day or is_peak
+            rollups.append(_rollup("hour", bucket, stats, is_peak))
+        rollups.append(_rollup("day", day, day_stats[day], peak_day))
+
+    db.session.execute(delete(EnergyPriceRollup).where(_in_days(days)))
+    if rollups:
+        db.session.execute(insert(EnergyPriceRollup), rollups)
+
+
+def _rollup(resolution, bucket, stats, is_peak):
+    low, avg, high, count = stats
+    return {
+        "resolution": resolution,
+        "bucket": bucket,
+        "min_price": low,
+        "avg_price": avg,
+        "max_price": high,
+        "sample_count": count,
+        "is_peak": is_peak,
+    }
+
+
+def compact_raw(now=None):
+    """
+    Retention: drop raw points older than ENERGY_RAW_RETENTION_DAYS (after making
+    sure their rollups exist) and hourly rollups older than
+    ENERGY_HOURLY_RETENTION_DAYS. Daily rollups are kept forever.
+    """
+    now = now or datetime.utcnow()
+    raw_cutoff = _day(now - timedelta(days=Config.ENERGY_RAW_RETENTION_DAYS))
+    hourly_cutoff = _day(now - timedelta(days=Config.ENERGY_HOURLY_RETENTION_DAYS))
+
+    _rollup_missing_days(raw_cutoff)
+    raw_deleted = db.session.execute(
+        delete(EnergyPrice).where(EnergyPrice.timestamp < raw_cutoff)
+    ).rowcount
+    hourly_deleted = db.session.execute(
+        delete(EnergyPriceRollup).where(
+            EnergyPriceRollup.resolution == "hour", EnergyPriceRollup.bucket < hourly_cutoff
+        )
+    ).rowcount
+    db.session.commit()
+    invalidate_snapshot()
+    return {"raw_deleted": raw_deleted, "hourly_deleted": hourly_deleted}
+
+
+def _rollup_missing_days(end):
+    """
+    Roll up days before `end` that have raw points but no rollups yet (e.g. raw data
+    from before rollups existed). Days that already have rollups are left alone: they
+    are kept current by ingest_prices, and their raw points may be partial.
+    """
+    first = db.session.execute(select(func.min(EnergyPrice.timestamp))).scalar()
+    if first is None or first >= end:
+        return
+    rolled_up = set(
+        db.session.execute(
+            select(EnergyPriceRollup.bucket).where(
+                EnergyPriceRollup.resolution == "day",
+                EnergyPriceRollup.bucket >= _day(first),
+                EnergyPriceRollup.bucket < end,
+            )
+        ).scalars()
+    )
+    days = set()
+    day = _day(first)
+    while day < end:
+        if day not in rolled_up:
+            days.add(day)
+        day += DAY
+    _rebuild_days(days)
+
+
+def series_max_points(max_points=None):
+    """Requested point budget, defaulting to ENERGY_SERIES_MAX_POINTS and capped at API_MAX_PAGE_SIZE."""
+    return max(1, min(max_points or Config.ENERGY_SERIES_MAX_POINTS, Config.API_MAX_PAGE_SIZE))
+
+
+def pick_resolution(start, end, max_points=None):
+    """Raw points for short ranges that fit, hourly rollups while they fit, daily beyond."""
+    max_points = series_max_points(max_points)
+    span = end - start
+    raw_cutoff = datetime.utcnow() - timedelta(days=Config.ENERGY_RAW_RETENTION_DAYS)
+    if (
+        span <= timedelta(hours=Config.ENERGY_RAW_MAX_SPAN_HOURS)
+        and start >= raw_cutoff
+        and db.session.execute(_count(_raw_query(start, end))).scalar() <= max_points
+    ):
+        return "raw"
+    if span / HOUR <= max_points:
+        return "hour"
+    return "day"
+
+
+def _raw_query(start, end):
+    return (
+        select(EnergyPrice.timestamp, EnergyPrice.price_per_kwh)
+        .where(EnergyPrice.timestamp >= start, EnergyPrice.timestamp < end)
+        .order_by(EnergyPrice.timestamp)
+    )
+
+
+def _rollup_query(resolution, start, end):
+    return (
+        select(
+            EnergyPriceRollup.bucket,
+            EnergyPriceRollup.min_price,
+            EnergyPriceRollup.avg_price,
+            EnergyPriceRollup.max_price,
+            EnergyPriceRollup.sample_count,
+            EnergyPriceRollup.is_peak,
+        )
+        .where(
+            EnergyPriceRollup.resolution == resolution,
+            EnergyPriceRollup.bucket >= start,
+            EnergyPriceRollup.bucket < end,
+        )
+        .order_by(EnergyPriceRollup.bucket)
+    )
+
+
+def _count(query):
+    return select(func.count()).select_from(query.order_by(None).subquery())
+
+
+def read_series(start, end, max_points=None, resolution=None):
+    """
+    Price series for [start, end), oldest first, at most `max_points` points (see
+    series_max_points). When the chosen resolution still has more rows than that
+    (a forced resolution, or daily rollups over a long range), consecutive rows are
+    merged into equal-sized groups with min/avg/max and peak, like a coarser rollup.
+    Returns (resolution, points).
+    """
+    max_points = series_max_points(max_points)
+    resolution = resolution or pick_resolution(start, end, max_points)
+    if resolution == "raw":
+        query = _raw_query(start, end)
+    else:
+        query = _rollup_query(resolution, start, end)
+    total = db.session.execute(_count(query)).scalar()
+    group = -(-total // max_points)  # ceil: rows per returned point
+
+    rows = db.session.execute(query.execution_options(yield_per=1000))
+    if resolution == "raw" and group <= 1:
+        return resolution, [
+            {"timestamp": ts.isoformat(), "price_per_kwh": price} for ts, price in rows
+        ]
+    if resolution == "raw":
+        # Raw points as single-sample rollups so they can be grouped the same way
+        rows = ((ts, price, price, price, 1, False) for ts, price in rows)
+
+    points = []
+    for chunk in _chunks(rows, max(group, 1)):
+        bucket = chunk[0][0]
+        stats = None
+        for _, low, avg, high, count, _ in chunk:
+            stats = _merge(stats, (low, avg, high, count))
+        points.append(
+            {
+                "timestamp": bucket.isoformat(),
+                "price_per_kwh": round(stats[1], 6),
+                "min": stats[0],
+                "max": stats[2],
+                "peak": any(peak for *_, peak in chunk),
+            }
+        )
+    return resolution, points
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
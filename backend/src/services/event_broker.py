@@ -0,0 +1,116 @@
+# backend\src\services\event_broker.py
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+
+
+class EventBroker:
+    """
+    In-process pub/sub for SSE.
+
+    Published events are serialized once and appended to one bounded history ring.
+    Each subscriber only keeps a cursor into that ring, so publishing costs the same
+    no matter how many dashboards are connected. A subscriber that falls more than
+    `buffer_size` events behind skips ahead to the newest ones (drop-oldest) and is
+    told how many it missed. The same ring serves `Last-Event-ID` replay.
+
+    Event ids are only meaningful in this process, so SSE ids are sent as
+    "<epoch>-<id>" (`format_id`). A client that reconnects with an id from another
+    worker or from before a restart starts from now with `needs_resync` set.
+    """
+
+    def __init__(self, history_size=1000, buffer_size=256):
+        self.history_size = history_size
+        self.buffer_size = min(buffer_size, history_size)
+        # (id, event_type, json_data, time, data); data is kept for per-client rewrites
+        self._history = deque(maxlen=history_size)
+        self._last_id = 0
+        self._cond = threading.Condition()
+        self.subscriber_count = 0
+        self._subscriptions = set()
+        self.epoch = uuid.uuid4().hex[:8]
+
+    def publish(self, event_type, data):
+        payload = json.dumps(data)
+        with self._cond:
+            self._last_id += 1
+            self._history.append((self._last_id, event_type, payload, time.time(), data))
+            self._cond.notify_all()
+        return self._last_id
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def format_id(self, event_id):
+        return f"{self.epoch}-{event_id}"
+
+    def subscribe(self, last_event_id=None):
+        with self._cond:
+            self.subscriber_count += 1
+            cursor = self._last_id
+            needs_resync = False
+            if last_event_id is not None:
+                epoch, _, event_id = str(last_event_id).rpartition("-")
+                try:
+                    if epoch and epoch != self.epoch:
+                        raise ValueError("id from another process")
+                    # Replay from the client's last seen event (plain ids are accepted too)
+                    cursor = min(int(event_id), self._last_id)
+                except (TypeError, ValueError):
+                    needs_resync = True
+            subscription = Subscription(self, cursor)
+            subscription.needs_resync = needs_resync
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._cond:
+            self.subscriber_count -= 1
+            self._subscriptions.discard(subscription)
+
+    def stats(self):
+        """Subscribers, events in the history ring, and the largest unread backlog of any subscriber."""
+        with self._cond:
+            backlog = max((self._last_id - s.cursor for s in self._subscriptions), default=0)
+            return {
+                "subscribers": self.subscriber_count,
+                "history": len(self._history),
+                "max_backlog": min(backlog, self.buffer_size),
+            }
+
+    def _read(self, cursor, timeout):
+        """Return (new_cursor, events, dropped) for events after `cursor`."""
+        with self._cond:
+            if self._last_id <= cursor:
+                self._cond.wait(timeout)
+            latest = self._last_id
+            if latest <= cursor or not self._history:
+                return cursor, [], 0
+            oldest = self._history[0][0]
+            start = max(cursor + 1, oldest, latest - self.buffer_size + 1)
+            # Ids in the ring are contiguous, so the offset is a subtraction
+            events = list(islice(self._history, start - oldest, None))
+        return latest, events, start - (cursor + 1)
+
+
+class Subscription:
+    def __init__(self, broker, cursor):
+        self.broker = broker
+        self.cursor = cursor
+        self.closed = False
+        self.needs_resync = False  # Last-Event-ID could not be replayed
+
+    def next_events(self, timeout):
+        """Block up to `timeout` seconds; returns (events, dropped_count)."""
+        self.cursor, events, dropped = self.broker._read(self.cursor, timeout)
+        return events, dropped
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broker._unsubscribe(self)
@@ -0,0 +1,332 @@
+# backend\src\services\event_bus.py
+
+import atexit
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from collections import deque
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+BUS_SENT = metrics.registry.counter("event_bus_sent_total", "Events sent to the shared event bus")
+BUS_RECEIVED = metrics.registry.counter("event_bus_received_total", "Events received from other processes")
+BUS_DROPPED = metrics.registry.counter(
+    "event_bus_dropped_total",
+    "Events not sent to the bus, by reason (outbox_full, unserializable, send_failed)",
+    ("reason",),
+)
+BUS_RECONNECTS = metrics.registry.counter("event_bus_reconnects_total", "Event bus listener reconnects")
+BUS_BATCH = metrics.registry.histogram(
+    "event_bus_batch_events", "Events per message sent to the bus", buckets=metrics.COUNT_BUCKETS
+)
+
+
+class EventBus:
+    """
+    In-process event bus (EVENT_BUS=memory): `publish` hands the event straight to
+    `deliver`, which fans it out to this process's SSE clients.
+    """
+
+    backend = "memory"
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def init_app(self, app):
+        pass
+
+    def publish(self, event_type, data):
+        self.deliver(event_type, data)
+
+    def pending(self):
+        return 0
+
+
+class RemoteEventBus(EventBus):
+    """
+    Shares events between processes. `publish` delivers locally at once and queues
+    the event in an outbox; a sender thread sends the outbox in batches (one message
+    per `batch_ms` window, at most `batch_size` events) and a listener thread
+    delivers other processes' batches locally. Messages from this process are
+    skipped by their origin id. Failed sends are retried up to `send_attempts`
+    times, then the batch is dropped and logged; events that can't be serialized are
+    dropped right away, and an outbox overflow past `max_pending` drops the oldest.
+    After the listener reconnects a `resync` event tells SSE clients to refetch,
+    since pub/sub does not replay. Subclasses provide `_send(message)` and `_messages()`.
+
+    The threads start on first use in each process (`start()`), so a worker forked
+    after the app was created (gunicorn --preload) runs its own, with its own origin id.
+    """
+
+    def __init__(self, deliver, channel, batch_ms=10, batch_size=200, max_pending=10000, send_attempts=10):
+        super().__init__(deliver)
+        self.channel = channel
+        self.batch_window = batch_ms / 1000.0
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.send_attempts = send_attempts
+        self.origin = uuid.uuid4().hex[:12]
+        self._outbox = deque()
+        self._cond = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._owner_pid = os.getpid()  # process the origin id and outbox belong to
+        self._pid = None  # process the threads run in
+
+    def init_app(self, app):
+        # Start in the process that serves requests, not the one that built the app
+        app.before_request(self.start)
+        atexit.register(self.flush)
+
+    def start(self):
+        """Start the sender and listener threads for this process, if not running yet."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            if self._owner_pid != pid:
+                # Forked: the parent's threads, connection and queued events stay behind
+                self._owner_pid = pid
+                self.origin = uuid.uuid4().hex[:12]
+                self._outbox = deque()
+                self._cond = threading.Condition()
+                self._reset()
+            for target, name in ((self._send_loop, "event-bus-sender"), (self._listen_loop, "event-bus-listener")):
+                threading.Thread(target=target, name=name, daemon=True).start()
+            self._pid = pid
+
+    def publish(self, event_type, data):
+        self.start()
+        self.deliver(event_type, data)
+        with self._cond:
+            if len(self._outbox) >= self.max_pending:
+                self._outbox.popleft()
+                BUS_DROPPED.inc(reason="outbox_full")
+            self._outbox.append((event_type, data))
+            self._cond.notify()
+
+    def pending(self):
+        return len(self._outbox)
+
+    def flush(self, timeout=2.0):
+        """Wait (briefly) for the sender to empty the outbox."""
+        deadline = time.monotonic() + timeout
+        while self._outbox and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _send_loop(self):
+        backoff = 0.1
+        failures = 0  # consecutive failed sends of the batch at the head of the outbox
+        while True:
+            with self._cond:
+                while not self._outbox:
+                    self._cond.wait()
+            time.sleep(self.batch_window)  # let the burst accumulate
+            with self._cond:
+                batch = [self._outbox.popleft() for _ in range(min(self.batch_size, len(self._outbox)))]
+            batch, body = self._encode(batch)
+            if not batch:
+                continue
+            try:
+                self._send(f"{self.origin}:{body}")
+            except Exception as e:
+                failures += 1
+                self._reset()
+                if failures >= self.send_attempts:
+                    log.error("Event bus send failed %d times (%s); dropping %d event(s)", failures, e, len(batch))
+                    BUS_DROPPED.inc(len(batch), reason="send_failed")
+                    failures = 0
+                else:
+                    log.warning("Event bus send failed (%s); retrying %d event(s)", e, len(batch))
+                    with self._cond:
+                        self._outbox.extendleft(reversed(batch))
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+                continue
+            failures, backoff = 0, 0.1
+            BUS_SENT.inc(len(batch))
+            BUS_BATCH.observe(len(batch))
+
+    def _encode(self, batch):
+        """(batch, JSON body) with any event that can't be serialized dropped."""
+        try:
+            return batch, json.dumps(batch)
+        except (TypeError, ValueError):
+            pass
+        kept = []
+        for event in batch:
+            try:
+                json.dumps(event)
+                kept.append(event)
+            except (TypeError, ValueError) as e:
+                log.error("Dropping %s event that can't be sent on the event bus: %s", event[0], e)
+                BUS_DROPPED.inc(reason="unserializable")
+        return kept, json.dumps(kept)
+
+    def _listen_loop(self):
+        backoff = 0.5
+        subscribed_before = False
+        while True:
+            try:
+                for message in self._messages():
+                    if message is None:  # (re)subscribed
+                        if subscribed_before:
+                            BUS_RECONNECTS.inc()
+                            self.deliver("resync", {"reason": "event_bus_reconnected"})
+                        subscribed_before, backoff = True, 0.5
+                        continue
+                    try:
+                        self._receive(message)
+                    except Exception:
+                        log.exception("Dropping malformed event bus message")
+            except Exception as e:
+                log.warning("Event bus listener disconnected (%s); reconnecting", e)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 10.0)
+
+    def _receive(self, message):
+        origin, _, body = message.partition(":")
+        if origin == self.origin:
+            return
+        events = json.loads(body)
+        BUS_RECEIVED.inc(len(events))
+        for event_type, data in events:
+            try:
+                self.deliver(event_type, data)
+            except Exception:
+                log.exception("Delivering %s event from the bus failed", event_type)
+
+    def _reset(self):
+        """Drop the sender's connection after a failure (reopened on the next send)."""
+
+
+class RedisEventBus(RemoteEventBus):
+    """Redis pub/sub: one PUBLISH per batch."""
+
+    backend = "redis"
+
+    def __init__(self, deliver, url, channel, **options):
+        import redis  # optional dependency, only needed for this backend
+
+        super().__init__(deliver, channel, **options)
+        self._redis_module = redis
+        self.url = url
+        self._redis = redis.Redis.from_url(url)
+
+    def _send(self, message):
+        self._redis.publish(self.channel, message)
+
+    def _messages(self):
+        """Yields None once subscribed, then each message."""
+        pubsub = self._redis_module.Redis.from_url(self.url).pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel)
+            yield None  # subscribed
+            while True:
+                message = pubsub.get_message(timeout=5.0)
+                if message is not None and message["type"] == "message":
+                    yield message["data"].decode()
+        finally:
+            pubsub.close()
+
+
+class PostgresEventBus(RemoteEventBus):
+    """
+    Postgres LISTEN/NOTIFY over dedicated psycopg2 connections. NOTIFY payloads are
+    limited to 8000 bytes, so a batch is split into numbered parts sent in one
+    transaction and put back together by the listeners.
+    """
+
+    backend = "postgres"
+    PART_SIZE = 7000  # characters; payloads are ASCII (json.dumps escapes the rest)
+
+    def __init__(self, deliver, url, channel, **options):
+        import psycopg2  # optional dependency, only needed for this backend
+        from sqlalchemy.engine import make_url
+
+        super().__init__(deliver, channel, **options)
+        self._psycopg2 = psycopg2
+        # SQLAlchemy URL (postgresql+psycopg2://...) -> libpq DSN
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._conn = None
+        self._batches = 0
+        self._parts = {}  # (origin, batch) -> received parts
+
+    def _send(self, message):
+        if self._conn is None:
+            self._conn = self._psycopg2.connect(self.dsn)
+        origin, _, body = message.partition(":")
+        self._batches += 1
+        parts = [body[i:i + self.PART_SIZE] for i in range(0, len(body), self.PART_SIZE)] or [""]
+        with self._conn, self._conn.cursor() as cursor:
+            for index, part in enumerate(parts):
+                cursor.execute(
+                    "SELECT pg_notify(%s, %s)",
+                    (self.channel, f"{origin}:{self._batches}:{index}:{len(parts)}:{part}"),
+                )
+
+    def _reset(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _messages(self):
+        from psycopg2 import sql
+
+        conn = self._psycopg2.connect(self.dsn)
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+            yield None  # listening
+            while True:
+                if select.select([conn], [], [], 5.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    message = self._assemble(conn.notifies.pop(0).payload)
+                    if message is not None:
+                        yield message
+        finally:
+            self._parts.clear()
+            conn.close()
+
+    def _assemble(self, payload):
+        origin, batch, index, count, part = payload.split(":", 4)
+        if origin == self.origin:
+            return None
+        if count == "1":
+            return f"{origin}:{part}"
+        parts = self._parts.setdefault((origin, batch), {})
+        parts[int(index)] = part
+        if len(parts) < int(count):
+            return None
+        del self._parts[(origin, batch)]
+        return f"{origin}:{''.join(parts[i] for i in range(int(count)))}"
+
+
+def create_event_bus(deliver, config):
+    """Bus selected by EVENT_BUS (memory, postgres, redis); falls back to memory if the driver is missing."""
+    options = {
+        "batch_ms": config.EVENT_BUS_BATCH_MS,
+        "batch_size": config.EVENT_BUS_BATCH_SIZE,
+        "max_pending": config.EVENT_BUS_MAX_PENDING,
+        "send_attempts": config.EVENT_BUS_SEND_ATTEMPTS,
+    }
+    try:
+        if config.EVENT_BUS == "redis":
+            return RedisEventBus(deliver, config.REDIS_URL, config.EVENT_BUS_CHANNEL, **options)
+        if config.EVENT_BUS == "postgres":
+            return PostgresEventBus(deliver, config.DATABASE_URL, config.EVENT_BUS_CHANNEL, **options)
+    except ImportError as e:
+        log.warning("EVENT_BUS=%s needs %s — using the in-memory event bus", config.EVENT_BUS, e.name)
+    return EventBus(deliver)
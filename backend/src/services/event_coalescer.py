@@ -0,0 +1,128 @@
+# backend\src\services\event_coalescer.py
+
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class MachineUpdateCoalescer:
+    """
+    Merge machine updates per machine_id over a short flush window and publish
+    them as one `machine_delta` event.
+
+    Every published machine record carries a version and the version it is a delta
+    against (`base`); only fields that changed since `base` are sent. Every
+    `keyframe_every` flushes a keyframe with the full tracked state of all machines
+    is published instead, so clients that missed deltas converge.
+    """
+
+    def __init__(self, publish, window_ms=50, keyframe_every=20):
+        self.publish = publish
+        self.window = window_ms / 1000.0
+        self.keyframe_every = max(1, keyframe_every)
+        self._pending = {}  # machine_id -> merged fields since the last flush
+        self._state = {}  # machine_id -> (version, full fields) as last published
+        self._flushes = 0
+        self._scheduled = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def add(self, machine_id, fields):
+        with self._cond:
+            self._pending.setdefault(machine_id, {}).update(fields)
+            if self.window <= 0:
+                flush_now = True
+            else:
+                flush_now = False
+                if not self._scheduled:
+                    self._scheduled = True
+                    self._ensure_thread()
+                    self._cond.notify()
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        with self._cond:
+            pending, self._pending = self._pending, {}
+            self._scheduled = False
+            if not pending:
+                return None
+            self._flushes += 1
+            keyframe = self._flushes % self.keyframe_every == 0
+
+            machines = []
+            for mid, fields in pending.items():
+                version, current = self._state.get(mid, (0, {}))
+                changes = {k: v for k, v in fields.items() if current.get(k) != v}
+                if not changes:
+                    continue  # nothing new: keep the version (a keyframe still lists it)
+                current = {**current, **fields}
+                self._state[mid] = (version + 1, current)
+                if not keyframe:
+                    machines.append(
+                        {"machine_id": mid, "version": version + 1, "base": version, "changes": changes}
+                    )
+            if keyframe:
+                machines = [self.full_record(mid) for mid in self._state]
+            if not machines:
+                return None
+            data = {"keyframe": keyframe, "machines": machines}
+        self.publish("machine_delta", data)
+        return data
+
+    def pending_count(self):
+        """Machines with updates waiting for the next flush."""
+        with self._cond:
+            return len(self._pending)
+
+    def full_record(self, machine_id):
+        version, current = self._state.get(machine_id, (0, {}))
+        return {"machine_id": machine_id, "version": version, "full": True, "changes": dict(current)}
+
+    def client_view(self, data, seen):
+        """
+        Rewrite a machine_delta payload for one client, given `seen` (machine_id ->
+        last version that client received). Returns None when the shared payload can
+        be sent unchanged, otherwise the per-client payload.
+        """
+        out = []
+        rewritten = False
+        for record in data["machines"]:
+            mid = record["machine_id"]
+            last = seen.get(mid)
+            if last is not None and last >= record["version"]:
+                rewritten = True  # client already has a newer full record
+                continue
+            if record.get("full") or last == record["base"]:
+                out.append(record)
+                seen[mid] = record["version"]
+            else:
+                # Client missed a version (or just connected): send the whole record
+                with self._cond:
+                    full = self.full_record(mid)
+                out.append(full)
+                seen[mid] = full["version"]
+                rewritten = True
+        if not rewritten:
+            return None
+        return {"keyframe": data["keyframe"], "machines": out}
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="event-coalescer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._scheduled:
+                    self._cond.wait()
+            time.sleep(self.window)
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Event coalescer flush failed")
@@ -0,0 +1,156 @@
+# backend\src\services\job_queue.py
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from src.blueprints.events import push_event
+from src.services.decision_cache import canonical_json
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Too many jobs are waiting; the caller should retry later."""
+
+
+class Job:
+    def __init__(self, kind, key):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.status = "queued"  # queued | running | succeeded | failed
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.done_at = None  # monotonic, for result expiry
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at and self.started_at.isoformat(),
+            "finished_at": self.finished_at and self.finished_at.isoformat(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def job_key(kind, state, params=None):
+    """Jobs of the same kind over the same factory state (and params) share a key."""
+    digest = hashlib.sha256(canonical_json([state, params]).encode()).hexdigest()
+    return f"{kind}:{digest}"
+
+
+class JobQueue:
+    """
+    Runs agent requests off the HTTP worker threads.
+
+    Jobs execute on a pool of `workers` threads, each inside an app context. At
+    most `max_queued` jobs may wait for a worker (`submit()` raises QueueFullError
+    beyond that). A job submitted while an identical one (same key) is queued or
+    running is folded into it. Finished jobs are kept for `result_ttl` seconds
+    and announced with a `job_complete` SSE event.
+    """
+
+    def __init__(self, workers=4, max_queued=32, result_ttl=600):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs = {}  # id -> Job
+        self._inflight = {}  # key -> Job (queued or running)
+        self._queued = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get("JOB_WORKERS", self.workers)
+        self.max_queued = app.config.get("JOB_QUEUE_DEPTH", self.max_queued)
+        self.result_ttl = app.config.get("JOB_RESULT_TTL", self.result_ttl)
+        atexit.register(self.shutdown)
+
+    def submit(self, kind, key, fn):
+        """Queue `fn()` as a job. Returns (job, created); created is False for a duplicate."""
+        with self._lock:
+            self._prune()
+            job = self._inflight.get(key)
+            if job is not None:
+                return job, False
+            if self._queued >= self.max_queued:
+                raise QueueFullError(f"{self._queued} jobs already waiting")
+            job = Job(kind, key)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            self._queued += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="agent-job"
+                )
+        self._executor.submit(self._run, job, fn)
+        return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for j in self._inflight.values() if j.status == "running")
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": running,
+                "max_queued": self.max_queued,
+                "retained": len(self._jobs),
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, fn):
+        with self._lock:
+            self._queued -= 1
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+        try:
+            with self.app.app_context():
+                result = fn()
+            status, error = "succeeded", None
+        except Exception as e:
+            log.warning("Job %s (%s) failed: %s", job.id, job.kind, e, extra={"job_id": job.id})
+            result, status, error = None, "failed", str(e)
+
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.status = status
+            job.finished_at = datetime.utcnow()
+            job.done_at = time.monotonic()
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+        push_event("job_complete", job.to_dict())
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.result_ttl
+        expired = [i for i, j in self._jobs.items() if j.done_at is not None and j.done_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_queue = JobQueue()
+metrics.registry.gauge("agent_jobs", "Background agent jobs by state", ("state",)).set_function(
+    lambda: {(state,): job_queue.stats()[state] for state in ("queued", "running", "retained")}
+)
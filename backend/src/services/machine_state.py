@@ -0,0 +1,89 @@
+# backend\src\services\machine_state.py
+
+import logging
+import random
+import time
+from sqlalchemy import select, update
+from src.config import Config
+from src.models import db, Machine
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+MACHINE_FIELDS = (Machine.id, Machine.name, Machine.status, Machine.utilization, Machine.energy_usage, Machine.version)
+
+CONFLICTS = metrics.registry.counter(
+    "machine_update_conflicts_total", "Versioned machine updates that lost a race", ("outcome",)
+)
+
+
+class VersionConflict(Exception):
+    """The machine changed since it was read; `current` holds its latest row (or None if deleted)."""
+
+    def __init__(self, current):
+        super().__init__("machine was modified concurrently")
+        self.current = current
+
+
+def machine_etag(version):
+    return f'"{version}"'
+
+
+def parse_if_match(header):
+    """Version from an If-Match header made by machine_etag(); None when absent or '*'."""
+    if not header or header.strip() == "*":
+        return None
+    tag = header.split(",")[0].strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise ValueError(f"If-Match must be an ETag from this API, got {header!r}")
+
+
+def load_machine(machine_id):
+    row = db.session.execute(select(*MACHINE_FIELDS).where(Machine.id == machine_id)).first()
+    return row._asdict() if row else None
+
+
+def update_machine_versioned(machine_id, compute, expected_version=None, retries=None):
+    """
+    Optimistic read-modify-write of one machine: read it, `compute(current)` the
+    new column values, and write them with UPDATE ... WHERE version = <read version>.
+    When another writer got there first the read is repeated (up to `retries` times,
+    with a short jittered backoff). With `expected_version` there is no retry: a
+    mismatch raises VersionConflict so the caller can report the lost update.
+    Returns the updated row, or None when the machine does not exist. Commits.
+    """
+    retries = Config.MACHINE_UPDATE_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        current = load_machine(machine_id)
+        if current is None:
+            return None
+        if expected_version is not None and current["version"] != expected_version:
+            CONFLICTS.inc(outcome="precondition_failed")
+            raise VersionConflict(current)
+
+        values = compute(current)
+        row = db.session.execute(
+            update(Machine)
+            .where(Machine.id == machine_id, Machine.version == current["version"])
+            .values(**values, version=Machine.version + 1)
+            .returning(*MACHINE_FIELDS)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is not None:
+            db.session.commit()
+            return row._asdict()
+
+        db.session.rollback()
+        if expected_version is not None:
+            CONFLICTS.inc(outcome="precondition_failed")
+            raise VersionConflict(load_machine(machine_id))
+        CONFLICTS.inc(outcome="retried")
+        log.debug("Machine %s changed during update (attempt %d), retrying", machine_id, attempt + 1)
+        time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+
+    CONFLICTS.inc(outcome="gave_up")
+    raise VersionConflict(load_machine(machine_id))
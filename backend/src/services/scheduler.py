@@ -0,0 +1,253 @@
+# backend\src\services\scheduler.py
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from src.config import Config
+from src.services.action_planner import apply_merged
+from src.services.agent_runner import RUN_ALL_AGENTS, run_agents
+from src.services.decision_cache import canonical_json
+from src.services.simulation import apply_actions
+from src.utils.build_state import build_factory_state
+
+log = logging.getLogger(__name__)
+
+# Change events and the agents they wake up
+TRIGGER_AGENTS = {
+    "price_crossing": ["EnergyAgent", "ProductionAgent"],
+    "utilization_jump": ["ProductionAgent", "QualityAgent", "MaintenanceAgent"],
+    "status_change": ["MaintenanceAgent", "ProductionAgent"],
+    "orders_changed": ["SupplyChainAgent", "ProductionAgent"],
+}
+
+
+def parse_schedule(spec):
+    """"ProductionAgent=300,EnergyAgent=600" -> {agent: cadence in seconds}"""
+    schedule = {}
+    for item in spec.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            schedule[name.strip()] = float(seconds)
+    return schedule
+
+
+def snapshot_hash(snap):
+    digest = hashlib.sha256(
+        canonical_json([snap.machines, snap.orders, snap.energy_prices]).encode()
+    )
+    return digest.hexdigest()
+
+
+class AgentScheduler:
+    """
+    Keeps the twin optimized without anyone calling the API.
+
+    Every `tick_seconds` it checks which agents are due: each agent has its own
+    cadence (AGENT_SCHEDULE) and is also woken early by change events between
+    ticks (price crossing TRIGGER_PRICE_THRESHOLD, a utilization jump of
+    TRIGGER_UTILIZATION_JUMP points, a status change, new or changed orders).
+    A due agent is skipped when the snapshot hash equals the one after its last
+    run, and runs are deferred once SCHEDULER_MAX_RUNS_PER_MINUTE agent runs have
+    started in the last minute (a run is not a model call: it can make up to
+    MODEL_MAX_ATTEMPTS calls, or none on a decision cache hit).
+    Agents due together run concurrently and their actions are merged.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.schedule = {}
+        self.tick_seconds = 5.0
+        self.max_runs_per_minute = 6
+        self.min_gap = 30.0
+        self._state = {}  # agent -> bookkeeping, see _agent_state()
+        self._runs = deque()  # monotonic times of scheduled agent runs
+        self._previous = None  # snapshot seen by the last tick
+        self._hash = (None, None)  # (snapshot version, hash)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.schedule = parse_schedule(app.config["AGENT_SCHEDULE"])
+        self.tick_seconds = app.config["SCHEDULER_TICK_SECONDS"]
+        self.max_runs_per_minute = app.config["SCHEDULER_MAX_RUNS_PER_MINUTE"]
+        self.min_gap = app.config["SCHEDULER_MIN_GAP_SECONDS"]
+        now = time.monotonic()
+        self._state = {agent: self._agent_state(now) for agent in self.schedule}
+        atexit.register(self.stop)
+        if app.config["SCHEDULER_ENABLED"]:
+            self.start()
+
+    @staticmethod
+    def _agent_state(now):
+        return {
+            "next_due": now,
+            "last_run": None,  # monotonic
+            "last_run_at": None,  # wall clock, for status
+            "last_hash": None,
+            "pending_triggers": set(),
+            "runs": 0,
+            "skipped_unchanged": 0,
+            "deferred_rate_limited": 0,
+        }
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            if not self._stop.is_set():
+                return
+            self._thread.join()  # a stop is pending; let the old loop finish its tick
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="agent-scheduler", daemon=True)
+        self._thread.start()
+        log.info("Agent scheduler started: %s", self.schedule)
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                with self.app.app_context():
+                    self.tick()
+            except Exception:
+                log.exception("Scheduler tick failed")
+
+    def tick(self, now=None):
+        """One scheduling round. Returns {"ran": [...], "skipped": [...], "deferred": [...]}."""
+        with self._lock:
+            return self._tick(now or time.monotonic())
+
+    def _tick(self, now):
+        from src.services.snapshot import get_snapshot
+
+        snap = get_snapshot()
+        for event in self._detect_changes(self._previous, snap):
+            for agent in TRIGGER_AGENTS.get(event, []):
+                if agent in self._state:
+                    self._state[agent]["pending_triggers"].add(event)
+        self._previous = snap
+        current_hash = self._snapshot_hash(snap)
+
+        while self._runs and now - self._runs[0] > 60:
+            self._runs.popleft()
+
+        ran, skipped, deferred = [], [], []
+        for agent, cadence in self.schedule.items():
+            st = self._state[agent]
+            triggered = bool(st["pending_triggers"]) and (
+                st["last_run"] is None or now - st["last_run"] >= self.min_gap
+            )
+            if now < st["next_due"] and not triggered:
+                continue
+            if st["last_hash"] == current_hash:
+                st["skipped_unchanged"] += 1
+                st["next_due"] = now + cadence
+                st["pending_triggers"].clear()
+                skipped.append(agent)
+                continue
+            if len(self._runs) >= self.max_runs_per_minute:
+                st["deferred_rate_limited"] += 1
+                deferred.append(agent)
+                continue
+            self._runs.append(now)
+            ran.append(agent)
+
+        if ran:
+            self._run(ran)
+            after = self._snapshot_hash(get_snapshot())
+            for agent in ran:
+                st = self._state[agent]
+                st.update(
+                    last_run=now,
+                    last_run_at=datetime.utcnow().isoformat(),
+                    last_hash=after,
+                    next_due=now + self.schedule[agent],
+                )
+                st["runs"] += 1
+                st["pending_triggers"].clear()
+            # Our own actions are not change events for the next tick
+            self._previous = get_snapshot()
+        return {"ran": ran, "skipped": skipped, "deferred": deferred}
+
+    def _run(self, agents):
+        keys = {name: key for key, name in RUN_ALL_AGENTS}
+        pairs = [(keys.get(name, name), name) for name in agents]
+        state = build_factory_state()
+        state["context"] = "Scheduled optimization run"
+        results = run_agents(pairs, state)
+        names = dict(pairs)
+        if not Config.SCHEDULER_APPLY:
+            return
+        if len(pairs) == 1:
+            key, _ = pairs[0]
+            apply_actions(results[key].get("actions", []))
+        else:
+            apply_merged([(names[key], res.get("actions", [])) for key, res in results.items()])
+
+    def _snapshot_hash(self, snap):
+        if self._hash[0] != snap.version:
+            self._hash = (snap.version, snapshot_hash(snap))
+        return self._hash[1]
+
+    @staticmethod
+    def _detect_changes(previous, snap):
+        if previous is None or previous.version == snap.version:
+            return set()
+        events = set()
+
+        threshold = Config.TRIGGER_PRICE_THRESHOLD
+        old_price, new_price = _latest_price(previous), _latest_price(snap)
+        if old_price is not None and new_price is not None:
+            if (old_price >= threshold) != (new_price >= threshold):
+                events.add("price_crossing")
+
+        old_machines = {m["id"]: m for m in previous.machines}
+        for m in snap.machines:
+            old = old_machines.get(m["id"])
+            if old is None:
+                events.add("status_change")
+                continue
+            if abs((m["utilization"] or 0) - (old["utilization"] or 0)) >= Config.TRIGGER_UTILIZATION_JUMP:
+                events.add("utilization_jump")
+            if m["status"] != old["status"]:
+                events.add("status_change")
+
+        if canonical_json(previous.orders) != canonical_json(snap.orders):
+            events.add("orders_changed")
+        return events
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "enabled": self._thread is not None and self._thread.is_alive(),
+                "tick_seconds": self.tick_seconds,
+                "runs_last_minute": sum(1 for t in self._runs if now - t <= 60),
+                "max_runs_per_minute": self.max_runs_per_minute,
+                "agents": {
+                    agent: {
+                        "cadence_seconds": self.schedule[agent],
+                        "due_in_seconds": round(max(0.0, st["next_due"] - now), 1),
+                        "last_run_at": st["last_run_at"],
+                        "pending_triggers": sorted(st["pending_triggers"]),
+                        "runs": st["runs"],
+                        "skipped_unchanged": st["skipped_unchanged"],
+                        "deferred_rate_limited": st["deferred_rate_limited"],
+                    }
+                    for agent, st in self._state.items()
+                },
+            }
+
+
+def _latest_price(snap):
+    if not snap.energy_prices:
+        return None
+    return max(snap.energy_prices, key=lambda p: p["timestamp"])["price_per_kwh"]
+
+
+scheduler = AgentScheduler()
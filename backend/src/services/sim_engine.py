@@ -0,0 +1,482 @@
+# backend\src\services\sim_engine.py
+
+import copy
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import case, func, select, update
+from src.config import Config
+from src.models import db, Machine, Order, EnergyPrice
+from src.blueprints.events import push_event, push_machine_update
+from src.services.machine_state import CONFLICTS
+from src.services.snapshot import invalidate_snapshot, snapshot_version
+
+IDLE, RUNNING, MAINTENANCE = 0, 1, 2
+STATUS_CODES = {"idle": IDLE, "running": RUNNING, "maintenance": MAINTENANCE}
+STATUS_NAMES = ["idle", "running", "maintenance"]
+
+PENDING, IN_PROGRESS, COMPLETED = 0, 1, 2
+ORDER_STATUS_CODES = {"pending": PENDING, "in_progress": IN_PROGRESS, "completed": COMPLETED}
+ORDER_STATUS_NAMES = ["pending", "in_progress", "completed"]
+
+INCREASE_SPEED, REDUCE_SPEED, SCHEDULE_MAINTENANCE = 1, 2, 3
+ACTION_CODES = {
+    "increase_speed": INCREASE_SPEED,
+    "reduce_speed": REDUCE_SPEED,
+    "schedule_maintenance": SCHEDULE_MAINTENANCE,
+}
+
+CHECKPOINT_CHUNK = 1000  # machines per checkpoint UPDATE, well under the bind parameter limits
+
+# Per-machine / per-order state that a fork shares with its parent until written
+_STATE_ARRAYS = (
+    "status", "status_names", "utilization", "target", "energy_usage", "rated_kw",
+    "resume_status", "maintenance_left", "order_produced", "order_status", "order_status_names",
+)
+
+
+class FactorySim:
+    """
+    Time-stepped model of the plant. The fleet is held as NumPy arrays (one slot
+    per machine) and every tick updates all machines at once:
+
+      - running machines drift towards their speed setpoint with some noise
+      - maintenance lasts SIM_MAINTENANCE_HOURS, then the machine resumes
+      - power draw follows status and utilization; energy is costed against
+        the hour-of-day price profile built from EnergyPrice history
+      - output is allocated to open orders earliest deadline first
+
+    Nothing touches the database until `checkpoint()`. `fork()` gives a cheap
+    copy-on-write branch for what-if runs.
+    """
+
+    def __init__(self, machine_ids, statuses, utilization, energy_usage, orders=(),
+                 price_profile=None, clock=None, seed=None):
+        frac = Config.SIM_IDLE_POWER_FRACTION
+        self.ids = np.asarray(machine_ids, dtype=np.int64)
+        self.status_names = np.array(statuses, dtype=object)
+        self.status = np.array([STATUS_CODES.get(s, IDLE) for s in statuses], dtype=np.int8)
+        self.utilization = np.nan_to_num(np.asarray(utilization, dtype=np.float64))
+        self.target = self.utilization.copy()
+        self.energy_usage = np.nan_to_num(np.asarray(energy_usage, dtype=np.float64))
+        # Rated power is backed out of the current draw where it is known
+        load = self._load_factor(frac)
+        self.rated_kw = np.where(
+            (load > 0) & (self.energy_usage > 0),
+            self.energy_usage / np.where(load > 0, load, 1),
+            Config.SIM_DEFAULT_RATED_KW,
+        )
+        self.resume_status = np.full(len(self.ids), IDLE, dtype=np.int8)
+        self.maintenance_left = np.where(
+            self.status == MAINTENANCE, Config.SIM_MAINTENANCE_HOURS, 0.0
+        )
+
+        # Orders sorted by deadline, so EDF allocation is a cumulative sum
+        orders = sorted(orders, key=lambda o: (o[3], o[0]))
+        self.order_ids = np.array([o[0] for o in orders], dtype=np.int64)
+        self.order_quantity = np.array([o[1] for o in orders], dtype=np.float64)
+        self.order_produced = np.array([o[2] for o in orders], dtype=np.float64)
+        self.order_deadline = [o[3] for o in orders]
+        self.order_status_names = np.array([o[4] for o in orders], dtype=object)
+        self.order_status = np.array(
+            [ORDER_STATUS_CODES.get(o[4], PENDING) for o in orders], dtype=np.int8
+        )
+
+        self.price_profile = (
+            np.zeros(24) if price_profile is None else np.asarray(price_profile, dtype=np.float64)
+        )
+        self.clock = clock or datetime.utcnow().replace(second=0, microsecond=0)
+        self.rng = np.random.default_rng(seed)
+        self.energy_kwh = 0.0
+        self.energy_cost = 0.0
+        self.units_produced = 0.0
+        self.version = None
+        self.row_versions = None  # machines.version of each machine as last loaded/written
+        self.is_fork = False
+        self._shared = set()
+        self._mark_synced()
+
+    @classmethod
+    def from_db(cls, previous=None, seed=None):
+        """Load the fleet, orders and price profile; carry clock and progress over from `previous`."""
+        machines = db.session.execute(
+            select(
+                Machine.id, Machine.status, Machine.utilization, Machine.energy_usage, Machine.version
+            ).order_by(Machine.id)
+        ).all()
+        produced = {}
+        if previous is not None:
+            produced = dict(zip(previous.order_ids.tolist(), previous.order_produced.tolist()))
+        orders = [
+            (oid, quantity, produced.get(oid, 0.0), deadline, status)
+            for oid, quantity, deadline, status in db.session.execute(
+                select(Order.id, Order.quantity, Order.deadline, Order.status)
+            )
+        ]
+        sim = cls(
+            [m[0] for m in machines],
+            [m[1] for m in machines],
+            [m[2] or 0.0 for m in machines],
+            [m[3] or 0.0 for m in machines],
+            orders=orders,
+            price_profile=_price_profile(),
+            clock=previous.clock if previous is not None else None,
+            seed=seed,
+        )
+        sim.row_versions = np.array([m[4] for m in machines], dtype=np.int64)
+        if previous is not None:
+            sim.energy_kwh = previous.energy_kwh
+            sim.energy_cost = previous.energy_cost
+            sim.units_produced = previous.units_produced
+        sim.version = snapshot_version()
+        return sim
+
+    @classmethod
+    def from_snapshot(cls, snap, seed=None):
+        """Build from a services/snapshot.py Snapshot, without touching the database."""
+        machines = snap.machines
+        orders = [
+            (o["id"], o["quantity"], 0.0, datetime.fromisoformat(o["deadline"]), o["status"])
+            for o in snap.orders
+        ]
+        prices = snap.energy_prices
+        sim = cls(
+            [m["id"] for m in machines],
+            [m["status"] for m in machines],
+            [m["utilization"] or 0.0 for m in machines],
+            [m["energy_usage"] or 0.0 for m in machines],
+            orders=orders,
+            price_profile=_hourly_profile(
+                [datetime.fromisoformat(p["timestamp"]).hour for p in prices],
+                [p["price_per_kwh"] for p in prices],
+            ),
+            seed=seed,
+        )
+        sim.version = snap.version
+        return sim
+
+    def fork(self, seed=None):
+        """
+        Copy-on-write branch of this simulation: arrays are shared until either side
+        writes to them, so forking costs nothing up front. Forks never checkpoint.
+        """
+        child = copy.copy(self)
+        child.rng = np.random.default_rng(seed)
+        child.is_fork = True
+        child._shared = set(_STATE_ARRAYS)
+        self._shared = set(_STATE_ARRAYS)
+        return child
+
+    def _own(self, *names):
+        """Take a private copy of shared arrays before writing to them in place."""
+        for name in names:
+            if name in self._shared:
+                setattr(self, name, getattr(self, name).copy())
+                self._shared.discard(name)
+
+    def _load_factor(self, frac):
+        """Share of rated power drawn by each machine in its current state."""
+        return np.where(
+            self.status == RUNNING,
+            frac + (1 - frac) * self.utilization / 100,
+            np.where(self.status == IDLE, frac, 0.0),
+        )
+
+    def apply_actions(self, actions):
+        """
+        Apply agent actions as array operations. Several actions on one machine are
+        applied in their original order, with the same clamping as fold_action().
+        reassign_job has no effect on the simulated fleet. Returns the number applied.
+        """
+        idx, codes, values = [], [], []
+        for action in actions:
+            code = ACTION_CODES.get(action.get("action"))
+            try:
+                mid = int(action.get("machine_id"))
+            except (TypeError, ValueError):
+                continue
+            if code is None:
+                continue
+            try:
+                value = float(action.get("value"))
+            except (TypeError, ValueError):
+                value = 0.0
+            idx.append(mid)
+            codes.append(code)
+            values.append(value)
+        if not idx or not len(self.ids):
+            return 0
+
+        pos = np.minimum(np.searchsorted(self.ids, idx), len(self.ids) - 1)
+        known = self.ids[pos] == np.asarray(idx)
+        pos, codes, values = pos[known], np.asarray(codes)[known], np.asarray(values)[known]
+
+        self._own("utilization", "target", "resume_status", "status", "maintenance_left")
+        # k-th action on a machine goes in round k, so each round has unique indices
+        order = np.argsort(pos, kind="stable")
+        sorted_pos = pos[order]
+        first = np.r_[True, sorted_pos[1:] != sorted_pos[:-1]]
+        steps = np.arange(len(sorted_pos))
+        rank = np.empty_like(steps)
+        rank[order] = steps - np.maximum.accumulate(np.where(first, steps, 0))
+
+        for k in range(rank.max() + 1 if len(rank) else 0):
+            in_round = rank == k
+            i, c, v = pos[in_round], codes[in_round], values[in_round]
+
+            inc = i[c == INCREASE_SPEED]
+            self.utilization[inc] = np.minimum(100, self.utilization[inc] + v[c == INCREASE_SPEED])
+            red = i[c == REDUCE_SPEED]
+            self.utilization[red] = np.maximum(0, self.utilization[red] - v[c == REDUCE_SPEED])
+            self.target[i] = self.utilization[i]
+
+            maint = i[(c == SCHEDULE_MAINTENANCE) & (self.status[i] != MAINTENANCE)]
+            self.resume_status[maint] = np.where(
+                self.status[maint] == RUNNING, RUNNING, IDLE
+            )
+            self.status[maint] = MAINTENANCE
+            self.maintenance_left[maint] = Config.SIM_MAINTENANCE_HOURS
+        return int(len(pos))
+
+    def step(self, dt_hours):
+        """Advance every machine and order by one tick of `dt_hours`."""
+        running = self.status == RUNNING
+
+        # Utilization relaxes towards the setpoint, plus noise
+        relax = min(1.0, Config.SIM_UTIL_RELAX * dt_hours)
+        noise = self.rng.normal(0.0, Config.SIM_UTIL_NOISE * np.sqrt(dt_hours), len(self.ids))
+        drifted = np.clip(self.utilization + relax * (self.target - self.utilization) + noise, 0, 100)
+        self.utilization = np.where(running, drifted, self.utilization)
+
+        # Maintenance countdown; finished machines resume what they were doing
+        in_maintenance = self.status == MAINTENANCE
+        self.maintenance_left = np.where(
+            in_maintenance, self.maintenance_left - dt_hours, self.maintenance_left
+        )
+        done = in_maintenance & (self.maintenance_left <= 0)
+        self.status = np.where(done, self.resume_status, self.status).astype(np.int8)
+        running = self.status == RUNNING
+
+        # Energy: current draw in kW is what energy_usage reports (kWh per hour)
+        self.energy_usage = self.rated_kw * self._load_factor(Config.SIM_IDLE_POWER_FRACTION)
+        kwh = float(self.energy_usage.sum()) * dt_hours
+        self.energy_kwh += kwh
+        self.energy_cost += kwh * self.price_profile[self.clock.hour]
+
+        # Output goes to open orders, earliest deadline first
+        units = float((self.utilization * running).sum()) / 100 * Config.SIM_UNITS_PER_HOUR * dt_hours
+        self.units_produced += units
+        if len(self.order_ids):
+            remaining = np.where(
+                self.order_status == COMPLETED, 0.0, self.order_quantity - self.order_produced
+            )
+            before = np.cumsum(remaining) - remaining
+            allocated = np.clip(units - before, 0, remaining)
+            self.order_produced = self.order_produced + allocated
+            self._own("order_status")
+            started = (allocated > 0) & (self.order_status == PENDING)
+            self.order_status[started] = IN_PROGRESS
+            self.order_status[self.order_produced >= self.order_quantity] = COMPLETED
+
+        self.clock += timedelta(hours=dt_hours)
+
+    def run(self, hours, tick_minutes=None, checkpoint_hours=None):
+        """
+        Simulate `hours` in ticks of `tick_minutes`, checkpointing to the database
+        every `checkpoint_hours` (if given) and at the end. Returns an hourly timeline.
+        """
+        dt = (tick_minutes or Config.SIM_TICK_MINUTES) / 60
+        ticks = max(1, int(round(hours / dt)))
+        per_checkpoint = int(round(checkpoint_hours / dt)) if checkpoint_hours else 0
+        timeline = []
+        last = (self.energy_kwh, self.energy_cost, self.units_produced)
+        hour_start = self.clock
+        for tick in range(1, ticks + 1):
+            self.step(dt)
+            if self.clock - hour_start >= timedelta(hours=1) or tick == ticks:
+                timeline.append(self._timeline_point(last))
+                last = (self.energy_kwh, self.energy_cost, self.units_produced)
+                hour_start = self.clock
+            if per_checkpoint and tick % per_checkpoint == 0 and tick != ticks:
+                self.checkpoint()
+        self.checkpoint()
+        return timeline
+
+    def _timeline_point(self, last):
+        running = self.status == RUNNING
+        return {
+            "time": self.clock.isoformat(),
+            "running": int(running.sum()),
+            "maintenance": int((self.status == MAINTENANCE).sum()),
+            "mean_utilization": round(float(self.utilization[running].mean()), 2) if running.any() else 0.0,
+            "power_kw": round(float(self.energy_usage.sum()), 3),
+            "energy_kwh": round(self.energy_kwh - last[0], 3),
+            "energy_cost": round(self.energy_cost - last[1], 4),
+            "units": round(self.units_produced - last[2], 2),
+        }
+
+    def checkpoint(self):
+        """
+        Write machines and orders that changed since the last checkpoint in one commit.
+        A machine is only written if its row version is still the one this engine
+        loaded or last wrote; machines that someone else changed meanwhile (PUT,
+        telemetry, agent actions) keep the other write, and the engine reloads from
+        the database before its next run.
+        """
+        if self.is_fork or self.row_versions is None:
+            raise RuntimeError("only a simulation loaded with from_db() can be checkpointed")
+        self._own("status_names", "order_status_names")
+        status_changed = self.status != self._synced_status
+        changed = (
+            status_changed
+            | (np.abs(self.utilization - self._synced_utilization) > 1e-6)
+            | (np.abs(self.energy_usage - self._synced_energy) > 1e-6)
+        )
+        # Keep statuses the engine doesn't model unless the machine changed state
+        self.status_names[status_changed] = [STATUS_NAMES[c] for c in self.status[status_changed]]
+        rows = [
+            {"id": int(mid), "version": int(version), "status": status,
+             "utilization": round(float(util), 2), "energy_usage": round(float(energy), 3)}
+            for mid, version, status, util, energy in zip(
+                self.ids[changed], self.row_versions[changed], self.status_names[changed],
+                self.utilization[changed], self.energy_usage[changed],
+            )
+        ]
+        written = {}  # machine id -> new row version
+        for start in range(0, len(rows), CHECKPOINT_CHUNK):
+            written.update(self._write_machines(rows[start:start + CHECKPOINT_CHUNK]))
+        conflicts = len(rows) - len(written)
+        rows = [row for row in rows if row["id"] in written]
+
+        order_changed = self.order_status != self._synced_order_status
+        self.order_status_names[order_changed] = [
+            ORDER_STATUS_NAMES[c] for c in self.order_status[order_changed]
+        ]
+        order_rows = [
+            {"id": int(oid), "status": status}
+            for oid, status in zip(self.order_ids[order_changed], self.order_status_names[order_changed])
+        ]
+        if order_rows:
+            db.session.execute(update(Order), order_rows)
+
+        stale = conflicts or self.version != snapshot_version()  # someone else wrote since the load
+        db.session.commit()
+        invalidate_snapshot()
+        index = {mid: i for i, mid in enumerate(self.ids.tolist())}
+        for mid, version in written.items():
+            self.row_versions[index[mid]] = version
+        # After other writes the engine no longer matches the database: reload next time
+        self.version = None if stale else snapshot_version()
+        self._mark_synced()
+
+        # Per-machine deltas for small fleets; big checkpoints just tell clients to refetch
+        if len(rows) <= Config.SIM_EVENT_LIMIT:
+            for row in rows:
+                push_machine_update(
+                    row["id"], status=row["status"], utilization=row["utilization"],
+                    energy_usage=row["energy_usage"],
+                )
+        push_event(
+            "simulation_checkpoint",
+            {"clock": self.clock.isoformat(), "machines": len(rows), "orders": len(order_rows)},
+        )
+        return len(rows), len(order_rows)
+
+    def _write_machines(self, rows):
+        """
+        One UPDATE ... RETURNING for a chunk of machines, each guarded by the version
+        it was loaded with. Returns {machine id: new version} of the rows written.
+        """
+        ids = [row["id"] for row in rows]
+
+        def by_id(field):
+            return case({row["id"]: row[field] for row in rows}, value=Machine.id)
+
+        result = db.session.execute(
+            update(Machine)
+            .where(Machine.id.in_(ids), Machine.version == by_id("version"))
+            .values(
+                status=by_id("status"),
+                utilization=by_id("utilization"),
+                energy_usage=by_id("energy_usage"),
+                version=Machine.version + 1,
+            )
+            .returning(Machine.id, Machine.version)
+            .execution_options(synchronize_session=False)
+        )
+        written = dict(result.all())
+        if len(written) < len(rows):
+            CONFLICTS.inc(len(rows) - len(written), outcome="simulation_skipped")
+        return written
+
+    def _mark_synced(self):
+        self._synced_status = self.status.copy()
+        self._synced_utilization = self.utilization.copy()
+        self._synced_energy = self.energy_usage.copy()
+        self._synced_order_status = self.order_status.copy()
+
+    def summary(self):
+        counts = np.bincount(self.status, minlength=3)
+        running = self.status == RUNNING
+        return {
+            "clock": self.clock.isoformat(),
+            "machines": {name: int(counts[code]) for code, name in enumerate(STATUS_NAMES)},
+            "mean_utilization": round(float(self.utilization[running].mean()), 2) if running.any() else 0.0,
+            "power_kw": round(float(self.energy_usage.sum()), 3),
+            "energy_kwh": round(self.energy_kwh, 3),
+            "energy_cost": round(self.energy_cost, 4),
+            "units_produced": round(self.units_produced, 2),
+            "orders": [
+                {
+                    "id": int(oid),
+                    "status": ORDER_STATUS_NAMES[status],
+                    "produced": round(float(produced), 2),
+                    "quantity": int(quantity),
+                    "deadline": deadline.isoformat(),
+                }
+                for oid, status, produced, quantity, deadline in zip(
+                    self.order_ids, self.order_status, self.order_produced,
+                    self.order_quantity, self.order_deadline,
+                )
+            ],
+        }
+
+
+def _price_profile():
+    """Average price per hour of day over the last SIM_PRICE_HISTORY_DAYS of history."""
+    latest = db.session.execute(select(func.max(EnergyPrice.timestamp))).scalar()
+    if latest is None:
+        return np.zeros(24)
+    rows = db.session.execute(
+        select(EnergyPrice.timestamp, EnergyPrice.price_per_kwh).where(
+            EnergyPrice.timestamp > latest - timedelta(days=Config.SIM_PRICE_HISTORY_DAYS)
+        )
+    ).all()
+    return _hourly_profile([ts.hour for ts, _ in rows], [price for _, price in rows])
+
+
+def _hourly_profile(hours, prices):
+    if not prices:
+        return np.zeros(24)
+    prices = np.asarray(prices, dtype=np.float64)
+    totals = np.bincount(hours, weights=prices, minlength=24)
+    counts = np.bincount(hours, minlength=24)
+    # Hours without history get the overall average
+    return np.where(counts > 0, totals / np.maximum(counts, 1), prices.mean())
+
+
+_engine = None
+engine_lock = threading.Lock()  # held for the whole of a run / read of the engine
+
+
+def get_engine(reset=False, seed=None):
+    """
+    The process-wide simulation, reloaded from the database when anything else has
+    written since its last checkpoint. Callers must hold `engine_lock`.
+    """
+    global _engine
+    if reset or _engine is None:
+        _engine = FactorySim.from_db(seed=seed)
+    elif _engine.version != snapshot_version():
+        _engine = FactorySim.from_db(previous=_engine, seed=seed)
+    return _engine
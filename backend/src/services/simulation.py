@@ -1,67 +1,177 @@
 # backend\src\services\simulation.py
 
+import logging
+import math
+from sqlalchemy import case, func, select, update
 from src.models import db, Machine, Order
-from src.blueprints.events import push_event
+from src.blueprints.events import push_machine_update
+from src.services.snapshot import invalidate_snapshot
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+BATCH_ACTIONS = metrics.registry.histogram(
+    "apply_actions_batch_actions", "Actions per apply_actions call", buckets=metrics.COUNT_BUCKETS
+)
+BATCH_MACHINES = metrics.registry.histogram(
+    "apply_actions_batch_machines", "Machines changed per apply_actions call", buckets=metrics.COUNT_BUCKETS
+)
+
+
+def fold_action(status, utilization, act, value):
+    """Return the (status, utilization) a machine has after one action."""
+    if act == "increase_speed":
+        try:
+            val = float(value)
+        except:
+            val = 0
+        utilization = min(100, utilization + val)
+
+    elif act == "reduce_speed":
+        try:
+            val = float(value)
+        except:
+            val = 0
+        utilization = max(0, utilization - val)
+
+    elif act == "schedule_maintenance":
+        status = "maintenance"
+
+    return status, utilization
+
+
+def coerce_machine_id(raw_mid):
+    """Machine id as an int, so string ids from agents still match DB ids; None if it isn't one."""
+    try:
+        return int(raw_mid)
+    except Exception:
+        return None
+
+
+def _speed_step(act, value):
+    """(delta, low, high) of one speed action: utilization -> min(high, max(low, utilization + delta))."""
+    try:
+        val = float(value)
+    except:
+        val = 0
+    if act == "increase_speed":
+        return val, -math.inf, 100
+    return -val, 0, math.inf
+
+
+def _compose(step, delta, low, high):
+    """Fold `step` after an accumulated (delta, low, high); clamps compose into a single clamp."""
+    d, lo, hi = step
+    return delta + d, min(hi, max(lo, low + d)), min(hi, max(lo, high + d))
+
+
+def _clamped(expr, low, high):
+    if low > -math.inf:
+        expr = case((expr < low, low), else_=expr)
+    if high < math.inf:
+        expr = case((expr > high, high), else_=expr)
+    return expr
 
 
 def apply_actions(actions: list):
-    """Apply agent actions to machines/orders and persist to DB."""
-    updates = []
-    for action in actions:
-        # Coerce machine_id to int when possible so string IDs from agents still match DB ids
-        raw_mid = action.get("machine_id")
-        machine = None
-        if raw_mid is not None:
-            try:
-                mid = int(raw_mid)
-            except Exception:
-                mid = raw_mid
-            machine = Machine.query.get(mid)
-        else:
-            machine = None
-        if not machine:
-            print(f"[!] apply_actions: no machine found for action {action}. (machine_id={raw_mid})")
+    """
+    Apply agent actions to machines/orders and persist to DB.
+
+    Each machine's speed actions are folded into one clamped delta, and all machines
+    that change are written by a single UPDATE ... RETURNING that computes the new
+    utilization in SQL and bumps `version`, so concurrent writers (other workers,
+    telemetry) can't lose each other's updates. The rows are locked and read first
+    (FOR UPDATE on Postgres) to report each action's result as if the actions had been
+    applied one by one, as before, and to leave machines that don't change alone.
+    """
+    targets = [(action, coerce_machine_id(action.get("machine_id"))) for action in actions]
+
+    steps = {}  # machine id -> [delta, low, high, maintenance] of its speed/maintenance actions
+    for action, mid in targets:
+        if mid is None:
+            log.warning("apply_actions: no machine found for action %s (machine_id=%s)", action, action.get("machine_id"))
             continue
+        act = action.get("action")
+        if act in ("increase_speed", "reduce_speed"):
+            step = steps.setdefault(mid, [0.0, -math.inf, math.inf, False])
+            step[:3] = _compose(_speed_step(act, action.get("value")), *step[:3])
+        elif act == "schedule_maintenance":
+            steps.setdefault(mid, [0.0, -math.inf, math.inf, False])[3] = True
+
+    # Lock and read every targeted machine: reassign_job only needs it to exist
+    touched = {mid for _, mid in targets if mid is not None}
+    current = {}  # machine id -> (status, utilization) before this batch
+    if touched:
+        current = {
+            mid: (status, float(utilization or 0))
+            for mid, status, utilization in db.session.execute(
+                select(Machine.id, Machine.status, Machine.utilization)
+                .where(Machine.id.in_(touched))
+                .with_for_update()
+            )
+        }
 
+    # Per-action results, folded from the locked pre-batch state in action order
+    updates = []
+    reassign = False
+    state = dict(current)
+    for action, mid in targets:
+        if mid not in state:
+            if mid is not None:
+                log.warning("apply_actions: no machine found for action %s (machine_id=%s)", action, action.get("machine_id"))
+            continue
         act = action.get("action")
-        value = action.get("value")
-
-        if act == "increase_speed":
-            try:
-                val = float(value)
-            except:
-                val = 0
-            machine.utilization = min(100, machine.utilization + val)
-
-        elif act == "reduce_speed":
-            try:
-                val = float(value)
-            except:
-                val = 0
-            machine.utilization = max(0, machine.utilization - val)
+        state[mid] = fold_action(*state[mid], act, action.get("value"))
+        if act == "reassign_job":
+            reassign = True
+        updates.append({"machine_id": mid, "new_status": state[mid][0], "new_utilization": state[mid][1]})
 
-        elif act == "schedule_maintenance":
-            machine.status = "maintenance"
-
-        elif act == "reassign_job":
-            order = Order.query.first()
-            if order:
-                order.status = "in_progress"
-
-        updates.append(
-            {
-                "machine_id": machine.id,
-                "new_status": machine.status,
-                "new_utilization": machine.utilization,
-            }
+    # Only machines whose status or utilization actually moves are written, so
+    # no-op actions don't bump `version` (and break other writers' If-Match)
+    moving = {mid: step for mid, step in steps.items() if mid in state and state[mid] != current[mid]}
+    changed = {}  # machine id -> final (status, utilization)
+    if moving:
+        base = func.coalesce(Machine.utilization, 0)
+        values = {
+            "utilization": case(
+                {mid: _clamped(base + delta, low, high) for mid, (delta, low, high, _) in moving.items()},
+                value=Machine.id,
+                else_=Machine.utilization,
+            ),
+            "version": Machine.version + 1,
+        }
+        maintenance = [mid for mid, step in moving.items() if step[3]]
+        if maintenance:
+            values["status"] = case((Machine.id.in_(maintenance), "maintenance"), else_=Machine.status)
+        rows = db.session.execute(
+            update(Machine)
+            .where(Machine.id.in_(moving))
+            .values(**values)
+            .returning(Machine.id, Machine.status, Machine.utilization)
+            .execution_options(synchronize_session=False)
         )
+        final = {mid: (status, float(utilization)) for mid, status, utilization in rows}
+        changed = {mid: final[mid] for mid in moving if mid in final}
+
+    if reassign:
+        order_id = db.session.execute(select(Order.id).order_by(Order.id).limit(1)).scalar()
+        if order_id is not None:
+            db.session.execute(
+                update(Order).where(Order.id == order_id).values(status="in_progress")
+            )
 
     db.session.commit()
-    # Broadcast state update
+    invalidate_snapshot()
+
+    # Broadcast the final state of each changed machine; the coalescer merges these
+    # with other updates in the same flush window and sends only changed fields
+    BATCH_ACTIONS.observe(len(actions))
+    BATCH_MACHINES.observe(len(changed))
     if len(updates) == 0:
-        print(f"[!] apply_actions: no updates produced from actions: {actions}")
+        log.debug("apply_actions: no updates produced from actions: %s", actions)
     else:
-        print(f"[>] Broadcasting state update: {updates}")
-    push_event("state_update", updates)
-    
+        log.debug("Broadcasting state update for machines %s", list(changed))
+    for mid, (status, utilization) in changed.items():
+        push_machine_update(mid, status=status, utilization=utilization)
+
     return updates
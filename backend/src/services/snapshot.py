@@ -0,0 +1,105 @@
+# backend\src\services\snapshot.py
+
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+from sqlalchemy import func, select
+from src.config import Config
+from src.models import db, Machine, Order, EnergyPrice
+
+# Immutable view of the factory tables. Lists hold plain dicts and are shared
+# between callers, so treat them as read-only.
+Snapshot = namedtuple("Snapshot", "version loaded_at machines orders energy_prices")
+
+_lock = threading.Lock()
+_version = 0
+_snapshot = None
+
+
+def invalidate_snapshot():
+    """Call after committing writes to machines, orders or energy prices."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def snapshot_version():
+    return _version
+
+
+def get_snapshot():
+    """Return the cached snapshot, reloading it only if a write invalidated it."""
+    global _snapshot
+    snap = _snapshot
+    max_age = Config.SNAPSHOT_MAX_AGE
+    if (
+        snap is not None
+        and snap.version == _version
+        and (not max_age or time.monotonic() - snap.loaded_at < max_age)
+    ):
+        return snap
+
+    version = _version
+    snap = _load(version)
+    with _lock:
+        # Don't publish a snapshot that a concurrent write has already made stale
+        if _version == version:
+            _snapshot = snap
+    return snap
+
+
+def _load(version):
+    # Column-only selects on the session's single connection: rows come back as
+    # tuples, with no ORM objects or identity-map bookkeeping.
+    machine_rows = db.session.execute(
+        select(
+            Machine.id,
+            Machine.name,
+            Machine.status,
+            Machine.utilization,
+            Machine.energy_usage,
+        ).order_by(Machine.id)
+    ).all()
+    order_rows = db.session.execute(
+        select(
+            Order.id, Order.customer, Order.quantity, Order.deadline, Order.status
+        ).order_by(Order.id)
+    ).all()
+    # Only the trailing window of raw prices; older history lives in the rollups
+    # (services/energy_series.py) and would just be trimmed from prompts anyway.
+    latest = db.session.execute(select(func.max(EnergyPrice.timestamp))).scalar()
+    price_rows = []
+    if latest is not None:
+        window_start = latest - timedelta(hours=Config.STATE_ENERGY_WINDOW_HOURS)
+        price_rows = db.session.execute(
+            select(EnergyPrice.timestamp, EnergyPrice.price_per_kwh)
+            .where(EnergyPrice.timestamp > window_start)
+            .order_by(EnergyPrice.id)
+        ).all()
+
+    machines = [
+        {
+            "id": mid,
+            "name": name,
+            "status": status,
+            "utilization": utilization,
+            "energy_usage": energy_usage,
+        }
+        for mid, name, status, utilization, energy_usage in machine_rows
+    ]
+    orders = [
+        {
+            "id": oid,
+            "customer": customer,
+            "quantity": quantity,
+            "deadline": deadline.isoformat(),
+            "status": status,
+        }
+        for oid, customer, quantity, deadline, status in order_rows
+    ]
+    prices = [
+        {"timestamp": ts.isoformat(), "price_per_kwh": price}
+        for ts, price in price_rows
+    ]
+    return Snapshot(version, time.monotonic(), machines, orders, prices)
@@ -0,0 +1,209 @@
+# backend\src\services\state_compaction.py
+
+import json
+from datetime import datetime, timedelta
+from src.config import Config
+
+# What each agent needs to see. Keys:
+#   machines: min_utilization (only machines at/above it), statuses (only these)
+#   orders:   open_only (drop completed), deadline_hours (only due within N hours)
+#   energy:   window_hours (history kept), bucket_hours (aggregation step)
+#   trim:     tables to shorten first when the prompt exceeds the token budget
+AGENT_STATE_VIEWS = {
+    "ProductionAgent": {
+        "machines": {},
+        "orders": {"open_only": True},
+        "energy": {"window_hours": 12, "bucket_hours": 1},
+        "trim": ["energy_prices", "machines", "orders"],
+    },
+    "EnergyAgent": {
+        "machines": {"statuses": ["running", "idle"]},
+        "orders": {"open_only": True, "deadline_hours": 24},
+        "energy": {"window_hours": 24, "bucket_hours": 1},
+        "trim": ["orders", "machines", "energy_prices"],
+    },
+    "QualityAgent": {
+        "machines": {"min_utilization": 60},
+        "energy": {"window_hours": 0},
+        "trim": ["machines"],
+    },
+    "MaintenanceAgent": {
+        "machines": {"min_utilization": 70},
+        "orders": {"open_only": True, "deadline_hours": 48},
+        "energy": {"window_hours": 12, "bucket_hours": 3},
+        "trim": ["energy_prices", "machines", "orders"],
+    },
+    "SupplyChainAgent": {
+        "machines": {},
+        "orders": {"open_only": True, "deadline_hours": 72},
+        "energy": {"window_hours": 0},
+        "trim": ["machines", "orders"],
+    },
+}
+
+DEFAULT_VIEW = {
+    "machines": {},
+    "orders": {"open_only": True},
+    "energy": {"window_hours": 24, "bucket_hours": 1},
+    "trim": ["energy_prices", "orders", "machines"],
+}
+
+MACHINE_COLUMNS = ["id", "name", "status", "utilization", "energy_usage"]
+ORDER_COLUMNS = ["id", "customer", "quantity", "deadline", "status"]
+ENERGY_COLUMNS = ["hour", "min", "avg", "max"]
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for JSON-heavy prompts)."""
+    return (len(text) + 3) // 4
+
+
+def compact_state(agent_name, factory_state, budget=None):
+    """
+    Reduce a full factory state to the agent's view in a tabular
+    {"cols": [...], "rows": [[...]]} encoding, trimmed to the token budget.
+    Returns (compact_state, stats).
+    """
+    view = AGENT_STATE_VIEWS.get(agent_name, DEFAULT_VIEW)
+    budget = budget or Config.PROMPT_TOKEN_BUDGET
+
+    tables = {
+        "machines": _machine_rows(factory_state.get("machines", []), view.get("machines")),
+        "orders": _order_rows(factory_state.get("orders", []), view.get("orders")),
+        "energy_prices": _energy_rows(
+            factory_state.get("energy_prices", []), view.get("energy", {})
+        ),
+    }
+    columns = {
+        "machines": MACHINE_COLUMNS,
+        "orders": ORDER_COLUMNS,
+        "energy_prices": ENERGY_COLUMNS,
+    }
+    if "orders" not in view:
+        tables.pop("orders")
+
+    dropped = _trim_to_budget(tables, view.get("trim", []), budget, factory_state)
+
+    compact = {
+        name: {"cols": columns[name], "rows": rows}
+        for name, rows in tables.items()
+        if rows or name == "machines"
+    }
+    compact["context"] = factory_state.get("context", "")
+    if dropped:
+        compact["truncated"] = dropped
+
+    raw_tokens = estimate_tokens(json.dumps(factory_state))
+    compact_tokens = estimate_tokens(_dumps(compact))
+    stats = {
+        "raw_tokens": raw_tokens,
+        "compact_tokens": compact_tokens,
+        "saved_tokens": raw_tokens - compact_tokens,
+    }
+    return compact, stats
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _machine_rows(machines, opts):
+    opts = opts or {}
+    min_util = opts.get("min_utilization")
+    statuses = opts.get("statuses")
+    rows = []
+    for m in machines:
+        if min_util is not None and (m.get("utilization") or 0) < min_util:
+            continue
+        if statuses and m.get("status") not in statuses:
+            continue
+        rows.append(
+            [
+                m.get("id"),
+                m.get("name"),
+                m.get("status"),
+                _round(m.get("utilization")),
+                _round(m.get("energy_usage")),
+            ]
+        )
+    # Busiest machines first so budget trimming drops the least loaded ones
+    rows.sort(key=lambda r: -(r[3] or 0))
+    return rows
+
+
+def _order_rows(orders, opts):
+    if opts is None:
+        return []
+    horizon = None
+    if opts.get("deadline_hours"):
+        horizon = datetime.utcnow() + timedelta(hours=opts["deadline_hours"])
+    rows = []
+    for o in orders:
+        if opts.get("open_only") and o.get("status") == "completed":
+            continue
+        if horizon is not None and datetime.fromisoformat(o["deadline"]) > horizon:
+            continue
+        rows.append(
+            [o.get("id"), o.get("customer"), o.get("quantity"), o["deadline"][:16], o.get("status")]
+        )
+    # Most urgent first
+    rows.sort(key=lambda r: r[3])
+    return rows
+
+
+def _energy_rows(prices, opts):
+    """Aggregate raw price points into min/avg/max buckets over a trailing window."""
+    window = opts.get("window_hours", 24)
+    if not prices or not window:
+        return []
+    step = timedelta(hours=opts.get("bucket_hours", 1))
+    points = [(datetime.fromisoformat(p["timestamp"]), p["price_per_kwh"]) for p in prices]
+    latest = max(ts for ts, _ in points)
+    start = latest - timedelta(hours=window)
+
+    buckets = {}
+    for ts, price in points:
+        if ts <= start:
+            continue
+        # Buckets are aligned to whole hours, `step` wide
+        hour = ts.replace(minute=0, second=0, microsecond=0)
+        offset = (hour - datetime.min) % step
+        buckets.setdefault(hour - offset, []).append(price)
+
+    rows = []
+    for bucket in sorted(buckets, reverse=True):
+        values = buckets[bucket]
+        rows.append(
+            [
+                bucket.isoformat()[:13],
+                _round(min(values), 4),
+                _round(sum(values) / len(values), 4),
+                _round(max(values), 4),
+            ]
+        )
+    # Newest first so budget trimming drops the oldest history
+    return rows
+
+
+def _trim_to_budget(tables, trim_order, budget, factory_state):
+    """Drop trailing rows, table by table in trim_order, until the estimate fits."""
+    overhead = estimate_tokens(_dumps({"context": factory_state.get("context", "")})) + 40
+    row_tokens = {
+        name: [estimate_tokens(_dumps(row)) + 1 for row in rows]
+        for name, rows in tables.items()
+    }
+    total = overhead + sum(sum(sizes) for sizes in row_tokens.values())
+    dropped = {}
+    for name in trim_order:
+        rows = tables.get(name)
+        while total > budget and rows:
+            rows.pop()
+            total -= row_tokens[name].pop()
+            dropped[name] = dropped.get(name, 0) + 1
+        if total <= budget:
+            break
+    return dropped
+
+
+def _round(value, digits=2):
+    return round(value, digits) if isinstance(value, float) else value
@@ -0,0 +1,339 @@
+# backend\src\services\telemetry.py
+
+import atexit
+import csv
+import io
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import bindparam, func, insert, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models import db, Machine, MachineTelemetry
+from src.blueprints.events import coalescer, push_machine_update
+from src.services.snapshot import get_snapshot, invalidate_snapshot
+from src.utils import metrics
+
+log = logging.getLogger(__name__)
+
+STATUSES = ("idle", "running", "maintenance")
+
+# Binary batch: packed little-endian records of
+#   machine_id u32 | ts f64 (unix seconds) | utilization f32 | energy_usage f32 | status u8
+# NaN floats and status 255 mean "not reported"; status codes index STATUSES.
+BINARY_RECORD = np.dtype(
+    [
+        ("machine_id", "<u4"),
+        ("ts", "<f8"),
+        ("utilization", "<f4"),
+        ("energy_usage", "<f4"),
+        ("status", "u1"),
+    ]
+)
+STATUS_UNSET = 255
+UPSERT_CHUNK = 5000  # rows per upsert statement, well under the bind parameter limits
+
+READINGS = metrics.registry.counter(
+    "telemetry_readings_total", "Telemetry readings by result (accepted, rejected, dropped)", ("result",)
+)
+FLUSH_SECONDS = metrics.registry.histogram("telemetry_flush_seconds", "Time to write one telemetry flush")
+FLUSH_READINGS = metrics.registry.histogram(
+    "telemetry_flush_readings", "Readings written per flush", buckets=(1, 10, 100, 1000, 5000, 10000, 50000)
+)
+
+
+class TelemetryBufferFull(Exception):
+    """The buffer is at TELEMETRY_MAX_BUFFERED; the sender should retry later."""
+
+
+def _timestamp(value):
+    """ISO string or unix seconds -> naive UTC datetime, like the rest of the schema."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    ts = datetime.fromisoformat(value)
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+def _optional_float(value):
+    return None if value is None else float(value)
+
+
+def parse_ndjson(body):
+    """One JSON object per line -> [(machine_id, ts, utilization, energy_usage, status)]."""
+    readings = []
+    for number, line in enumerate(body.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            status = item.get("status")
+            if status is not None and status not in STATUSES:
+                raise ValueError(f"unknown status {status!r}")
+            readings.append(
+                (
+                    int(item["machine_id"]),
+                    _timestamp(item["ts"]) if "ts" in item else datetime.utcnow(),
+                    _optional_float(item.get("utilization")),
+                    _optional_float(item.get("energy_usage")),
+                    status,
+                )
+            )
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"line {number}: {e}") from e
+    return readings
+
+
+def parse_binary(body):
+    """Packed BINARY_RECORD batch -> readings, decoded with one vectorized pass."""
+    if len(body) % BINARY_RECORD.itemsize:
+        raise ValueError(f"body length is not a multiple of the {BINARY_RECORD.itemsize}-byte record")
+    records = np.frombuffer(body, dtype=BINARY_RECORD)
+    if (records["status"][records["status"] != STATUS_UNSET] >= len(STATUSES)).any():
+        raise ValueError("unknown status code")
+    if not np.isfinite(records["ts"]).all():
+        raise ValueError("ts must be finite")
+    utilization = records["utilization"].astype(float)
+    energy = records["energy_usage"].astype(float)
+    return [
+        (
+            int(mid),
+            datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None),
+            None if np.isnan(util) else util,
+            None if np.isnan(kwh) else kwh,
+            None if code == STATUS_UNSET else STATUSES[code],
+        )
+        for mid, ts, util, kwh, code in zip(
+            records["machine_id"].tolist(), records["ts"].tolist(),
+            utilization.tolist(), energy.tolist(), records["status"].tolist(),
+        )
+    ]
+
+
+def write_readings(readings):
+    """
+    Write one batch in a single transaction: every reading is appended to
+    machine_telemetry, and the newest values per machine are upserted into
+    machines (skipping machines that already hold a newer reading). The changed
+    machines go out as one machine_delta event. Returns {"readings", "machines"}.
+    """
+    started = time.perf_counter()
+    latest = {}  # machine id -> newest (ts, utilization, energy_usage, status), fields merged in ts order
+    for mid, ts, utilization, energy, status in sorted(readings, key=lambda r: r[1]):
+        current = latest.get(mid, (ts, None, None, None))
+        latest[mid] = (
+            ts,
+            utilization if utilization is not None else current[1],
+            energy if energy is not None else current[2],
+            status if status is not None else current[3],
+        )
+
+    _append_history(readings)
+    changed = _upsert_latest(latest)
+    db.session.commit()
+    invalidate_snapshot()
+
+    for mid, status, utilization, energy in changed:
+        push_machine_update(mid, status=status, utilization=utilization, energy_usage=energy)
+    coalescer.flush()
+
+    FLUSH_SECONDS.observe(time.perf_counter() - started)
+    FLUSH_READINGS.observe(len(readings))
+    return {"readings": len(readings), "machines": len(changed)}
+
+
+def _upsert_latest(latest):
+    """Returns (id, status, utilization, energy_usage) of the machines that changed."""
+    rows = [
+        {
+            "id": mid,
+            "name": f"Machine {mid}",  # only used if the machine row vanished meanwhile
+            "status": status,
+            "utilization": utilization,
+            "energy_usage": energy,
+            "last_seen_at": ts,
+        }
+        for mid, (ts, utilization, energy, status) in latest.items()
+    ]
+    if not rows:
+        return []
+    insert_for = {"postgresql": pg_insert, "sqlite": sqlite_insert}.get(db.engine.dialect.name)
+    if insert_for is None:
+        return _update_latest(rows)
+
+    changed = []
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        stmt = insert_for(Machine).values(rows[start:start + UPSERT_CHUNK])
+        new = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Machine.id],
+            set_={
+                "status": func.coalesce(new.status, Machine.status),
+                "utilization": func.coalesce(new.utilization, Machine.utilization),
+                "energy_usage": func.coalesce(new.energy_usage, Machine.energy_usage),
+                "last_seen_at": new.last_seen_at,
+                "version": Machine.version + 1,
+            },
+            # Out-of-order batches must not roll a machine back to older readings
+            where=or_(Machine.last_seen_at.is_(None), Machine.last_seen_at <= new.last_seen_at),
+        ).returning(Machine.id, Machine.status, Machine.utilization, Machine.energy_usage)
+        changed += db.session.execute(stmt).all()
+    return changed
+
+
+def _update_latest(rows):
+    """Fallback for databases without INSERT ... ON CONFLICT: bulk UPDATE by primary key."""
+    machines = {m["id"]: m for m in get_snapshot().machines}
+    params = []
+    for row in rows:
+        current = machines.get(row["id"])
+        if current is None:
+            continue
+        params.append(
+            {
+                "id": row["id"],
+                "status": row["status"] or current["status"],
+                "utilization": row["utilization"] if row["utilization"] is not None else current["utilization"],
+                "energy_usage": row["energy_usage"] if row["energy_usage"] is not None else current["energy_usage"],
+                "last_seen_at": row["last_seen_at"],
+            }
+        )
+    if params:
+        db.session.execute(
+            update(Machine.__table__)
+            .where(Machine.__table__.c.id == bindparam("b_id"))
+            .values(version=Machine.__table__.c.version + 1),
+            [{"b_id": p["id"], **{k: v for k, v in p.items() if k != "id"}} for p in params],
+        )
+    return [(p["id"], p["status"], p["utilization"], p["energy_usage"]) for p in params]
+
+
+def _append_history(readings):
+    if not readings:
+        return
+    connection = db.session.connection()
+    raw = connection.connection.driver_connection
+    if connection.dialect.name == "postgresql" and hasattr(raw, "cursor"):
+        with raw.cursor() as cursor:
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for mid, ts, utilization, energy, status in readings:
+                    writer.writerow((mid, ts.isoformat(), utilization, energy, status))
+                buffer.seek(0)
+                cursor.copy_expert(
+                    "COPY machine_telemetry (machine_id, ts, utilization, energy_usage, status) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+                return
+            if hasattr(cursor, "copy"):  # psycopg 3
+                with cursor.copy(
+                    "COPY machine_telemetry (machine_id, ts, utilization, energy_usage, status) FROM STDIN"
+                ) as copy:
+                    for reading in readings:
+                        copy.write_row(reading)
+                return
+    db.session.execute(
+        insert(MachineTelemetry),
+        [
+            {"machine_id": mid, "ts": ts, "utilization": utilization, "energy_usage": energy, "status": status}
+            for mid, ts, utilization, energy, status in readings
+        ],
+    )
+
+
+class TelemetryBuffer:
+    """
+    Collects telemetry readings in memory and writes them with write_readings().
+
+    A background thread flushes every `flush_interval` seconds, or as soon as
+    `batch_size` readings are waiting. `add()` raises TelemetryBufferFull rather
+    than buffering more than `max_buffered` readings. Pending readings are flushed
+    on interpreter shutdown.
+    """
+
+    def __init__(self, flush_interval=0.5, batch_size=5000, max_buffered=200000):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+        self.app = None
+        self._readings = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one flush at a time, in arrival order
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopping = False
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config.get("TELEMETRY_FLUSH_INTERVAL", self.flush_interval)
+        self.batch_size = app.config.get("TELEMETRY_BATCH_SIZE", self.batch_size)
+        self.max_buffered = app.config.get("TELEMETRY_MAX_BUFFERED", self.max_buffered)
+        atexit.register(self.shutdown)
+
+    def add(self, readings):
+        """Queue readings; returns the number now buffered."""
+        with self._lock:
+            if len(self._readings) + len(readings) > self.max_buffered:
+                READINGS.inc(len(readings), result="dropped")
+                raise TelemetryBufferFull(f"{len(self._readings)} readings already buffered")
+            self._readings.extend(readings)
+            buffered = len(self._readings)
+        READINGS.inc(len(readings), result="accepted")
+        self._ensure_thread()
+        if buffered >= self.batch_size:
+            self._wake.set()
+        return buffered
+
+    def buffered(self):
+        return len(self._readings)
+
+    def flush(self):
+        """Write everything buffered so far on the calling thread."""
+        with self._flush_lock:
+            with self._lock:
+                readings, self._readings = self._readings, []
+            if not readings:
+                return {"readings": 0, "machines": 0}
+            with self.app.app_context():
+                try:
+                    return write_readings(readings)
+                except Exception:
+                    db.session.rollback()
+                    READINGS.inc(len(readings), result="dropped")
+                    log.exception("Telemetry flush of %d reading(s) failed", len(readings))
+                    raise
+
+    def shutdown(self):
+        self._stopping = True
+        self._wake.set()
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass  # logged by flush(); keep serving the next batches
+
+
+telemetry_buffer = TelemetryBuffer()
+metrics.registry.gauge("telemetry_buffered", "Telemetry readings waiting for the next flush").set_function(
+    telemetry_buffer.buffered
+)
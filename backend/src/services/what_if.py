@@ -0,0 +1,114 @@
+# backend\src\services\what_if.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import numpy as np
+from src.config import Config
+from src.services.sim_engine import COMPLETED, RUNNING, FactorySim
+from src.services.snapshot import get_snapshot
+
+log = logging.getLogger(__name__)
+
+_base = None
+_base_lock = threading.Lock()
+
+
+def base_simulation():
+    """FactorySim of the current snapshot, rebuilt only when the snapshot changes."""
+    global _base
+    snap = get_snapshot()
+    with _base_lock:
+        if _base is None or _base.version != snap.version:
+            _base = FactorySim.from_snapshot(snap)
+        return _base
+
+
+def evaluate_proposals(proposals, horizon_hours=None):
+    """
+    Project each proposal ({key: actions}) over the horizon on its own fork of the
+    current snapshot and compare it with doing nothing. Proposals run in parallel
+    and nothing is written to the database. Returns {key: evaluation}.
+    """
+    horizon = horizon_hours or Config.WHATIF_HORIZON_HOURS
+    base = base_simulation()
+    started = time.perf_counter()
+    baseline = _project(base.fork(Config.WHATIF_SEED), horizon)
+
+    def _evaluate(actions):
+        fork = base.fork(Config.WHATIF_SEED)  # same noise as the baseline run
+        applied = fork.apply_actions(actions)
+        return _compare(baseline, _project(fork, horizon), applied, horizon)
+
+    if len(proposals) <= 1:
+        results = {key: _evaluate(actions) for key, actions in proposals.items()}
+    else:
+        workers = min(len(proposals), Config.AGENT_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="what-if") as pool:
+            futures = {key: pool.submit(_evaluate, actions) for key, actions in proposals.items()}
+            results = {key: future.result() for key, future in futures.items()}
+
+    log.debug(
+        "Evaluated %d proposal(s) over %gh in %.1fms",
+        len(proposals), horizon, (time.perf_counter() - started) * 1000,
+    )
+    return results
+
+
+def evaluate_actions(actions, horizon_hours=None):
+    return evaluate_proposals({"proposal": actions}, horizon_hours)["proposal"]
+
+
+def _project(sim, hours):
+    dt = Config.WHATIF_TICK_MINUTES / 60
+    for _ in range(max(1, int(round(hours / dt)))):
+        sim.step(dt)
+    return {
+        "units": sim.units_produced,
+        "energy_kwh": sim.energy_kwh,
+        "energy_cost": sim.energy_cost,
+        "orders_at_risk": _orders_at_risk(sim),
+    }
+
+
+def _orders_at_risk(sim):
+    """Open orders already late, or not finishing in time at the fleet's current output rate."""
+    open_orders = sim.order_status != COMPLETED
+    if not open_orders.any():
+        return []
+    running = sim.status == RUNNING
+    rate = float((sim.utilization * running).sum()) / 100 * Config.SIM_UNITS_PER_HOUR
+    remaining = np.where(open_orders, sim.order_quantity - sim.order_produced, 0.0)
+    # Orders are in deadline order, so each one finishes after all earlier ones
+    eta_hours = np.cumsum(remaining) / rate if rate > 0 else np.full(len(remaining), np.inf)
+    return [
+        int(oid)
+        for oid, is_open, eta, deadline in zip(sim.order_ids, open_orders, eta_hours, sim.order_deadline)
+        if is_open and (eta == np.inf or sim.clock + timedelta(hours=float(eta)) > deadline)
+    ]
+
+
+def _percent_change(new, old):
+    return round((new - old) / old * 100, 2) if old else 0.0
+
+
+def _compare(baseline, projected, applied, horizon):
+    return {
+        "horizon_hours": horizon,
+        "applied_actions": applied,
+        "throughput_change_percent": _percent_change(projected["units"], baseline["units"]),
+        "energy_change_percent": _percent_change(projected["energy_kwh"], baseline["energy_kwh"]),
+        "energy_cost_delta": round(projected["energy_cost"] - baseline["energy_cost"], 4),
+        "deadline_risk": {
+            "orders_at_risk": projected["orders_at_risk"],
+            "baseline_orders_at_risk": baseline["orders_at_risk"],
+            "delta": len(projected["orders_at_risk"]) - len(baseline["orders_at_risk"]),
+        },
+        "projected": {
+            "units": round(projected["units"], 2),
+            "energy_kwh": round(projected["energy_kwh"], 3),
+            "energy_cost": round(projected["energy_cost"], 4),
+        },
+    }
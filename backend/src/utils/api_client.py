@@ -1,46 +1,116 @@
 # backend\src\utils\api_client.py
 
+import asyncio
 import json
+import logging
+import os
+import threading
+import weakref
+import httpx
 from src import Config
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from src.utils.json_stream import JsonObjectScanner
+from src.utils.prompts import build_messages
+from src.utils.stub_model import StubBackend
+from src.utils.resilience import (
+    ModelSlotTimeout,
+    ModelTransportError,
+    ModelValidationError,
+    amodel_slot,
+    classify_error,
+    get_breaker,
+    model_slot,
+)
+
+log = logging.getLogger(__name__)
 
 BASE_URL = Config.MODEL_BASE_URL
 API_KEY = Config.MODEL_API_KEY
 MODEL = Config.MODEL
+TIMEOUT = Config.MODEL_TIMEOUT
+POOL_SIZE = Config.MODEL_POOL_SIZE
+KEEPALIVE_EXPIRY = Config.MODEL_KEEPALIVE_EXPIRY
+STREAM = Config.MODEL_STREAM
 
+# Shared clients: created lazily, reused by every thread so connections stay alive.
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+# httpx async pools are bound to the event loop that opened them, so keep one per loop.
+_async_clients = weakref.WeakKeyDictionary()
 
-def query_model(prompt, agent_system_prompt):
-    SYSTEM_PROMPT = """You must respond with ONLY valid JSON, no other text.
-
-        CRITICAL RULES:
-        1. Output ONLY the JSON object, no explanations, no thinking
-        2. Use this exact ouput format:
-        {
-        "actions": [
-            {"machine_id": number, "action": "action_type", "value": number}
-        ],
-        "impact": {
-            "throughput_change_percent": number,
-            "energy_change_percent": number,
-            "notes": "Brief explanation"
-        }
-        }
-        3. If no actions needed, use empty array: "actions": []
-        4. Keep notes brief (1 sentence)
-        5. Be straiforward and concise, no extra thinking steps
-
-        IMPORTANT: Your response must start with { and end with } - no other text!"""
-    
-    SYSTEM_PROMPT = agent_system_prompt + "\n" + SYSTEM_PROMPT
-
-    messages = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": prompt},
-    ]
-
-    client = OpenAI(api_key=API_KEY, base_url=BASE_URL)
 
-    try:
+def _pool_limits():
+    return httpx.Limits(
+        max_connections=POOL_SIZE,
+        max_keepalive_connections=POOL_SIZE,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def get_client():
+    """Return the process-wide OpenAI client, creating it on first use."""
+    global _client, _client_pid
+    # A forked worker (e.g. gunicorn --preload) must not share the parent's sockets
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = OpenAI(
+                    api_key=API_KEY,
+                    base_url=BASE_URL,
+                    timeout=TIMEOUT,
+                    max_retries=0,  # retries are handled by run_agent's policy
+                    http_client=httpx.Client(limits=_pool_limits(), timeout=TIMEOUT),
+                )
+                _client_pid = os.getpid()
+    return _client
+
+
+def get_async_client():
+    """Return the AsyncOpenAI client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=API_KEY,
+            base_url=BASE_URL,
+            timeout=TIMEOUT,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_pool_limits(), timeout=TIMEOUT),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def reset_client():
+    """Close the shared sync client so the next call builds a fresh one."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def _build_messages(prompt, agent_system_prompt):
+    # Static rules and role first, the per-call prompt last (utils/prompts.py)
+    return build_messages(prompt, agent_system_prompt)
+
+
+class OpenAIBackend:
+    """The OpenAI-compatible HTTP endpoint at MODEL_BASE_URL (Scnet by default)."""
+
+    name = "openai"
+    model = MODEL
+
+    @classmethod
+    def from_config(cls):
+        return cls()
+
+    def complete(self, messages, validate=None, on_action=None):
+        client = get_client()
+        if STREAM:
+            return _stream_completion(client, messages, validate, on_action)
         response = client.chat.completions.create(
             model=MODEL,
             messages=messages,
@@ -48,35 +118,166 @@ def query_model(prompt, agent_system_prompt):
             temperature=0.1,  # Very low temperature for consistent formatting
             stream=False,
         )
+        return response.choices[0].message.content
+
+    async def acomplete(self, messages, validate=None, on_action=None):
+        client = get_async_client()
+        if STREAM:
+            return await _astream_completion(client, messages, validate, on_action)
+        response = await client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            temperature=0.1,
+            stream=False,
+        )
+        return response.choices[0].message.content
+
+
+# MODEL_BACKEND selects one of these; each returns the raw completion text (or an
+# already parsed dict) from complete()/acomplete() and raises on failure.
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "stub": StubBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_cls = BACKENDS.get(Config.MODEL_BACKEND)
+                if backend_cls is None:
+                    raise ValueError(f"Unknown MODEL_BACKEND {Config.MODEL_BACKEND!r}")
+                _backend = backend_cls.from_config()
+    return _backend
 
-        result = response.choices[0].message.content.strip() # Remoeve leading/trailing whitespace
 
-        # JSON extraction
-        cleaned_result = extract_json(response_text=result)
+def set_backend(backend):
+    """Swap the model backend (e.g. a StubBackend with custom latency in benchmarks)."""
+    global _backend
+    _backend = backend
 
-        if not cleaned_result:
-            return {
-                "actions": [],
-                "impact": {
-                    "throughput_change_percent": 0,
-                    "energy_change_percent": 0,
-                    "notes": "No valid JSON found in response",
-                },
-            }
 
-        parsed_data = json.loads(cleaned_result)
-        return parsed_data
+def query_model(prompt, agent_system_prompt, validate=None, on_action=None):
+    """
+    Query the model and return the parsed JSON decision.
 
+    With MODEL_STREAM enabled the completion is streamed and read only until the
+    first top-level JSON object closes and passes `validate`; `on_action` receives
+    each action as soon as it has been generated.
+
+    Failures raise classified errors from utils/resilience.py (transport, rate limit,
+    validation, circuit open) so the caller can decide whether and how to retry.
+    """
+    messages = _build_messages(prompt, agent_system_prompt)
+    backend = get_backend()
+    breaker = get_breaker(backend.model)
+    trial = breaker.before_call()
+
+    try:
+        with model_slot():
+            content = backend.complete(messages, validate, on_action)
     except Exception as e:
-        print(f"API call error: {e}")
-        return {
-            "actions": [],
-            "impact": {
-                "throughput_change_percent": 0,
-                "energy_change_percent": 0,
-                "notes": f"API error: {str(e)}",
-            },
-        }
+        raise _record_failure(breaker, e, trial) from e
+    except BaseException:
+        if trial:
+            breaker.release_trial()
+        raise
+
+    breaker.record_success()
+    return _parse_content(content)
+
+
+async def aquery_model(prompt, agent_system_prompt, validate=None, on_action=None):
+    """Async variant of query_model; concurrent callers share one connection pool."""
+    messages = _build_messages(prompt, agent_system_prompt)
+    backend = get_backend()
+    breaker = get_breaker(backend.model)
+    trial = breaker.before_call()
+
+    try:
+        async with amodel_slot():
+            content = await backend.acomplete(messages, validate, on_action)
+    except Exception as e:
+        raise _record_failure(breaker, e, trial) from e
+    except BaseException:
+        # Cancelled (asyncio.CancelledError): no verdict on upstream, but free the trial
+        if trial:
+            breaker.release_trial()
+        raise
+
+    breaker.record_success()
+    return _parse_content(content)
+
+
+def _record_failure(breaker, exc, trial=False):
+    error = classify_error(exc)
+    log.debug("API call error (%s): %s", error.kind, exc)
+    if isinstance(error, ModelSlotTimeout):
+        # Upstream was never called: nothing to learn about it
+        if trial:
+            breaker.release_trial()
+    elif isinstance(error, ModelTransportError):
+        breaker.record_failure()
+    else:
+        # Upstream answered (rate limit, 4xx): it is up, so don't trip the breaker,
+        # but release a half-open trial
+        breaker.record_success()
+    return error
+
+
+def _stream_completion(client, messages, validate, on_action):
+    """Returns the decision dict if one was found early, otherwise the full text."""
+    scanner = JsonObjectScanner(validate=validate, on_action=on_action)
+    stream = client.chat.completions.create(
+        model=MODEL, messages=messages, temperature=0.1, stream=True
+    )
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if scanner.feed(chunk.choices[0].delta.content):
+                    break
+    finally:
+        # Closing the response early stops reading (and generating) the rest
+        stream.close()
+    return scanner.result if scanner.result is not None else scanner.text
+
+
+async def _astream_completion(client, messages, validate, on_action):
+    scanner = JsonObjectScanner(validate=validate, on_action=on_action)
+    stream = await client.chat.completions.create(
+        model=MODEL, messages=messages, temperature=0.1, stream=True
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if scanner.feed(chunk.choices[0].delta.content):
+                    break
+    finally:
+        await stream.close()
+    return scanner.result if scanner.result is not None else scanner.text
+
+
+def _parse_content(content):
+    if isinstance(content, dict):
+        return content  # already parsed while streaming
+
+    result = (content or "").strip()  # Remoeve leading/trailing whitespace
+
+    # JSON extraction
+    cleaned_result = extract_json(response_text=result)
+
+    if not cleaned_result:
+        raise ModelValidationError("No valid JSON found in response", raw=result)
+
+    try:
+        return json.loads(cleaned_result)
+    except ValueError as e:
+        raise ModelValidationError(f"Response is not valid JSON: {e}", raw=result) from e
 
 
 def extract_json(response_text):
@@ -91,5 +292,5 @@ def extract_json(response_text):
         return response_text
 
     except json.JSONDecodeError as e:
-        print(f"JSON decoding error: {e}")
+        log.warning("JSON decoding error: %s", e)
         return (f"JSON decoding error: {e}", None)
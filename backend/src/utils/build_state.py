@@ -1,38 +1,13 @@
 # backend\src\utils\build_prompt.py
 
-from src.models import Machine, Order, EnergyPrice
+from src.services.snapshot import get_snapshot
 
-def build_factory_state():
-    machines = [
-        {
-            "id": m.id,
-            "name": m.name,
-            "status": m.status,
-            "utilization": m.utilization,
-            "energy_usage": m.energy_usage,
-        }
-        for m in Machine.query.all()
-    ]
-
-    orders = [
-        {
-            "id": o.id,
-            "customer": o.customer,
-            "quantity": o.quantity,
-            "deadline": o.deadline.isoformat(),
-            "status": o.status,
-        }
-        for o in Order.query.all()
-    ]
-
-    prices = [
-        {"timestamp": e.timestamp.isoformat(), "price_per_kwh": e.price_per_kwh}
-        for e in EnergyPrice.query.all()
-    ]
 
+def build_factory_state():
+    snap = get_snapshot()
     return {
-        "machines": machines,
-        "orders": orders,
-        "energy_prices": prices,
+        "machines": snap.machines,
+        "orders": snap.orders,
+        "energy_prices": snap.energy_prices,
         "context": "Optimization run",
     }
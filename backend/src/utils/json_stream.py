@@ -0,0 +1,138 @@
+# backend\src\utils\json_stream.py
+
+import json
+
+
+class JsonObjectScanner:
+    """
+    Find the first complete top-level JSON object in text that arrives in pieces.
+
+    Anything before the object is ignored: reasoning preambles, `<think>...</think>`
+    blocks and ```json fences. Feed chunks with `feed()`; it returns True once an
+    object has closed, parsed and passed `validate`, and `result` holds it. Objects
+    that close but don't parse or validate (e.g. braces in prose) are skipped and
+    scanning continues after them. `on_action` is called with each element of the
+    top-level "actions" array as soon as that element closes.
+    """
+
+    def __init__(self, validate=None, on_action=None):
+        self.validate = validate
+        self.on_action = on_action
+        self.text = ""
+        self.result = None
+        self._pos = 0  # next character to scan
+        self._start = None  # index of the top-level "{"
+        self._stack = []  # open containers: "{" or "["
+        self._in_string = False
+        self._escape = False
+        self._last_key = None  # last string seen directly inside the top-level object
+        self._string_start = None
+        self._actions_depth = None  # stack depth of the top-level "actions" array
+        self._item_start = None
+
+    def feed(self, chunk):
+        if self.result is not None:
+            return True
+        self.text += chunk
+        if self._start is None and not self._find_start():
+            return False
+        return self._scan()
+
+    def _find_start(self):
+        text = self.text
+        begin = self._pos
+        think = text.find("<think>", begin)
+        if think != -1:
+            end = text.find("</think>", think)
+            if end == -1:
+                return False  # still reasoning; wait for the closing tag
+            begin = end + len("</think>")
+        brace = text.find("{", begin)
+        if brace == -1:
+            # Keep a little tail in case "<think>" is split across chunks
+            self._pos = max(begin, len(text) - len("<think>"))
+            return False
+        self._start = brace
+        self._pos = brace
+        return True
+
+    def _reset_after(self, index):
+        self._start = None
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._last_key = None
+        self._actions_depth = None
+        self._item_start = None
+        self._pos = index + 1
+
+    def _scan(self):
+        text = self.text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_key = text[self._string_start + 1 : i]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._stack.append(ch)
+                depth = len(self._stack)
+                if ch == "[" and depth == 2 and self._last_key == "actions":
+                    self._actions_depth = depth
+                elif depth == (self._actions_depth or -1) + 1:
+                    self._item_start = i
+            elif ch in "}]":
+                if not self._stack:
+                    i += 1
+                    continue
+                self._stack.pop()
+                depth = len(self._stack)
+                if self._actions_depth is not None and depth == self._actions_depth and self._item_start is not None:
+                    self._emit_action(text[self._item_start : i + 1])
+                    self._item_start = None
+                elif ch == "]" and depth + 1 == self._actions_depth:
+                    self._actions_depth = None
+                if depth == 0:
+                    if self._complete(text[self._start : i + 1]):
+                        self._pos = i + 1
+                        return True
+                    # Not the answer (prose braces, or an invalid object): keep looking
+                    self._reset_after(self._start)
+                    if not self._find_start():
+                        return False
+                    i = self._pos
+                    continue
+            i += 1
+        self._pos = i
+        return False
+
+    def _complete(self, candidate):
+        try:
+            obj = json.loads(candidate)
+        except ValueError:
+            return False
+        if not isinstance(obj, dict):
+            return False
+        if self.validate is not None and not self.validate(obj):
+            return False
+        self.result = obj
+        return True
+
+    def _emit_action(self, candidate):
+        if self.on_action is None:
+            return
+        try:
+            action = json.loads(candidate)
+        except ValueError:
+            return
+        if isinstance(action, dict):
+            self.on_action(action)
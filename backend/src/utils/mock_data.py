@@ -1,4 +1,6 @@
-from src.models import db, Machine, Order, EnergyPrice
+from src.models import db, Machine, Order, EnergyPrice, EnergyPriceRollup
+from src.services.energy_series import rebuild_rollups
+from src.services.snapshot import invalidate_snapshot
 from datetime import datetime, timedelta
 
 
@@ -12,6 +14,7 @@ def seed_data(app, drop_first=False):
     Machine.query.delete()
     Order.query.delete()
     EnergyPrice.query.delete()
+    EnergyPriceRollup.query.delete()
 
     machines = [
         Machine(
@@ -54,4 +57,6 @@ def seed_data(app, drop_first=False):
         )
 
     db.session.commit()
+    rebuild_rollups()
+    invalidate_snapshot()
     print("✅ Dummy data seeded.")
@@ -0,0 +1,80 @@
+# backend\src\utils\pagination.py
+
+import base64
+import hashlib
+import json
+from datetime import datetime, timezone
+from flask import abort, jsonify, request
+from sqlalchemy import tuple_
+from src.config import Config
+
+
+def encode_cursor(values):
+    """Opaque cursor for the last row of a page: its sort key values."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, types):
+    """Decode a cursor back into sort key values, converting with `types`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return [
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(values, types, strict=True)
+        ]
+    except (ValueError, TypeError):
+        abort(400, description="Invalid cursor")
+
+
+def parse_limit(default=None):
+    default = default or Config.API_PAGE_SIZE
+    try:
+        limit = int(request.args.get("limit", default))
+    except ValueError:
+        abort(400, description="limit must be an integer")
+    return max(1, min(limit, Config.API_MAX_PAGE_SIZE))
+
+
+def parse_datetime_arg(name):
+    """ISO 8601 query argument as naive UTC, like the stored timestamps; None when absent."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, description=f"{name} must be an ISO 8601 timestamp")
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+def keyset_page(query, columns, descending, limit, types):
+    """
+    Apply keyset pagination to a select() ordered by `columns` (last one unique).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = decode_cursor(cursor, types)
+        key = tuple_(*columns)
+        query = query.where(key < tuple_(*after) if descending else key > tuple_(*after))
+    order = [c.desc() for c in columns] if descending else list(columns)
+    rows = query.order_by(*order).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], c.key) for c in columns])
+    return rows, next_cursor
+
+
+def page_response(items, next_cursor=None):
+    """
+    JSON list response with an ETag over its content. Conditional requests whose
+    If-None-Match matches get an empty 304; the next page cursor goes in X-Next-Cursor.
+    """
+    response = jsonify(items)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    return response.make_conditional(request)
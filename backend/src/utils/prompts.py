@@ -0,0 +1,112 @@
+# backend\src\utils\prompts.py
+
+from functools import lru_cache
+from src.config import Config
+from src.services.decision_cache import canonical_json
+from src.services.state_compaction import estimate_tokens
+
+# Layout of every model request, most static first so provider-side prefix (KV)
+# caches can reuse as much as possible:
+#   1. system: RULES (identical for all agents) + the agent's role
+#   2. optional few-shot user/assistant pairs (PROMPT_FEW_SHOT), serialized once
+#   3. user: "<Agent>: Analyze factory state." + the state as canonical JSON
+# Everything before the state is byte-identical between calls for an agent.
+
+RULES = """You must respond with ONLY valid JSON, no other text.
+
+CRITICAL RULES:
+1. Output ONLY the JSON object, no explanations, no thinking
+2. Use this exact ouput format:
+{
+"actions": [
+    {"machine_id": number, "action": "action_type", "value": number}
+],
+"impact": {
+    "throughput_change_percent": number,
+    "energy_change_percent": number,
+    "notes": "Brief explanation"
+}
+}
+3. If no actions needed, use empty array: "actions": []
+4. Keep notes brief (1 sentence)
+5. Be straiforward and concise, no extra thinking steps
+
+IMPORTANT: Your response must start with { and end with } - no other text!"""
+
+# (state, decision) pairs shown before the real request when PROMPT_FEW_SHOT is on
+FEW_SHOT_EXAMPLES = [
+    (
+        {
+            "machines": {
+                "cols": ["id", "name", "status", "utilization", "energy_usage"],
+                "rows": [[1, "Press", "running", 96.0, 14.2], [2, "Lathe", "idle", 20.0, 3.1]],
+            },
+            "orders": {"cols": ["id", "customer", "quantity", "deadline", "status"], "rows": []},
+        },
+        {
+            "actions": [{"machine_id": 1, "action": "reduce_speed", "value": 10}],
+            "impact": {
+                "throughput_change_percent": -5,
+                "energy_change_percent": -8,
+                "notes": "Press is near its limit with no open orders, so slow it down.",
+            },
+        },
+    ),
+    (
+        {
+            "machines": {
+                "cols": ["id", "name", "status", "utilization", "energy_usage"],
+                "rows": [[3, "Printer", "running", 55.0, 6.0]],
+            },
+            "orders": {"cols": ["id", "customer", "quantity", "deadline", "status"], "rows": []},
+        },
+        {
+            "actions": [],
+            "impact": {"throughput_change_percent": 0, "energy_change_percent": 0, "notes": "No action needed."},
+        },
+    ),
+]
+
+
+def state_prompt(agent_name, factory_state):
+    """The per-call user message: agent name, then the state in canonical form."""
+    return f"{agent_name}: Analyze factory state.\n{canonical_json(factory_state)}\n"
+
+
+FEW_SHOT_MESSAGES = tuple(
+    message
+    for state, decision in FEW_SHOT_EXAMPLES
+    for message in (
+        {"role": "user", "content": state_prompt("ExampleAgent", state)},
+        {"role": "assistant", "content": canonical_json(decision)},
+    )
+)
+FEW_SHOT_TOKENS = sum(estimate_tokens(m["content"]) for m in FEW_SHOT_MESSAGES)
+
+
+@lru_cache(maxsize=64)
+def system_prompt(agent_role):
+    """Shared rules first, then the agent's role; built once per role."""
+    return f"{RULES}\n\n{agent_role}" if agent_role else RULES
+
+
+@lru_cache(maxsize=64)
+def static_tokens(agent_role):
+    tokens = estimate_tokens(system_prompt(agent_role))
+    return tokens + FEW_SHOT_TOKENS if Config.PROMPT_FEW_SHOT else tokens
+
+
+def build_messages(prompt, agent_role):
+    """Chat messages for one request: the cached static prefix, then `prompt`."""
+    messages = [{"role": "system", "content": system_prompt(agent_role)}]
+    if Config.PROMPT_FEW_SHOT:
+        messages.extend(dict(m) for m in FEW_SHOT_MESSAGES)
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def prompt_tokens(prompt, agent_role):
+    """Estimated input tokens split into the cacheable prefix and the per-call part."""
+    static = static_tokens(agent_role)
+    dynamic = estimate_tokens(prompt)
+    return {"static": static, "dynamic": dynamic, "total": static + dynamic}
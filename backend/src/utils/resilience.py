@@ -0,0 +1,187 @@
+# backend\src\utils\resilience.py
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+import httpx
+import openai
+from src.config import Config
+
+log = logging.getLogger(__name__)
+
+
+class ModelError(Exception):
+    """Base class for classified model call failures."""
+
+    kind = "fatal"
+
+
+class ModelTransportError(ModelError):
+    """Connection problems, timeouts and 5xx responses: worth retrying."""
+
+    kind = "transport"
+
+
+class ModelRateLimitError(ModelError):
+    kind = "rate_limit"
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ModelSlotTimeout(ModelRateLimitError):
+    """No local concurrency slot (MODEL_MAX_CONCURRENCY) freed up in time; upstream was never called."""
+
+
+class ModelValidationError(ModelError):
+    """The model answered, but not with a usable decision."""
+
+    kind = "validation"
+
+    def __init__(self, message, raw=None):
+        super().__init__(message)
+        self.raw = raw
+
+
+class CircuitOpenError(ModelError):
+    """Upstream is considered down; fail fast without calling it."""
+
+    kind = "circuit_open"
+
+
+def classify_error(exc):
+    """Map an exception from the OpenAI SDK / parsing into a ModelError."""
+    if isinstance(exc, ModelError):
+        return exc
+    if isinstance(exc, openai.RateLimitError):
+        retry_after = None
+        try:
+            retry_after = float(exc.response.headers.get("retry-after"))
+        except (AttributeError, TypeError, ValueError):
+            pass
+        return ModelRateLimitError(str(exc), retry_after=retry_after)
+    if isinstance(
+        exc,
+        (openai.APIConnectionError, openai.InternalServerError, httpx.TransportError),
+    ):
+        return ModelTransportError(str(exc))
+    if isinstance(exc, openai.APIStatusError):
+        if exc.status_code >= 500:
+            return ModelTransportError(str(exc))
+        return ModelError(str(exc))  # auth, bad request, ...: retrying won't help
+    if isinstance(exc, (ValueError, KeyError, TypeError, json.JSONDecodeError)):
+        return ModelValidationError(str(exc))
+    return ModelError(str(exc))
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff for the given (1-based) attempt."""
+    if retry_after is not None:
+        return min(Config.MODEL_BACKOFF_CAP, retry_after)
+    ceiling = min(Config.MODEL_BACKOFF_CAP, Config.MODEL_BACKOFF_BASE * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+def repair_prompt(prompt, error):
+    """Append the validation error so the model can correct its last answer."""
+    return (
+        f"{prompt}\nYour previous response was rejected: {error}\n"
+        "Respond again with ONLY the JSON object in the required format.\n"
+    )
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures, rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raises CircuitOpenError, or returns True when this call is the half-open trial."""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"circuit for {self.name} is open")
+                self.state = "half_open"
+                return True
+            elif self.state == "half_open":
+                # A trial call is already in flight
+                raise CircuitOpenError(f"circuit for {self.name} is half-open")
+            return False
+
+    def release_trial(self):
+        """The trial call ended without reaching upstream (cancelled, no local slot): let the next call try."""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    log.warning("Circuit for %s opened after %d failure(s)", self.name, self.failures)
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model):
+    with _breakers_lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                model, Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_RESET_SECONDS
+            )
+            _breakers[model] = breaker
+        return breaker
+
+
+# Process-wide cap on in-flight model calls, shared by threads and event loops
+_model_slots = threading.BoundedSemaphore(Config.MODEL_MAX_CONCURRENCY)
+
+
+@contextmanager
+def model_slot():
+    if not _model_slots.acquire(timeout=Config.MODEL_TIMEOUT):
+        raise ModelSlotTimeout("timed out waiting for a model concurrency slot")
+    try:
+        yield
+    finally:
+        _model_slots.release()
+
+
+@asynccontextmanager
+async def amodel_slot():
+    deadline = time.monotonic() + Config.MODEL_TIMEOUT
+    # Never block the event loop on the semaphore; poll instead
+    while not _model_slots.acquire(blocking=False):
+        if time.monotonic() > deadline:
+            raise ModelSlotTimeout("timed out waiting for a model concurrency slot")
+        await asyncio.sleep(0.01)
+    try:
+        yield
+    finally:
+        _model_slots.release()
@@ -0,0 +1,234 @@
+# backend\src\utils\stub_model.py
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from src.config import Config
+from src.utils.json_stream import JsonObjectScanner
+from src.utils.resilience import ModelRateLimitError, ModelTransportError
+
+# Agent name at the start of the user prompt ("ProductionAgent: Analyze ...")
+_AGENT_RE = re.compile(r"^\s*(\w+Agent)\b")
+
+
+class StubBackend:
+    """
+    Offline, deterministic stand-in for the model: one small rule-based policy per
+    agent in AGENT_PROMPTS, reading the same factory state the real model gets.
+
+    The same state always yields the same decision. Latency and failures are
+    injected from a seeded RNG, so a benchmark run is repeatable:
+      - latency_ms +/- jitter_ms is slept per call
+      - failure_rate of calls raise a transport error (a tenth of them a rate limit)
+      - invalid_rate of calls answer with prose instead of JSON
+    """
+
+    name = "stub"
+    model = "stub"
+
+    def __init__(self, latency_ms=0, jitter_ms=0, failure_rate=0.0, invalid_rate=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.invalid_rate = invalid_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            latency_ms=Config.STUB_LATENCY_MS,
+            jitter_ms=Config.STUB_JITTER_MS,
+            failure_rate=Config.STUB_FAILURE_RATE,
+            invalid_rate=Config.STUB_INVALID_RATE,
+            seed=Config.STUB_SEED,
+        )
+
+    def complete(self, messages, validate=None, on_action=None):
+        delay, outcome = self._draw()
+        time.sleep(delay)
+        return self._respond(messages, outcome, validate, on_action)
+
+    async def acomplete(self, messages, validate=None, on_action=None):
+        delay, outcome = self._draw()
+        await asyncio.sleep(delay)
+        return self._respond(messages, outcome, validate, on_action)
+
+    def _respond(self, messages, outcome, validate, on_action):
+        text = self._answer(messages, outcome)
+        if not Config.MODEL_STREAM:
+            return text
+        # Go through the same incremental scanner as a streamed completion so
+        # decision_partial events and early validation behave as in production
+        scanner = JsonObjectScanner(validate=validate, on_action=on_action)
+        scanner.feed(text)
+        return scanner.result if scanner.result is not None else scanner.text
+
+    def _draw(self):
+        with self._rng_lock:
+            self.calls += 1
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+            roll = self._rng.random()
+        delay = max(0.0, self.latency_ms + jitter) / 1000
+        if roll < self.failure_rate / 10:
+            outcome = "rate_limit"
+        elif roll < self.failure_rate:
+            outcome = "transport"
+        elif roll < self.failure_rate + self.invalid_rate:
+            outcome = "invalid"
+        else:
+            outcome = "ok"
+        return delay, outcome
+
+    def _answer(self, messages, outcome):
+        if outcome == "rate_limit":
+            raise ModelRateLimitError("stub: injected rate limit", retry_after=0)
+        if outcome == "transport":
+            raise ModelTransportError("stub: injected transport error")
+        if outcome == "invalid":
+            return "I think the factory looks fine overall."
+
+        prompt = messages[-1]["content"]
+        match = _AGENT_RE.match(prompt)
+        agent = match.group(1) if match else ""
+        state = _parse_state(prompt)
+        policy = POLICIES.get(agent, _no_action)
+        actions, notes = policy(state)
+        if not actions:
+            notes = "No action needed."
+        decision = {
+            "actions": actions,
+            "impact": {
+                "throughput_change_percent": round(
+                    sum(_SPEED_SIGN.get(a["action"], 0) * a["value"] for a in actions)
+                    / max(1, len(state["machines"])),
+                    1,
+                ),
+                "energy_change_percent": -5 * sum(
+                    1 for a in actions if a["action"] in ("reduce_speed", "schedule_maintenance")
+                ),
+                "notes": notes,
+            },
+        }
+        return json.dumps(decision)
+
+
+_SPEED_SIGN = {"increase_speed": 1, "reduce_speed": -1}
+
+
+def _parse_state(prompt):
+    """Factory state from the prompt, in either the raw or the compacted tabular form."""
+    start = prompt.find("{")
+    try:
+        state, _ = json.JSONDecoder().raw_decode(prompt[start:]) if start >= 0 else ({}, 0)
+    except ValueError:
+        state = {}
+    return {
+        "machines": _records(state.get("machines")),
+        "orders": _records(state.get("orders")),
+        "energy_prices": _records(state.get("energy_prices")),
+    }
+
+
+def _records(table):
+    if isinstance(table, dict) and "cols" in table:
+        return [dict(zip(table["cols"], row)) for row in table.get("rows", [])]
+    return table if isinstance(table, list) else []
+
+
+def _latest_and_mean_price(prices):
+    points = [
+        (p.get("timestamp") or p.get("hour") or "", p.get("price_per_kwh", p.get("avg")))
+        for p in prices
+    ]
+    points = [(ts, price) for ts, price in points if price is not None]
+    if not points:
+        return None, None
+    latest = max(points)[1]
+    return latest, sum(price for _, price in points) / len(points)
+
+
+def _running(machines):
+    return sorted(
+        (m for m in machines if m.get("status") == "running"), key=lambda m: m.get("id") or 0
+    )
+
+
+def _open_orders(orders):
+    return sorted(
+        (o for o in orders if o.get("status") != "completed"),
+        key=lambda o: (str(o.get("deadline")), o.get("id") or 0),
+    )
+
+
+def _production(state):
+    actions = []
+    for m in _running(state["machines"]):
+        if (m.get("utilization") or 0) < 50:
+            actions.append({"machine_id": m["id"], "action": "increase_speed", "value": 10})
+        elif (m.get("utilization") or 0) > 90:
+            actions.append({"machine_id": m["id"], "action": "reduce_speed", "value": 10})
+    idle = [m for m in state["machines"] if m.get("status") == "idle"]
+    if idle and _open_orders(state["orders"]):
+        actions.append({"machine_id": idle[0]["id"], "action": "reassign_job", "value": 0})
+    return actions, "Balance load across running machines and put idle capacity on the next order."
+
+
+def _energy(state):
+    latest, mean = _latest_and_mean_price(state["energy_prices"])
+    if latest is None or latest < mean * Config.ENERGY_PEAK_FACTOR:
+        return [], "Energy price is not at a peak; no change."
+    running = sorted(
+        _running(state["machines"]), key=lambda m: -(m.get("energy_usage") or 0)
+    )
+    actions = [
+        {"machine_id": m["id"], "action": "reduce_speed", "value": 15} for m in running[:2]
+    ]
+    return actions, "Peak energy price: slow the most power-hungry machines."
+
+
+def _quality(state):
+    actions = [
+        {"machine_id": m["id"], "action": "reduce_speed", "value": 5}
+        for m in _running(state["machines"])
+        if (m.get("utilization") or 0) > 85
+    ]
+    return actions, "Ease off machines running near capacity to protect quality."
+
+
+def _maintenance(state):
+    actions = [
+        {"machine_id": m["id"], "action": "schedule_maintenance", "value": 0}
+        for m in _running(state["machines"])
+        if (m.get("utilization") or 0) >= 95
+    ]
+    return actions, "Schedule maintenance for machines at sustained full load."
+
+
+def _supply_chain(state):
+    orders = _open_orders(state["orders"])
+    candidates = [m for m in state["machines"] if m.get("status") in ("idle", "running")]
+    if not orders or not candidates:
+        return [], "No open orders to reallocate."
+    target = min(candidates, key=lambda m: (m.get("utilization") or 0, m.get("id") or 0))
+    return (
+        [{"machine_id": target["id"], "action": "reassign_job", "value": orders[0].get("id")}],
+        "Move the most urgent order to the least loaded machine.",
+    )
+
+
+def _no_action(state):
+    return [], "No rule for this agent."
+
+
+POLICIES = {
+    "ProductionAgent": _production,
+    "EnergyAgent": _energy,
+    "QualityAgent": _quality,
+    "MaintenanceAgent": _maintenance,
+    "SupplyChainAgent": _supply_chain,
+}
@@ -0,0 +1,32 @@
+# backend\tests\conftest.py
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Config reads the environment on import, so set it before anything imports src
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="intellifactory-tests-"), "test.db")
+os.environ.setdefault("MODEL_BACKEND", "stub")
+os.environ.setdefault("DECISION_CACHE_BACKEND", "off")
+os.environ.setdefault("DECISION_WRITE_MODE", "sync")
+os.environ.setdefault("EVENT_BUS", "memory")
+os.environ.setdefault("SCHEDULER", "off")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import app as flask_app  # noqa: E402
+from src.utils.mock_data import seed_data  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """The app with a freshly seeded database, inside an app context."""
+    with flask_app.app_context():
+        seed_data(flask_app, drop_first=True)
+        yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
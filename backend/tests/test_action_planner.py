@@ -0,0 +1,111 @@
+# backend\tests\test_action_planner.py
+
+import pytest
+
+from src.models import db, AgentAction, AgentDecision, Machine
+from src.services.action_planner import PLANNER_NAME, apply_merged, merge_actions
+
+# Seeded machines: 1 running at 75.3, 2 idle at 30, 3 running at 60, 4 in maintenance
+
+
+def act(machine_id, action, value=0):
+    return {"machine_id": machine_id, "action": action, "value": value}
+
+
+def outcomes(rationale):
+    return [(r["agent"], r["action"], r["outcome"]) for r in rationale]
+
+
+def test_priority_keeps_highest_ranked_agents_change(app):
+    plan, rationale = merge_actions(
+        [("ProductionAgent", [act(3, "increase_speed", 20)]), ("EnergyAgent", [act(3, "reduce_speed", 10)])],
+        "priority",
+    )
+
+    assert plan == [{"machine_id": 3, "action": "reduce_speed", "value": 10.0, "agents": ["EnergyAgent"]}]
+    assert sorted(outcomes(rationale)) == [
+        ("EnergyAgent", "reduce_speed", "kept"),
+        ("ProductionAgent", "increase_speed", "dropped"),
+    ]
+
+
+def test_weighted_takes_weighted_mean(app):
+    plan, _ = merge_actions(
+        [("ProductionAgent", [act(3, "increase_speed", 20)]), ("EnergyAgent", [act(3, "reduce_speed", 10)])],
+        "weighted",
+    )
+
+    # (1 * 20 + 1.5 * -10) / 2.5
+    assert plan == [
+        {"machine_id": 3, "action": "increase_speed", "value": 2.0, "agents": ["EnergyAgent", "ProductionAgent"]}
+    ]
+
+
+def test_maintenance_supersedes_speed_and_reassignment(app):
+    plan, rationale = merge_actions(
+        [
+            ("ProductionAgent", [act(1, "increase_speed", 5), act(1, "reassign_job", 2)]),
+            ("MaintenanceAgent", [act(1, "schedule_maintenance")]),
+            ("QualityAgent", [act(1, "schedule_maintenance")]),
+        ],
+        "priority",
+    )
+
+    assert plan == [
+        {"machine_id": 1, "action": "schedule_maintenance", "value": 0, "agents": ["MaintenanceAgent", "QualityAgent"]}
+    ]
+    assert sorted(outcomes(rationale)) == [
+        ("MaintenanceAgent", "schedule_maintenance", "kept"),
+        ("ProductionAgent", "increase_speed", "dropped"),
+        ("ProductionAgent", "reassign_job", "dropped"),
+        ("QualityAgent", "schedule_maintenance", "merged"),
+    ]
+
+
+def test_clamped_and_unknown_actions(app):
+    plan, rationale = merge_actions(
+        [
+            ("ProductionAgent", [act(1, "increase_speed", 50), act(2, "reduce_speed", 10), act(2, "increase_speed", 10)]),
+            ("EnergyAgent", [act(4, "schedule_maintenance"), act(99, "reduce_speed", 5), act(3, "shutdown")]),
+        ],
+        "priority",
+    )
+
+    assert plan == [{"machine_id": 1, "action": "increase_speed", "value": 24.7, "agents": ["ProductionAgent"]}]
+    reasons = {(r["machine_id"], r["action"]): r["reason"] for r in rationale if r["outcome"] == "dropped"}
+    assert reasons == {
+        (2, "reduce_speed"): "no-op: the agent's own changes cancel out",
+        (2, "increase_speed"): "no-op: the agent's own changes cancel out",
+        (4, "schedule_maintenance"): "already in maintenance",
+        (99, "reduce_speed"): "unknown machine",
+        (3, "shutdown"): "unknown action",
+    }
+
+
+def test_reassignments_merge_only_for_the_same_order(app):
+    plan, rationale = merge_actions(
+        [
+            ("SupplyChainAgent", [act(2, "reassign_job", 2), act(2, "reassign_job", 5)]),
+            ("ProductionAgent", [act("2", "reassign_job", "2.0")]),
+        ],
+        "priority",
+    )
+
+    assert [(p["action"], p["value"], p["agents"]) for p in plan] == [
+        ("reassign_job", 2, ["ProductionAgent", "SupplyChainAgent"]),
+        ("reassign_job", 5, ["SupplyChainAgent"]),
+    ]
+    assert [r["outcome"] for r in rationale] == ["kept", "merged", "kept"]
+
+
+def test_apply_merged_records_each_action_once(app):
+    plan, _, updates = apply_merged(
+        [("EnergyAgent", [act(3, "reduce_speed", 10)]), ("ProductionAgent", [act(3, "increase_speed", 5)])],
+        "priority",
+    )
+
+    assert [u["new_utilization"] for u in updates] == [pytest.approx(50.0)]
+    assert db.session.get(Machine, 3).utilization == pytest.approx(50.0)
+    stored = AgentDecision.query.filter_by(agent_name=PLANNER_NAME).one()
+    assert stored.decision["actions"] == plan
+    assert AgentAction.query.filter_by(agent_name=PLANNER_NAME).count() == 0
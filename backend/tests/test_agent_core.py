@@ -0,0 +1,50 @@
+# backend\tests\test_agent_core.py
+
+import pytest
+
+from src.models import AgentAction, AgentDecision
+from src.services import agent_core, decision_cache
+from src.services.decision_cache import DecisionCache, MemoryBackend
+from src.utils.build_state import build_factory_state
+
+
+@pytest.fixture
+def events(monkeypatch):
+    sent = []
+    monkeypatch.setattr(agent_core, "push_event", lambda event_type, data: sent.append((event_type, data)))
+    return sent
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = DecisionCache(MemoryBackend(64, 300))
+    monkeypatch.setattr(decision_cache, "_cache", cache)
+    return cache
+
+
+def test_cache_hit_is_saved_and_published_as_cached(app, events, cache):
+    state = build_factory_state()
+
+    first = agent_core.run_agent("ProductionAgent", state)
+    second = agent_core.run_agent("ProductionAgent", state)
+
+    assert first["actions"]
+    assert second == first
+    assert cache.hits == 1
+    documents = [d.decision for d in AgentDecision.query.order_by(AgentDecision.id)]
+    assert len(documents) == 2
+    assert "cached" not in documents[0]
+    assert documents[1] == {**first, "cached": True}
+    decisions = [data for event_type, data in events if event_type == "decision"]
+    assert [d["decision"].get("cached", False) for d in decisions] == [False, True]
+    assert AgentAction.query.count() == 2 * len(first["actions"])
+
+
+def test_abandoned_cache_hit_is_not_saved(app, events, cache):
+    state = build_factory_state()
+    agent_core.run_agent("EnergyAgent", state)
+    handle = agent_core.RunHandle()
+    handle.abandon()
+
+    assert agent_core.run_agent("EnergyAgent", state, handle) is None
+    assert AgentDecision.query.count() == 1
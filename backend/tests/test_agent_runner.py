@@ -0,0 +1,70 @@
+# backend\tests\test_agent_runner.py
+
+import threading
+import time
+
+import pytest
+
+from src.models import AgentDecision
+from src.services import agent_core, agent_runner
+
+AGENTS = [("a", "FastAgent"), ("b", "CrashingAgent"), ("c", "SlowAgent")]
+
+
+def decision(note):
+    return {"actions": [], "impact": {"throughput_change_percent": 0, "energy_change_percent": 0, "notes": note}}
+
+
+@pytest.fixture
+def fake_agents(monkeypatch):
+    """run_agent stand-in: FastAgent answers, CrashingAgent raises, SlowAgent outlives the timeout."""
+    release = threading.Event()
+
+    def run_agent(name, state, handle=None):
+        if name == "CrashingAgent":
+            raise RuntimeError("boom")
+        if name == "SlowAgent":
+            release.wait(5)
+        if handle is not None and not handle.finish():
+            return None
+        agent_core.save_decision(name, decision(f"{name} done"))
+        return decision(f"{name} done")
+
+    monkeypatch.setattr(agent_runner, "run_agent", run_agent)
+    yield release
+    release.set()
+
+
+def saved():
+    return {(d.agent_name, d.notes) for d in AgentDecision.query}
+
+
+def test_every_agent_leaves_a_decision(app, fake_agents):
+    results = agent_runner.run_agents(AGENTS, {}, mode="concurrent", max_workers=3, timeout=0.3)
+
+    assert list(results) == ["a", "b", "c"]
+    assert results["b"]["impact"]["notes"] == "CrashingAgent failed: boom"
+    assert results["c"]["impact"]["notes"] == "SlowAgent timed out after 0.3s"
+    assert saved() == {
+        ("FastAgent", "FastAgent done"),
+        ("CrashingAgent", "CrashingAgent failed: boom"),
+        ("SlowAgent", "SlowAgent timed out after 0.3s"),
+    }
+
+
+def test_abandoned_agent_does_not_save_its_late_decision(app, fake_agents):
+    agent_runner.run_agents(AGENTS, {}, mode="concurrent", max_workers=3, timeout=0.3)
+
+    fake_agents.set()
+    time.sleep(0.2)
+
+    assert ("SlowAgent", "SlowAgent done") not in saved()
+    assert AgentDecision.query.filter_by(agent_name="SlowAgent").count() == 1
+
+
+def test_sequential_mode_keeps_order(app, monkeypatch):
+    monkeypatch.setattr(agent_runner, "run_agent", lambda name, state, handle=None: decision(name))
+
+    results = agent_runner.run_agents([("x", "X"), ("y", "Y")], {}, mode="sequential")
+
+    assert [r["impact"]["notes"] for r in results.values()] == ["X", "Y"]
@@ -0,0 +1,109 @@
+# backend\tests\test_decision_writer.py
+
+import time
+
+import pytest
+
+from src.config import Config
+from src.models import db, AgentAction, AgentDecision
+from src.services import agent_core
+from src.services.decision_store import decision_row
+from src.services.decision_writer import DecisionWriter
+
+
+def row(agent="EnergyAgent", actions=()):
+    return decision_row(agent, {"actions": list(actions), "impact": {"energy_change_percent": -2, "notes": "n"}})
+
+
+def stored():
+    db.session.expire_all()
+    return db.session.query(AgentDecision).count()
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.fixture
+def writer(app):
+    instance = DecisionWriter(batch_size=3, flush_interval=60)
+    instance.app = app
+    yield instance
+    instance.shutdown()
+
+
+def test_full_batch_is_written_without_waiting_for_the_interval(app, writer):
+    before = stored()
+    for _ in range(3):
+        writer.submit(row())
+
+    assert wait_for(lambda: stored() == before + 3)
+
+
+def test_partial_batch_waits_for_the_interval(app, writer):
+    writer.flush_interval = 0.2
+    before = stored()
+    writer.submit(row())
+
+    assert stored() == before
+    assert wait_for(lambda: stored() == before + 1)
+
+
+def test_actions_are_stored_with_their_decision(app, writer):
+    writer.submit(row(actions=[{"machine_id": "2", "action": "adjust_speed", "value": 0.8}, {"note": "no action"}]))
+    writer.shutdown()
+
+    decision = db.session.query(AgentDecision).order_by(AgentDecision.id.desc()).first()
+    actions = db.session.query(AgentAction).filter_by(decision_id=decision.id).all()
+    assert decision.energy_change_percent == -2
+    assert [(a.machine_id, a.action, a.value) for a in actions] == [(2, "adjust_speed", 0.8)]
+
+
+def test_shutdown_flushes_pending_rows(app, writer):
+    before = stored()
+    writer.submit(row())
+    writer.submit(row())
+
+    writer.shutdown()
+
+    assert stored() == before + 2
+
+
+def test_flush_writes_queued_rows_on_the_calling_thread(app, writer, monkeypatch):
+    monkeypatch.setattr(writer, "_ensure_thread", lambda: None)
+    before = stored()
+    writer.submit(row())
+    writer.submit(row())
+
+    writer.flush()
+
+    assert stored() == before + 2
+
+
+def test_failed_batch_is_dropped_and_the_writer_keeps_going(app, writer):
+    writer.batch_size = 1
+    before = stored()
+    bad = row()
+    bad["agent_name"] = None  # NOT NULL
+    writer.submit(bad)
+    writer.submit(row())
+
+    assert wait_for(lambda: stored() == before + 1)
+    assert writer._thread.is_alive()
+
+
+def test_save_decision_queues_in_async_mode(app, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(Config, "DECISION_WRITE_MODE", "async")
+    monkeypatch.setattr(agent_core.decision_writer, "submit", submitted.append)
+    before = stored()
+
+    agent_core.save_decision("EnergyAgent", {"actions": [], "impact": {"notes": "queued"}})
+
+    assert stored() == before
+    assert [r["notes"] for r in submitted] == ["queued"]
@@ -0,0 +1,105 @@
+# backend\tests\test_decisions.py
+
+from datetime import datetime
+
+import pytest
+
+from src.models import db
+from src.services.decision_store import action_rows, decision_row, insert_decisions
+
+T = datetime(2030, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def decisions(app):
+    """Three stored decisions an hour apart, with their actions."""
+    rows = [
+        decision_row(
+            "EnergyAgent",
+            {"actions": [{"machine_id": 1, "action": "reduce_speed", "value": 15}], "impact": {"energy_change_percent": -5}},
+            created_at=T.replace(hour=10),
+        ),
+        decision_row(
+            "ProductionAgent",
+            {
+                "actions": [
+                    {"machine_id": 1, "action": "increase_speed", "value": 10},
+                    {"machine_id": 2, "action": "reassign_job", "value": 0},
+                ],
+                "impact": {"throughput_change_percent": "4.5"},
+            },
+            created_at=T.replace(hour=11),
+        ),
+        decision_row("QualityAgent", {"actions": [], "impact": {"notes": "fine"}}, created_at=T),
+    ]
+    ids = insert_decisions(rows)
+    db.session.commit()
+    return ids
+
+
+def test_decision_row_pulls_out_impact_numbers():
+    row = decision_row("A", {"impact": {"throughput_change_percent": "3", "energy_change_percent": "n/a", "notes": 7}})
+
+    assert (row["throughput_change_percent"], row["energy_change_percent"], row["notes"]) == (3.0, None, "7")
+    assert decision_row("A", {"impact": "broken"})["notes"] is None
+    assert decision_row("A", ["not", "a", "dict"])["throughput_change_percent"] is None
+
+
+def test_action_rows_skip_malformed_actions():
+    row = decision_row(
+        "A",
+        {"actions": [{"machine_id": "3", "action": "x" * 40, "value": "2"}, {"machine_id": 1}, "junk"]},
+    )
+
+    assert action_rows(9, row) == [
+        {
+            "decision_id": 9, "agent_name": "A", "machine_id": 3, "action": "x" * 30,
+            "value": 2.0, "created_at": row["created_at"],
+        }
+    ]
+
+
+def test_decisions_newest_first_with_typed_columns(client, decisions):
+    body = client.get("/api/data/decisions?since=2030-01-01T10:00:00").json
+
+    assert [d["agent"] for d in body] == ["QualityAgent", "ProductionAgent", "EnergyAgent"]
+    assert body[1]["throughput_change_percent"] == 4.5
+    assert body[2]["energy_change_percent"] == -5
+
+
+@pytest.mark.parametrize(
+    "query, agents",
+    [
+        ("agent=EnergyAgent,QualityAgent", ["QualityAgent", "EnergyAgent"]),
+        ("machine_id=1", ["ProductionAgent", "EnergyAgent"]),
+        ("machine_id=1&action=reduce_speed", ["EnergyAgent"]),
+        ("action=reassign_job", ["ProductionAgent"]),
+        ("until=2030-01-01T11:00:00", ["EnergyAgent"]),
+    ],
+)
+def test_decision_filters(client, decisions, query, agents):
+    body = client.get(f"/api/data/decisions?since=2030-01-01T00:00:00&{query}").json
+
+    assert [d["agent"] for d in body] == agents
+
+
+def test_actions_and_stats(client, decisions):
+    actions = client.get("/api/data/actions?since=2030-01-01T00:00:00&machine_id=1").json
+    stats = client.get("/api/data/actions/stats?since=2030-01-01T00:00:00&group_by=machine").json
+
+    assert [(a["agent"], a["action"]) for a in actions] == [
+        ("ProductionAgent", "increase_speed"),
+        ("EnergyAgent", "reduce_speed"),
+    ]
+    assert stats == [
+        {"machine": 1, "count": 2, "total_value": 25.0},
+        {"machine": 2, "count": 1, "total_value": 0.0},
+    ]
+
+
+@pytest.mark.parametrize(
+    "url",
+    ["/api/data/decisions?machine_id=one", "/api/data/actions/stats?group_by=color", "/api/data/actions/stats?bucket=week"],
+)
+def test_bad_filters_are_rejected(client, url):
+    assert client.get(url).status_code == 400
@@ -0,0 +1,117 @@
+# backend\tests\test_energy_series.py
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.models import db, EnergyPrice, EnergyPriceRollup
+from src.services.energy_series import compact_raw, ingest_prices, read_series
+
+# Recent enough to be inside the raw retention window
+DAY = (datetime.utcnow() - timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture
+def prices(app):
+    """Three days of prices every 15 minutes; 18:00-20:00 costs four times as much."""
+    EnergyPrice.query.delete()
+    EnergyPriceRollup.query.delete()
+    db.session.commit()
+    points = []
+    for i in range(3 * 24 * 4):
+        ts = DAY + timedelta(minutes=15 * i)
+        points.append((ts, 0.4 if 18 <= ts.hour < 20 else 0.1 + 0.01 * (i % 4)))
+    ingest_prices(points)
+    return points
+
+
+def rollup(resolution, bucket):
+    return EnergyPriceRollup.query.filter_by(resolution=resolution, bucket=bucket).one()
+
+
+def test_ingest_builds_hourly_and_daily_rollups(prices):
+    hour = rollup("hour", DAY + timedelta(hours=1))
+    day = rollup("day", DAY)
+
+    assert (hour.min_price, hour.max_price, hour.sample_count) == (0.1, 0.13, 4)
+    assert hour.avg_price == pytest.approx(0.115)
+    assert rollup("hour", DAY + timedelta(hours=18)).is_peak
+    assert not hour.is_peak
+    assert day.sample_count == 96 and day.is_peak
+    assert day.max_price == 0.4
+
+
+@pytest.mark.parametrize(
+    "span, max_points, resolution",
+    [
+        (timedelta(hours=6), None, "raw"),
+        (timedelta(days=2), None, "raw"),  # ENERGY_RAW_MAX_SPAN_HOURS, 192 points
+        (timedelta(days=1), 50, "hour"),  # 96 raw points don't fit
+        (timedelta(days=3), None, "hour"),
+        (timedelta(days=3), 10, "day"),
+    ],
+)
+def test_resolution_follows_the_range(prices, span, max_points, resolution):
+    assert read_series(DAY, DAY + span, max_points)[0] == resolution
+
+
+@pytest.mark.parametrize("resolution", [None, "raw", "hour", "day"])
+@pytest.mark.parametrize("max_points", [1, 5, 50])
+def test_every_resolution_respects_max_points(prices, resolution, max_points):
+    _, points = read_series(DAY, DAY + timedelta(days=3), max_points, resolution)
+
+    assert 0 < len(points) <= max_points
+    assert [p["timestamp"] for p in points] == sorted(p["timestamp"] for p in points)
+
+
+def test_grouped_points_keep_min_max_and_peak(prices):
+    _, points = read_series(DAY, DAY + timedelta(days=1), 2, "hour")
+
+    assert [p["timestamp"] for p in points] == [DAY.isoformat(), (DAY + timedelta(hours=12)).isoformat()]
+    assert (points[0]["min"], points[0]["max"], points[0]["peak"]) == (0.1, 0.13, False)
+    assert (points[1]["max"], points[1]["peak"]) == (0.4, True)
+
+
+def test_backfill_into_a_compacted_day_merges_into_its_rollups(prices):
+    compact_raw(now=DAY + timedelta(days=30 + 2))  # drops the raw points of the first two days
+    assert EnergyPrice.query.filter(EnergyPrice.timestamp < DAY + timedelta(days=1)).count() == 0
+
+    ingest_prices([(DAY + timedelta(hours=3, minutes=5), 1.0)])
+
+    hour = rollup("hour", DAY + timedelta(hours=3))
+    assert (hour.sample_count, hour.max_price) == (5, 1.0)
+    assert hour.avg_price == pytest.approx((0.1 + 0.11 + 0.12 + 0.13 + 1.0) / 5)
+    assert rollup("day", DAY).sample_count == 97
+
+
+def test_ingest_stores_aware_timestamps_as_naive_utc(app):
+    local = timezone(timedelta(hours=2))
+    ingest_prices([(datetime(2024, 5, 1, 12, tzinfo=local), 0.2)])
+
+    assert EnergyPrice.query.filter_by(timestamp=datetime(2024, 5, 1, 10)).count() == 1
+
+
+def test_series_endpoint_accepts_aware_timestamps(client, prices):
+    naive = client.get(
+        "/api/data/energy/series",
+        query_string={"start": (DAY + timedelta(hours=2)).isoformat(), "end": (DAY + timedelta(hours=4)).isoformat()},
+    )
+    aware = client.get(
+        "/api/data/energy/series",
+        query_string={
+            "start": (DAY + timedelta(hours=4)).replace(tzinfo=timezone(timedelta(hours=2))).isoformat(),
+            "end": (DAY + timedelta(hours=4)).replace(tzinfo=timezone.utc).isoformat(),
+        },
+    )
+
+    assert aware.status_code == 200
+    assert aware.get_json() == naive.get_json()
+    assert aware.headers["X-Series-Resolution"] == "raw"
+
+
+@pytest.mark.parametrize(
+    "query",
+    [{"start": "tomorrow"}, {"resolution": "minute"}, {"start": "2024-01-02", "end": "2024-01-01"}],
+)
+def test_series_endpoint_rejects_bad_arguments(client, query):
+    assert client.get("/api/data/energy/series", query_string=query).status_code == 400
@@ -0,0 +1,140 @@
+# backend\tests\test_event_bus.py
+
+import queue
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.event_bus import EventBus, RemoteEventBus, create_event_bus
+
+
+class Channel:
+    """A pub/sub channel shared by the FakeBus instances of one test."""
+
+    def __init__(self):
+        self.subscribers = []
+        self.sent = []
+
+
+class FakeBus(RemoteEventBus):
+    backend = "fake"
+
+    def __init__(self, channel, failures=0, **options):
+        self.received = []
+        super().__init__(lambda event_type, data: self.received.append((event_type, data)), "test", **options)
+        self.hub = channel
+        self.failures = failures  # sends that fail before the channel comes back
+        self.inbox = queue.Queue()
+        channel.subscribers.append(self.inbox)
+
+    def _send(self, message):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("channel down")
+        self.hub.sent.append(message)
+        for inbox in self.hub.subscribers:
+            inbox.put(message)
+
+    def _messages(self):
+        yield None
+        while True:
+            message = self.inbox.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def channel():
+    return Channel()
+
+
+def test_events_reach_other_processes_once(channel):
+    a, b = FakeBus(channel), FakeBus(channel)
+    b.start()
+
+    a.publish("decision", {"agent": "EnergyAgent"})
+    a.publish("alert", {"level": "warn"})
+
+    assert wait_for(lambda: len(b.received) == 2)
+    assert b.received == [("decision", {"agent": "EnergyAgent"}), ("alert", {"level": "warn"})]
+    time.sleep(0.05)
+    assert a.received == b.received  # delivered locally, not again from the bus
+    assert all(message.startswith(a.origin + ":") for message in channel.sent)
+
+
+def test_unserializable_events_are_dropped_alone(channel):
+    a, b = FakeBus(channel, batch_ms=50), FakeBus(channel)
+    b.start()
+
+    a.publish("ok", {"n": 1})
+    a.publish("bad", {"when": object()})
+    a.publish("ok", {"n": 2})
+
+    assert wait_for(lambda: len(b.received) == 2)
+    assert b.received == [("ok", {"n": 1}), ("ok", {"n": 2})]
+
+
+def test_failed_sends_are_retried_then_dropped(channel):
+    flaky = FakeBus(channel, failures=2, send_attempts=5)
+    flaky.publish("ok", {"n": 1})
+    assert wait_for(lambda: channel.sent)
+    assert flaky.pending() == 0
+
+    broken = FakeBus(channel, failures=3, send_attempts=3)
+    broken.publish("lost", {})
+    assert wait_for(lambda: broken.failures == 0 and broken.pending() == 0)
+    broken.publish("after", {})
+    assert wait_for(lambda: len(channel.sent) == 2)
+    assert '"after"' in channel.sent[-1] and '"lost"' not in channel.sent[-1]
+
+
+def test_full_outbox_drops_the_oldest(channel):
+    bus = FakeBus(channel, max_pending=2)
+    bus._pid = bus._owner_pid  # no sender thread: keep everything in the outbox
+
+    for n in range(3):
+        bus.publish("tick", {"n": n})
+
+    assert [data["n"] for _, data in bus._outbox] == [1, 2]
+
+
+def test_reconnect_asks_clients_to_resync(channel):
+    bus = FakeBus(channel)
+    bus.start()
+    bus.inbox.put(ConnectionError("lost"))
+
+    assert wait_for(lambda: ("resync", {"reason": "event_bus_reconnected"}) in bus.received)
+
+
+def test_malformed_messages_are_skipped(channel):
+    a, b = FakeBus(channel), FakeBus(channel)
+    b.start()
+    b.inbox.put("someone-else:{not json")
+
+    a.publish("ok", {})
+
+    assert wait_for(lambda: b.received == [("ok", {})])
+
+
+def test_missing_driver_falls_back_to_memory():
+    config = SimpleNamespace(
+        EVENT_BUS="redis", REDIS_URL="redis://localhost", EVENT_BUS_CHANNEL="events",
+        EVENT_BUS_BATCH_MS=10, EVENT_BUS_BATCH_SIZE=200, EVENT_BUS_MAX_PENDING=100, EVENT_BUS_SEND_ATTEMPTS=3,
+    )
+    try:
+        import redis  # noqa: F401
+    except ImportError:
+        assert type(create_event_bus(print, config)) is EventBus
+    else:
+        pytest.skip("redis is installed")
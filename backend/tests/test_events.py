@@ -0,0 +1,172 @@
+# backend\tests\test_events.py
+
+import json
+
+import pytest
+from werkzeug.test import EnvironBuilder
+
+from src.blueprints.events import broker
+from src.services.event_broker import EventBroker
+from src.services.event_coalescer import MachineUpdateCoalescer
+
+
+def test_every_subscriber_reads_each_event_once():
+    events = EventBroker()
+    first, second = events.subscribe(), events.subscribe()
+
+    events.publish("decision", {"n": 1})
+    events.publish("decision", {"n": 2})
+
+    for subscription in (first, second):
+        batch, dropped = subscription.next_events(timeout=0)
+        assert ([json.loads(e[2])["n"] for e in batch], dropped) == ([1, 2], 0)
+        assert subscription.next_events(timeout=0) == ([], 0)
+
+
+def test_slow_subscriber_skips_to_newest_and_counts_drops():
+    events = EventBroker(history_size=100, buffer_size=3)
+    subscription = events.subscribe()
+
+    for n in range(10):
+        events.publish("tick", {"n": n})
+
+    batch, dropped = subscription.next_events(timeout=0)
+    assert [json.loads(e[2])["n"] for e in batch] == [7, 8, 9]
+    assert dropped == 7
+
+
+def test_last_event_id_replays_from_history():
+    events = EventBroker()
+    ids = [events.publish("tick", {"n": n}) for n in range(5)]
+
+    subscription = events.subscribe(events.format_id(ids[1]))
+
+    batch, _ = subscription.next_events(timeout=0)
+    assert [e[0] for e in batch] == ids[2:]
+    assert not subscription.needs_resync
+
+
+@pytest.mark.parametrize("last_event_id", ["otherepoch-3", "garbage"])
+def test_foreign_last_event_id_needs_resync(last_event_id):
+    events = EventBroker()
+    events.publish("tick", {})
+
+    subscription = events.subscribe(last_event_id)
+
+    assert subscription.needs_resync
+    assert subscription.next_events(timeout=0) == ([], 0)
+
+
+def test_closing_releases_the_subscription():
+    events = EventBroker()
+    subscription = events.subscribe()
+    assert events.stats()["subscribers"] == 1
+
+    subscription.close()
+    subscription.close()
+
+    assert events.stats()["subscribers"] == 0
+
+
+def test_stream_that_never_starts_does_not_leak_a_subscriber(app):
+    """The server closes the response without reading it when the client left early."""
+    before = broker.subscriber_count
+    environ = EnvironBuilder(path="/api/events/stream").get_environ()
+
+    body = app.wsgi_app(environ, lambda status, headers, exc_info=None: None)
+    body.close()
+
+    assert broker.subscriber_count == before
+
+
+def test_stream_releases_its_subscriber_when_closed(client):
+    before = broker.subscriber_count
+    response = client.get("/api/events/stream")
+    chunks = response.iter_encoded()
+
+    assert next(chunks).startswith(b"retry:")
+    assert broker.subscriber_count == before + 1
+    response.close()
+    assert broker.subscriber_count == before
+
+
+@pytest.fixture
+def published():
+    return []
+
+
+@pytest.fixture
+def coalescer(published):
+    """Flushes on every update, with a keyframe every third flush."""
+    return MachineUpdateCoalescer(lambda event_type, data: published.append(data), window_ms=0, keyframe_every=3)
+
+
+def test_updates_in_one_window_merge_into_one_delta(published):
+    coalescer = MachineUpdateCoalescer(lambda event_type, data: published.append(data), window_ms=10_000)
+
+    coalescer.add(1, {"status": "running", "utilization": 50})
+    coalescer.add(1, {"utilization": 55})
+    coalescer.add(2, {"status": "idle"})
+    assert coalescer.pending_count() == 2
+    coalescer.flush()
+
+    assert published == [{
+        "keyframe": False,
+        "machines": [
+            {"machine_id": 1, "version": 1, "base": 0, "changes": {"status": "running", "utilization": 55}},
+            {"machine_id": 2, "version": 1, "base": 0, "changes": {"status": "idle"}},
+        ],
+    }]
+
+
+def test_deltas_carry_only_changed_fields_and_skip_unchanged(coalescer, published):
+    coalescer.add(1, {"status": "running", "utilization": 50})
+    coalescer.add(1, {"status": "running", "utilization": 60})
+
+    assert [m["changes"] for d in published for m in d["machines"]] == [
+        {"status": "running", "utilization": 50},
+        {"utilization": 60},
+    ]
+    assert coalescer.full_record(1)["version"] == 2
+
+
+def test_flush_with_nothing_new_publishes_nothing(published):
+    coalescer = MachineUpdateCoalescer(lambda event_type, data: published.append(data), window_ms=0)
+    coalescer.add(1, {"utilization": 50})
+
+    coalescer.add(1, {"utilization": 50})
+
+    assert len(published) == 1
+    assert coalescer.full_record(1)["version"] == 1
+
+
+def test_keyframe_lists_every_machine_without_bumping_unchanged(published):
+    coalescer = MachineUpdateCoalescer(lambda event_type, data: published.append(data), window_ms=10_000, keyframe_every=3)
+    for mid, utilization in ((1, 10), (2, 20)):
+        coalescer.add(mid, {"utilization": utilization})
+        coalescer.flush()
+
+    coalescer.add(1, {"utilization": 11})
+    coalescer.add(2, {"utilization": 20})  # unchanged
+    keyframe = coalescer.flush()
+
+    assert keyframe["keyframe"]
+    assert {m["machine_id"]: (m["version"], m["changes"]) for m in keyframe["machines"]} == {
+        1: (2, {"utilization": 11}),
+        2: (1, {"utilization": 20}),
+    }
+
+
+def test_client_view_sends_full_record_to_clients_that_missed_a_version(coalescer, published):
+    coalescer.add(1, {"status": "running", "utilization": 10})
+    coalescer.add(1, {"utilization": 20})
+    delta = published[-1]
+
+    assert coalescer.client_view(delta, {1: 1}) is None  # up to date: the shared payload fits
+    seen = {}
+    view = coalescer.client_view(delta, seen)
+    assert view["machines"] == [
+        {"machine_id": 1, "version": 2, "full": True, "changes": {"status": "running", "utilization": 20}}
+    ]
+    assert seen == {1: 2}
+    assert coalescer.client_view(delta, seen) == {"keyframe": False, "machines": []}
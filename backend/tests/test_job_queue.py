@@ -0,0 +1,139 @@
+# backend\tests\test_job_queue.py
+
+import threading
+import time
+
+import pytest
+
+from src.blueprints import agents
+from src.services import job_queue as job_queue_module
+from src.services.job_queue import JobQueue, QueueFullError, job_key
+
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def events(monkeypatch):
+    pushed = []
+    monkeypatch.setattr(job_queue_module, "push_event", lambda kind, data: pushed.append((kind, data)))
+    return pushed
+
+
+@pytest.fixture
+def queue(app, events):
+    instance = JobQueue(workers=1, max_queued=2, result_ttl=600)
+    instance.app = app
+    yield instance
+    instance.shutdown()
+
+
+@pytest.fixture
+def gate():
+    """Jobs built with `blocked(gate)` wait until the test sets the gate."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def blocked(gate, result="done"):
+    def fn():
+        gate.wait(5)
+        return result
+    return fn
+
+
+def test_job_key_depends_on_state_and_params():
+    state = {"machines": [{"id": 1}]}
+
+    assert job_key("run", state) == job_key("run", {"machines": [{"id": 1}]})
+    assert job_key("run", state) != job_key("run", state, params=24)
+    assert job_key("run", state) != job_key("suggest", state)
+
+
+def test_job_runs_and_announces_completion(queue, events):
+    job, created = queue.submit("run", "k", lambda: {"ok": True})
+
+    assert created
+    assert wait_for(lambda: job.status == "succeeded")
+    assert job.result == {"ok": True}
+    assert wait_for(lambda: events)
+    assert events[0][0] == "job_complete" and events[0][1]["job_id"] == job.id
+
+
+def test_failed_job_records_the_error(queue):
+    def fail():
+        raise RuntimeError("model down")
+
+    job, _ = queue.submit("run", "k", fail)
+
+    assert wait_for(lambda: job.status == "failed")
+    assert job.error == "model down"
+
+
+def test_identical_inflight_jobs_are_folded(queue, gate):
+    first, created = queue.submit("run", "k", blocked(gate))
+    second, duplicate_created = queue.submit("run", "k", blocked(gate))
+
+    assert created and not duplicate_created
+    assert second is first
+
+    gate.set()
+    assert wait_for(lambda: first.status == "succeeded")
+    third, created = queue.submit("run", "k", lambda: "again")
+    assert created and third is not first
+
+
+def test_submit_beyond_the_queue_depth_raises(queue, gate):
+    running, _ = queue.submit("run", "a", blocked(gate))
+    assert wait_for(lambda: running.status == "running")
+    queue.submit("run", "b", blocked(gate))
+    queue.submit("run", "c", blocked(gate))
+
+    with pytest.raises(QueueFullError):
+        queue.submit("run", "d", blocked(gate))
+    assert queue.stats() == {"workers": 1, "queued": 2, "running": 1, "max_queued": 2, "retained": 3}
+
+
+def test_finished_jobs_expire_after_the_ttl(queue):
+    job, _ = queue.submit("run", "k", lambda: None)
+    assert wait_for(lambda: job.status == "succeeded")
+    assert queue.get(job.id) is job
+
+    queue.result_ttl = 0
+    time.sleep(0.01)
+    assert queue.get(job.id) is None
+
+
+def test_async_request_returns_202_and_is_pollable(client, queue, gate, monkeypatch):
+    monkeypatch.setattr(agents, "job_queue", queue)
+    monkeypatch.setattr(agents, "_run_and_apply", lambda name, state: blocked(gate, {"agent": name})())
+
+    first = client.post("/api/agents/energy?async=1")
+    second = client.post("/api/agents/energy?async=1")
+
+    assert first.status_code == second.status_code == 202
+    assert first.json["deduplicated"] is False and second.json["deduplicated"] is True
+    assert second.json["job_id"] == first.json["job_id"]
+    assert first.headers["Location"] == first.json["status_url"]
+
+    gate.set()
+    assert wait_for(lambda: client.get(first.json["status_url"]).json["status"] == "succeeded")
+    assert client.get(first.json["status_url"]).json["result"] == {"agent": "EnergyAgent"}
+    assert client.get("/api/agents/jobs/unknown").status_code == 404
+
+
+def test_full_queue_answers_429_with_retry_after(client, queue, monkeypatch):
+    monkeypatch.setattr(agents, "job_queue", queue)
+    monkeypatch.setattr(queue, "max_queued", 0)
+
+    response = client.post("/api/agents/energy?async=1")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(agents.Config.JOB_RETRY_AFTER)
@@ -0,0 +1,80 @@
+# backend\tests\test_json_stream.py
+
+import json
+
+import pytest
+
+from src.utils.json_stream import JsonObjectScanner
+
+DECISION = {
+    "actions": [
+        {"machine_id": 1, "action": "reduce_speed", "value": 10},
+        {"machine_id": 2, "action": "reassign_job", "value": "order {7}"},
+    ],
+    "impact": {"throughput_change_percent": -5, "energy_change_percent": -8, "notes": "Braces \"{\" in a string."},
+}
+
+
+def scan(text, chunk_size, **options):
+    scanner = JsonObjectScanner(**options)
+    done = False
+    for start in range(0, len(text), chunk_size):
+        done = scanner.feed(text[start:start + chunk_size])
+        if done:
+            break
+    return done, scanner
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 10_000])
+@pytest.mark.parametrize(
+    "text",
+    [
+        json.dumps(DECISION),
+        "Sure! Here is the plan:\n```json\n" + json.dumps(DECISION, indent=2) + "\n```\nAnything else?",
+        "<think>Maybe {\"actions\": []} is enough? No.</think>" + json.dumps(DECISION),
+        "I considered {not json} and {\"x\"} first.\n" + json.dumps(DECISION),
+    ],
+)
+def test_finds_first_valid_object_in_any_chunking(text, chunk_size):
+    done, scanner = scan(text, chunk_size, validate=lambda obj: "actions" in obj)
+
+    assert done
+    assert scanner.result == DECISION
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 10_000])
+def test_reports_each_action_as_it_closes(chunk_size):
+    seen = []
+    text = "<think>{\"actions\": [{\"machine_id\": 9}]}</think>" + json.dumps(DECISION)
+
+    done, _ = scan(text, chunk_size, on_action=seen.append)
+
+    assert done
+    assert seen == DECISION["actions"]
+
+
+def test_skips_objects_that_fail_validation():
+    text = '{"answer": 42} then ' + json.dumps(DECISION)
+
+    done, scanner = scan(text, 4, validate=lambda obj: "actions" in obj)
+
+    assert done
+    assert scanner.result == DECISION
+
+
+def test_waits_for_incomplete_object():
+    text = json.dumps(DECISION)
+    scanner = JsonObjectScanner()
+
+    assert not scanner.feed(text[:-1])
+    assert scanner.result is None
+    assert scanner.feed(text[-1])
+    assert scanner.result == DECISION
+
+
+def test_ignores_text_after_the_object():
+    scanner = JsonObjectScanner()
+
+    assert scanner.feed(json.dumps(DECISION) + ' {"actions": []}')
+    assert scanner.feed("more text")
+    assert scanner.result == DECISION
@@ -0,0 +1,68 @@
+# backend\tests\test_machines.py
+
+import threading
+
+from src.models import db, Machine
+from src.services.machine_state import update_machine_versioned
+from src.services.simulation import apply_actions
+
+
+def test_etag_is_the_row_version(client):
+    response = client.get("/api/data/machines/1")
+
+    assert response.headers["ETag"] == '"1"'
+    assert response.get_json()["version"] == 1
+
+
+def test_put_with_current_etag_succeeds_and_bumps_it(client):
+    etag = client.get("/api/data/machines/1").headers["ETag"]
+
+    response = client.put("/api/data/machines/1", json={"utilization": 42}, headers={"If-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert response.get_json()["utilization"] == 42
+
+
+def test_put_with_stale_etag_gets_412_and_current_record(client):
+    etag = client.get("/api/data/machines/1").headers["ETag"]
+    client.put("/api/data/machines/1", json={"status": "idle"})
+
+    response = client.put("/api/data/machines/1", json={"utilization": 10}, headers={"If-Match": etag})
+
+    assert response.status_code == 412
+    assert response.headers["ETag"] == '"2"'
+    assert response.get_json()["status"] == "idle"
+    assert response.get_json()["utilization"] == 75.3
+
+
+def test_put_if_match_errors(client):
+    assert client.put("/api/data/machines/1", json={}, headers={"If-Match": "abc"}).status_code == 400
+    assert client.put("/api/data/machines/99", json={}, headers={"If-Match": '"1"'}).status_code == 404
+    assert client.put("/api/data/machines/1", json={"status": "idle"}, headers={"If-Match": "*"}).status_code == 200
+
+
+def test_reassign_only_keeps_the_etag(client):
+    etag = client.get("/api/data/machines/2").headers["ETag"]
+
+    apply_actions([{"machine_id": 2, "action": "reassign_job", "value": 1}])
+
+    response = client.put("/api/data/machines/2", json={"utilization": 10}, headers={"If-Match": etag})
+    assert response.status_code == 200
+
+
+def test_concurrent_increments_are_not_lost(app):
+    def bump():
+        with app.app_context():
+            for _ in range(10):
+                update_machine_versioned(3, lambda current: {"utilization": current["utilization"] + 1}, retries=100)
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db.session.expire_all()
+
+    machine = db.session.get(Machine, 3)
+    assert (machine.utilization, machine.version) == (100.0, 41)
@@ -0,0 +1,60 @@
+# backend\tests\test_metrics.py
+
+from src.utils import metrics
+from src.utils.metrics import Registry
+
+
+def test_counter_and_gauge_render_in_exposition_format():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    requests.inc(route="/a")
+    requests.inc(2, route='/b"quoted"')
+    registry.gauge("queue_depth", "Waiting jobs").set_function(lambda: 3)
+
+    assert registry.render().splitlines() == [
+        "# HELP queue_depth Waiting jobs",
+        "# TYPE queue_depth gauge",
+        "queue_depth 3",
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a"} 1',
+        'requests_total{route="/b\\"quoted\\""} 2',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Registry().histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 5):
+        histogram.observe(value)
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 6.25",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_registering_twice_returns_the_same_metric():
+    registry = Registry()
+
+    assert registry.counter("c", "help") is registry.counter("c", "help")
+
+
+def test_metrics_endpoint_reports_requests_by_route(client):
+    client.get("/api/data/machines/1/telemetry")
+
+    response = client.get("/api/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    body = response.get_data(as_text=True)
+    assert 'endpoint="/api/data/machines/<int:machine_id>/telemetry"' in body
+    assert "db_queries_total" in body
+
+
+def test_metrics_endpoint_is_404_when_disabled(client, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+
+    assert client.get("/api/metrics").status_code == 404
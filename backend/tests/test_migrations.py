@@ -0,0 +1,104 @@
+# backend\tests\test_migrations.py
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import sqlalchemy as sa
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAD = "0006"
+
+
+def run(database, *args):
+    """Run a backend command (flask CLI or script) against its own database file."""
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}"}
+    result = subprocess.run([sys.executable, *args], cwd=BACKEND, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def migrate(database, *args):
+    run(database, "-m", "flask", "--app", "app", "db", *args)
+
+
+def columns(engine, table):
+    return {column["name"] for column in sa.inspect(engine).get_columns(table)}
+
+
+def revision(engine):
+    with engine.connect() as conn:
+        return conn.execute(sa.text("SELECT version_num FROM alembic_version")).scalar()
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "migrations.db"
+    engine = sa.create_engine(f"sqlite:///{path}")
+    yield path, engine
+    engine.dispose()
+
+
+def test_upgrade_empty_database_to_head_and_back(database):
+    path, engine = database
+
+    migrate(path, "upgrade")
+
+    assert revision(engine) == HEAD
+    assert {"agent_actions", "machine_telemetry", "energy_price_rollups"} <= set(sa.inspect(engine).get_table_names())
+    assert {"last_seen_at", "version"} <= columns(engine, "machines")
+    assert "impact" not in columns(engine, "agent_decisions")
+
+    migrate(path, "downgrade", "base")
+
+    assert set(sa.inspect(engine).get_table_names()) <= {"alembic_version"}
+
+
+def test_upgrade_database_created_by_seed_db(database):
+    """seed_db.py builds the current schema with create_all; migrations must not re-add its columns."""
+    path, engine = database
+    run(path, "seed_db.py")
+
+    migrate(path, "upgrade")
+
+    assert revision(engine) == HEAD
+    with engine.connect() as conn:
+        assert conn.execute(sa.text("SELECT count(*) FROM machines WHERE version = 1")).scalar() == 4
+
+
+def test_upgrade_moves_impact_into_typed_columns(database):
+    path, engine = database
+    migrate(path, "upgrade", "0003")
+    decision = {
+        "actions": [{"machine_id": "2", "action": "reduce_speed", "value": 10}, {"action": ""}],
+        "impact": {"throughput_change_percent": -5, "energy_change_percent": "x", "notes": "Slow down."},
+    }
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text("INSERT INTO agent_decisions (agent_name, decision, created_at) VALUES (:a, :d, '2024-01-01')"),
+            [{"a": "EnergyAgent", "d": json.dumps(decision)}, {"a": "EnergyAgent", "d": "not json"}],
+        )
+
+    migrate(path, "upgrade")
+
+    with engine.connect() as conn:
+        rows = conn.execute(sa.text(
+            "SELECT decision, throughput_change_percent, energy_change_percent, notes FROM agent_decisions ORDER BY id"
+        )).all()
+        actions = conn.execute(sa.text("SELECT decision_id, machine_id, action, value FROM agent_actions")).all()
+    assert rows[0][1:] == (-5.0, None, "Slow down.")
+    assert json.loads(rows[1][0]) == {"raw_string": "not json"}
+    assert actions == [(1, 2, "reduce_speed", 10.0)]
+
+
+def test_upgrade_gives_existing_machines_version_1(database):
+    path, engine = database
+    migrate(path, "upgrade", "0005")
+    with engine.begin() as conn:
+        conn.execute(sa.text("INSERT INTO machines (name, status, utilization, energy_usage) VALUES ('Press', 'idle', 5, 1)"))
+
+    migrate(path, "upgrade")
+
+    with engine.connect() as conn:
+        assert conn.execute(sa.text("SELECT version FROM machines")).scalar() == 1
@@ -0,0 +1,76 @@
+# backend\tests\test_pagination.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models import db, EnergyPrice, Order
+
+
+def walk(client, url, limit, **filters):
+    """All items of a paged endpoint, following X-Next-Cursor."""
+    items, cursor, pages = [], None, 0
+    while True:
+        params = {**filters, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, query_string=params)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= limit
+        items += page
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return items, pages
+
+
+@pytest.fixture
+def prices(app):
+    """Many prices, several sharing a timestamp, so paging must break ties by id."""
+    EnergyPrice.query.delete()
+    base = datetime(2024, 1, 1)
+    db.session.add_all(
+        EnergyPrice(timestamp=base + timedelta(hours=i // 3), price_per_kwh=round(0.01 * i, 2)) for i in range(50)
+    )
+    db.session.commit()
+    rows = EnergyPrice.query.order_by(EnergyPrice.timestamp.desc(), EnergyPrice.id.desc()).all()
+    return [{"timestamp": p.timestamp.isoformat(), "price_per_kwh": p.price_per_kwh} for p in rows]
+
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 50, 60])
+def test_energy_pages_cover_every_row_once_in_order(client, prices, limit):
+    items, pages = walk(client, "/api/data/energy", limit)
+
+    assert items == prices
+    assert pages == max(1, -(-len(prices) // limit))
+
+
+def test_orders_page_by_deadline_with_filters(client, app):
+    base = datetime(2024, 1, 1)
+    db.session.add_all(
+        Order(customer=f"C{i}", quantity=i, deadline=base + timedelta(days=i % 5), status=("pending", "completed")[i % 2])
+        for i in range(20)
+    )
+    db.session.commit()
+    expected = [
+        o.id for o in Order.query.filter(Order.status == "pending").order_by(Order.deadline, Order.id)
+    ]
+
+    items, _ = walk(client, "/api/data/orders", 3, status="pending")
+
+    assert [o["id"] for o in items] == expected
+    assert {o["status"] for o in items} == {"pending"}
+
+
+def test_page_etag_answers_304(client, prices):
+    first = client.get("/api/data/energy", query_string={"limit": 5})
+    etag = first.headers["ETag"]
+
+    again = client.get("/api/data/energy", query_string={"limit": 5}, headers={"If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.get_data() == b""
+
+
+@pytest.mark.parametrize("query", [{"cursor": "not-a-cursor"}, {"limit": "ten"}, {"start": "yesterday"}])
+def test_bad_paging_arguments_are_rejected(client, prices, query):
+    assert client.get("/api/data/energy", query_string=query).status_code == 400
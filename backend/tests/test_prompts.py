@@ -0,0 +1,54 @@
+# backend\tests\test_prompts.py
+
+import json
+
+from src.config import Config
+from src.utils import prompts
+from src.utils.prompts import RULES, build_messages, prompt_tokens, state_prompt, static_tokens
+
+STATE = {"machines": [{"id": 1, "status": "running", "utilization": 50.0}], "orders": []}
+
+
+def test_state_prompt_is_canonical():
+    reordered = {"orders": [], "machines": [{"utilization": 50.0, "status": "running", "id": 1}]}
+
+    assert state_prompt("EnergyAgent", STATE) == state_prompt("EnergyAgent", reordered)
+    assert state_prompt("EnergyAgent", STATE).startswith("EnergyAgent: Analyze factory state.\n{")
+
+
+def test_everything_before_the_state_is_shared(monkeypatch):
+    monkeypatch.setattr(Config, "PROMPT_FEW_SHOT", False)
+    first = build_messages(state_prompt("EnergyAgent", STATE), "You manage energy.")
+    second = build_messages(state_prompt("EnergyAgent", {**STATE, "orders": [{"id": 2}]}), "You manage energy.")
+
+    assert first[:-1] == second[:-1]
+    assert first[0] == {"role": "system", "content": RULES + "\n\nYou manage energy."}
+    assert build_messages("p", "Another role.")[0]["content"].startswith(RULES)
+
+
+def test_few_shot_examples_go_between_system_and_request(monkeypatch):
+    monkeypatch.setattr(Config, "PROMPT_FEW_SHOT", True)
+    messages = build_messages("request", "role")
+
+    assert [m["role"] for m in messages] == ["system"] + ["user", "assistant"] * 2 + ["user"]
+    assert messages[-1]["content"] == "request"
+    assert json.loads(messages[2]["content"])["actions"][0]["action"] == "reduce_speed"
+
+    messages[1]["content"] = "mutated"
+    assert build_messages("request", "role")[1]["content"] != "mutated"
+
+
+def test_prompt_tokens_split_static_and_dynamic(monkeypatch):
+    monkeypatch.setattr(Config, "PROMPT_FEW_SHOT", False)
+    static_tokens.cache_clear()
+    small = prompt_tokens(state_prompt("EnergyAgent", {}), "role")
+    large = prompt_tokens(state_prompt("EnergyAgent", STATE), "role")
+
+    assert small["static"] == large["static"] > 0
+    assert large["dynamic"] > small["dynamic"]
+    assert large["total"] == large["static"] + large["dynamic"]
+
+    monkeypatch.setattr(Config, "PROMPT_FEW_SHOT", True)
+    static_tokens.cache_clear()
+    assert prompt_tokens("p", "role")["static"] == small["static"] + prompts.FEW_SHOT_TOKENS
+    static_tokens.cache_clear()
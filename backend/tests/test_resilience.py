@@ -0,0 +1,205 @@
+# backend\tests\test_resilience.py
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.config import Config
+from src.services import agent_core
+from src.utils import api_client, resilience
+from src.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ModelError,
+    ModelRateLimitError,
+    ModelSlotTimeout,
+    ModelTransportError,
+    ModelValidationError,
+    backoff_delay,
+    classify_error,
+)
+
+DECISION = {"actions": [], "impact": {"throughput_change_percent": 0, "energy_change_percent": 0, "notes": "ok"}}
+
+
+class ScriptedBackend:
+    """Answers with the next scripted item: an exception to raise or a response to return."""
+
+    model = "scripted"
+
+    def __init__(self, *script, delay=0):
+        self.script = list(script)
+        self.delay = delay
+        self.prompts = []
+
+    def _next(self, messages):
+        self.prompts.append(messages[-1]["content"])
+        item = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def complete(self, messages, validate=None, on_action=None):
+        return self._next(messages)
+
+    async def acomplete(self, messages, validate=None, on_action=None):
+        await asyncio.sleep(self.delay)
+        return self._next(messages)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Install a scripted backend with a fresh circuit breaker and no backoff sleeps."""
+    previous = api_client.get_backend()
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(agent_core.time, "sleep", lambda seconds: None)
+
+    def install(*script, **options):
+        scripted = ScriptedBackend(*script, **options)
+        api_client.set_backend(scripted)
+        return scripted
+
+    yield install
+    api_client.set_backend(previous)
+
+
+def breaker():
+    return resilience.get_breaker(ScriptedBackend.model)
+
+
+@pytest.mark.parametrize(
+    "exc, kind",
+    [
+        (httpx.ConnectError("refused"), "transport"),
+        (ValueError("bad json"), "validation"),
+        (ModelRateLimitError("slow down", retry_after=2), "rate_limit"),
+        (RuntimeError("?"), "fatal"),
+    ],
+)
+def test_classify_error(exc, kind):
+    assert classify_error(exc).kind == kind
+
+
+def test_backoff_honours_retry_after_and_cap(monkeypatch):
+    monkeypatch.setattr(Config, "MODEL_BACKOFF_CAP", 8)
+    monkeypatch.setattr(Config, "MODEL_BACKOFF_BASE", 0.5)
+
+    assert backoff_delay(1, retry_after=3) == 3
+    assert backoff_delay(1, retry_after=60) == 8
+    assert all(0 <= backoff_delay(3) <= 2 for _ in range(100))
+    assert all(0 <= backoff_delay(10) <= 8 for _ in range(100))
+
+
+def test_breaker_opens_then_lets_one_trial_through(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    circuit = CircuitBreaker("m", failure_threshold=2, reset_timeout=30)
+
+    assert circuit.before_call() is False
+    circuit.record_failure()
+    circuit.record_failure()
+    with pytest.raises(CircuitOpenError):
+        circuit.before_call()
+
+    clock[0] += 31
+    assert circuit.before_call() is True  # the trial
+    with pytest.raises(CircuitOpenError):
+        circuit.before_call()  # only one at a time
+    circuit.record_failure()
+    assert circuit.state == "open"
+
+    clock[0] += 31
+    assert circuit.before_call() is True
+    circuit.record_success()
+    assert (circuit.state, circuit.failures) == ("closed", 0)
+
+
+def test_transport_errors_trip_the_breaker_but_rate_limits_do_not(app, backend, monkeypatch):
+    monkeypatch.setattr(breaker(), "failure_threshold", 2)
+    backend(ModelRateLimitError("busy"), ModelRateLimitError("busy"), ModelRateLimitError("busy"))
+    for _ in range(3):
+        with pytest.raises(ModelRateLimitError):
+            api_client.query_model("p", "role")
+    assert breaker().state == "closed"
+
+    backend(ModelTransportError("down"))
+    for _ in range(2):
+        with pytest.raises(ModelTransportError):
+            api_client.query_model("p", "role")
+    with pytest.raises(CircuitOpenError):
+        api_client.query_model("p", "role")
+
+
+def test_cancelled_trial_hands_the_trial_on(app, backend):
+    backend(json.dumps(DECISION), delay=5)
+    breaker().state = "open"
+
+    async def cancel_trial():
+        task = asyncio.create_task(api_client.aquery_model("p", "role"))
+        await asyncio.sleep(0.05)
+        assert breaker().state == "half_open"
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+
+    assert breaker().state == "open"
+    assert breaker().before_call() is True  # the next caller gets the trial
+
+
+def test_slot_timeout_leaves_the_breaker_alone(app, backend, monkeypatch):
+    backend(json.dumps(DECISION))
+    monkeypatch.setattr(Config, "MODEL_TIMEOUT", 0.01)
+    taken = 0
+    while resilience._model_slots.acquire(blocking=False):
+        taken += 1
+    try:
+        breaker().state = "open"
+        with pytest.raises(ModelSlotTimeout):
+            api_client.query_model("p", "role")
+        assert breaker().state == "open"
+
+        breaker().state = "closed"
+        with pytest.raises(ModelSlotTimeout):
+            api_client.query_model("p", "role")
+        assert (breaker().state, breaker().failures) == ("closed", 0)
+    finally:
+        for _ in range(taken):
+            resilience._model_slots.release()
+
+
+def test_run_agent_retries_transport_errors(app, backend):
+    scripted = backend(ModelTransportError("reset"), json.dumps(DECISION))
+
+    assert agent_core.run_agent("EnergyAgent", {"machines": []}) == DECISION
+    assert len(scripted.prompts) == 2
+
+
+def test_run_agent_repairs_invalid_answers(app, backend):
+    scripted = backend("I think we should slow down.", json.dumps(DECISION))
+
+    assert agent_core.run_agent("EnergyAgent", {"machines": []}) == DECISION
+    assert "Your previous response was rejected" in scripted.prompts[1]
+
+
+def test_run_agent_stops_on_fatal_errors_with_fallback(app, backend):
+    scripted = backend(ModelError("401 unauthorized"))
+
+    decision = agent_core.run_agent("EnergyAgent", {"machines": []})
+
+    assert decision["actions"] == []
+    assert decision["impact"]["notes"] == "API error: 401 unauthorized"
+    assert len(scripted.prompts) == 1
+
+
+def test_run_agent_gives_up_after_max_attempts(app, backend, monkeypatch):
+    monkeypatch.setattr(Config, "MODEL_MAX_ATTEMPTS", 3)
+    scripted = backend(ModelTransportError("down"))
+
+    decision = agent_core.run_agent("EnergyAgent", {"machines": []})
+
+    assert decision["actions"] == []
+    assert len(scripted.prompts) == 3
@@ -0,0 +1,100 @@
+# backend\tests\test_scheduler.py
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func
+
+from src.models import db, EnergyPrice, Machine
+from src.services.scheduler import AgentScheduler, parse_schedule
+from src.services.snapshot import invalidate_snapshot
+
+T0 = 1000.0
+
+
+@pytest.fixture
+def make_scheduler(app, monkeypatch):
+    """An AgentScheduler for `schedule` whose runs are recorded instead of calling agents."""
+
+    def make(schedule, max_runs_per_minute=6, min_gap=30):
+        instance = AgentScheduler()
+        instance.app = app
+        instance.schedule = schedule
+        instance.max_runs_per_minute = max_runs_per_minute
+        instance.min_gap = min_gap
+        instance._state = {agent: instance._agent_state(T0) for agent in schedule}
+        instance.runs = []
+        monkeypatch.setattr(instance, "_run", instance.runs.append)
+        return instance
+
+    invalidate_snapshot()
+    return make
+
+
+def change_machine(machine_id, **fields):
+    machine = db.session.get(Machine, machine_id)
+    for name, value in fields.items():
+        setattr(machine, name, value)
+    db.session.commit()
+    invalidate_snapshot()
+
+
+def test_parse_schedule():
+    assert parse_schedule("ProductionAgent=300, EnergyAgent=600,,Broken=") == {
+        "ProductionAgent": 300.0,
+        "EnergyAgent": 600.0,
+    }
+
+
+def test_agents_run_on_their_cadence(make_scheduler):
+    sched = make_scheduler({"EnergyAgent": 600, "ProductionAgent": 300})
+
+    assert sched.tick(T0)["ran"] == ["EnergyAgent", "ProductionAgent"]
+    change_machine(1, utilization=76)  # below the jump threshold: not a trigger
+    assert sched.tick(T0 + 299)["ran"] == []
+    assert sched.tick(T0 + 300)["ran"] == ["ProductionAgent"]
+    assert sched.tick(T0 + 600)["ran"] == ["EnergyAgent"]
+
+
+def test_due_agent_is_skipped_when_nothing_changed(make_scheduler):
+    sched = make_scheduler({"EnergyAgent": 600})
+    sched.tick(T0)
+
+    result = sched.tick(T0 + 600)
+
+    assert result["skipped"] == ["EnergyAgent"]
+    assert sched.runs == [["EnergyAgent"]]
+    assert sched.status()["agents"]["EnergyAgent"]["skipped_unchanged"] == 1
+
+
+def test_change_events_wake_the_agents_that_care(make_scheduler):
+    sched = make_scheduler({"EnergyAgent": 600, "MaintenanceAgent": 900})
+    sched.tick(T0)
+
+    change_machine(4, status="idle")
+    assert sched.tick(T0 + 40)["ran"] == ["MaintenanceAgent"]
+
+    latest = db.session.query(func.max(EnergyPrice.timestamp)).scalar()
+    db.session.add(EnergyPrice(timestamp=latest + timedelta(hours=1), price_per_kwh=5.0))  # above the threshold
+    db.session.commit()
+    invalidate_snapshot()
+    assert sched.tick(T0 + 80)["ran"] == ["EnergyAgent"]
+
+
+def test_triggers_respect_the_min_gap(make_scheduler):
+    sched = make_scheduler({"MaintenanceAgent": 900}, min_gap=30)
+    sched.tick(T0)
+
+    change_machine(4, status="idle")
+    assert sched.tick(T0 + 10)["ran"] == []
+    assert sched.status()["agents"]["MaintenanceAgent"]["pending_triggers"] == ["status_change"]
+    assert sched.tick(T0 + 30)["ran"] == ["MaintenanceAgent"]
+
+
+def test_runs_beyond_the_per_minute_budget_are_deferred(make_scheduler):
+    sched = make_scheduler({"EnergyAgent": 600, "ProductionAgent": 300}, max_runs_per_minute=1)
+
+    assert sched.tick(T0) == {"ran": ["EnergyAgent"], "skipped": [], "deferred": ["ProductionAgent"]}
+    assert sched.tick(T0 + 30)["deferred"] == ["ProductionAgent"]
+    assert sched.tick(T0 + 61)["ran"] == ["ProductionAgent"]
+    assert sched.status()["agents"]["ProductionAgent"]["deferred_rate_limited"] == 2
@@ -0,0 +1,146 @@
+# backend\tests\test_sim_engine.py
+
+import random
+
+import numpy as np
+import pytest
+
+from src.config import Config
+from src.models import db, Machine
+from src.services import sim_engine
+from src.services.machine_state import update_machine_versioned
+from src.services.sim_engine import FactorySim, get_engine
+from src.services.simulation import fold_action
+from src.services.snapshot import get_snapshot
+
+
+def sim(seed=0):
+    return FactorySim(
+        [1, 2, 3], ["running", "idle", "running"], [50.0, 20.0, 95.0], [5.0, 1.0, 9.0], seed=seed
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_apply_actions_matches_sequential_fold(seed):
+    rng = random.Random(seed)
+    actions = [
+        {
+            "machine_id": rng.choice([1, 2, 3, "3", 7]),
+            "action": rng.choice(["increase_speed", "reduce_speed", "schedule_maintenance", "reassign_job"]),
+            "value": rng.choice([5, 12.5, 40, "x"]),
+        }
+        for _ in range(rng.randint(1, 15))
+    ]
+    engine = sim()
+    expected = {1: ("running", 50.0), 2: ("idle", 20.0), 3: ("running", 95.0)}
+    for action in actions:
+        mid = int(action["machine_id"])
+        if mid in expected:
+            expected[mid] = fold_action(*expected[mid], action["action"], action["value"])
+
+    engine.apply_actions(actions)
+
+    assert engine.utilization.tolist() == pytest.approx([expected[mid][1] for mid in (1, 2, 3)])
+    assert [engine.status[i] == sim_engine.MAINTENANCE for i in range(3)] == [
+        expected[mid][0] == "maintenance" for mid in (1, 2, 3)
+    ]
+
+
+def test_same_seed_gives_same_run():
+    first, second = sim(seed=7), sim(seed=7)
+
+    assert [first.step(0.25) or first.utilization.tolist() for _ in range(8)] == [
+        second.step(0.25) or second.utilization.tolist() for _ in range(8)
+    ]
+
+
+def test_maintenance_ends_and_machine_resumes():
+    engine = sim()
+    engine.apply_actions([{"machine_id": 1, "action": "schedule_maintenance"}])
+    assert engine.status[0] == sim_engine.MAINTENANCE
+
+    for _ in range(int(Config.SIM_MAINTENANCE_HOURS * 4)):
+        engine.step(0.25)
+
+    assert engine.status[0] == sim_engine.RUNNING
+
+
+def test_fork_leaves_parent_untouched():
+    parent = sim()
+    before = parent.utilization.copy()
+
+    child = parent.fork(seed=1)
+    child.apply_actions([{"machine_id": 1, "action": "reduce_speed", "value": 30}])
+    child.step(1)
+
+    assert np.array_equal(parent.utilization, before)
+    assert child.utilization[0] != before[0]
+    with pytest.raises(RuntimeError):
+        child.checkpoint()
+
+
+def test_checkpoint_writes_changes_and_bumps_versions(app):
+    engine = FactorySim.from_db(seed=0)
+    engine.apply_actions([{"machine_id": 2, "action": "increase_speed", "value": 10}])
+
+    machines, _ = engine.checkpoint()
+    db.session.expire_all()
+
+    row = db.session.get(Machine, 2)
+    assert machines == 1
+    assert (row.utilization, row.version) == (40.0, 2)
+    assert engine.version == get_snapshot().version
+
+
+def test_checkpoint_keeps_concurrent_writes_and_reloads(app):
+    engine = FactorySim.from_db(seed=0)
+    engine.apply_actions([
+        {"machine_id": 1, "action": "reduce_speed", "value": 5},
+        {"machine_id": 2, "action": "increase_speed", "value": 5},
+    ])
+    update_machine_versioned(1, lambda current: {"utilization": 12.0})
+
+    engine.checkpoint()
+    db.session.expire_all()
+
+    assert db.session.get(Machine, 1).utilization == 12.0
+    assert db.session.get(Machine, 2).utilization == 35.0
+    assert engine.version is None  # reloaded by the next get_engine()
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [[], "x", 3, {"actions": "abc"}, {"actions": [1]}, {"actions": {"machine_id": 1}}, {"hours": "soon"}, {"hours": 0}],
+)
+def test_run_rejects_bad_payloads(client, payload):
+    response = client.post("/api/simulation/run", json=payload)
+
+    assert response.status_code == 400
+
+
+def test_run_applies_actions_and_checkpoints(client):
+    response = client.post(
+        "/api/simulation/run",
+        json={"hours": 2, "tick_minutes": 30, "actions": [{"machine_id": 3, "action": "schedule_maintenance"}]},
+    )
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["applied_actions"] == 1
+    assert len(body["timeline"]) == 2
+    db.session.expire_all()
+    assert db.session.get(Machine, 3).status == "maintenance"
+
+
+@pytest.mark.parametrize("seed", [-1, 1.5, "1", True])
+def test_reset_rejects_bad_seeds(client, seed):
+    assert client.post("/api/simulation/reset", json={"seed": seed}).status_code == 400
+
+
+def test_reset_reloads_from_database(client):
+    with sim_engine.engine_lock:
+        get_engine().apply_actions([{"machine_id": 1, "action": "schedule_maintenance"}])
+
+    summary = client.post("/api/simulation/reset", json={"seed": 3}).get_json()
+
+    assert summary["machines"] == {"idle": 1, "running": 2, "maintenance": 1}
@@ -0,0 +1,95 @@
+# backend\tests\test_simulation.py
+
+import random
+
+import pytest
+from sqlalchemy import select
+
+from src.models import db, Machine, Order
+from src.services.simulation import apply_actions
+
+ACTIONS = ("increase_speed", "reduce_speed", "schedule_maintenance", "reassign_job", "noop", None)
+MACHINE_IDS = (1, 2, 3, 4, "2", " 3", 99, None, "x", 1.0)
+VALUES = (5, 30.5, "12", 80, 150, -20, "x", None, "high", "order-7")
+
+
+def machines():
+    return {mid: (status, util) for mid, status, util in db.session.execute(
+        select(Machine.id, Machine.status, Machine.utilization).order_by(Machine.id)
+    )}
+
+
+def orders():
+    return db.session.execute(select(Order.id, Order.status).order_by(Order.id)).all()
+
+
+def apply_sequentially(actions, state, order_statuses):
+    """The original one-action-at-a-time semantics of apply_actions, on plain dicts."""
+    updates = []
+    for action in actions:
+        try:
+            mid = int(action.get("machine_id"))
+        except Exception:
+            continue
+        if mid not in state:
+            continue
+        status, utilization = state[mid]
+        act, value = action.get("action"), action.get("value")
+        try:
+            val = float(value)
+        except Exception:
+            val = 0
+        if act == "increase_speed":
+            utilization = min(100, utilization + val)
+        elif act == "reduce_speed":
+            utilization = max(0, utilization - val)
+        elif act == "schedule_maintenance":
+            status = "maintenance"
+        elif act == "reassign_job" and order_statuses:
+            order_statuses[min(order_statuses)] = "in_progress"
+        state[mid] = (status, utilization)
+        updates.append({"machine_id": mid, "new_status": status, "new_utilization": utilization})
+    return updates
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_batched_apply_matches_sequential_semantics(app, seed):
+    rng = random.Random(seed)
+    actions = [
+        {"machine_id": rng.choice(MACHINE_IDS), "action": rng.choice(ACTIONS), "value": rng.choice(VALUES)}
+        for _ in range(rng.randint(0, 12))
+    ]
+    expected_machines = machines()
+    expected_orders = dict(orders())
+    expected = apply_sequentially(actions, expected_machines, expected_orders)
+
+    updates = apply_actions(actions)
+    db.session.expire_all()
+
+    assert updates == pytest.approx(expected)
+    assert machines() == pytest.approx(expected_machines)
+    assert dict(orders()) == expected_orders
+
+
+def test_reassign_to_unknown_machine_leaves_orders_alone(app):
+    before = orders()
+
+    assert apply_actions([{"machine_id": 99, "action": "reassign_job", "value": "order-1"}]) == []
+    assert orders() == before
+
+
+def test_apply_bumps_version_only_for_machines_that_change(app):
+    versions = dict(db.session.execute(select(Machine.id, Machine.version)).all())
+
+    apply_actions([
+        {"machine_id": 1, "action": "increase_speed", "value": 5},
+        {"machine_id": 1, "action": "reduce_speed", "value": 2},
+        {"machine_id": 2, "action": "schedule_maintenance", "value": None},
+        {"machine_id": 3, "action": "reassign_job", "value": 1},
+        {"machine_id": 4, "action": "schedule_maintenance", "value": None},  # already in maintenance
+        {"machine_id": 4, "action": "reduce_speed", "value": 10},  # already at 0
+    ])
+    db.session.expire_all()
+
+    after = dict(db.session.execute(select(Machine.id, Machine.version)).all())
+    assert {mid: after[mid] - versions[mid] for mid in after} == {1: 1, 2: 1, 3: 0, 4: 0}
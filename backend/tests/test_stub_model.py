@@ -0,0 +1,86 @@
+# backend\tests\test_stub_model.py
+
+import json
+
+import pytest
+
+from src.config import Config
+from src.utils.prompts import build_messages, state_prompt
+from src.utils.resilience import ModelRateLimitError, ModelTransportError
+from src.utils.stub_model import StubBackend
+
+STATE = {
+    "machines": [
+        {"id": 1, "name": "Lathe", "status": "running", "utilization": 40, "energy_usage": 9},
+        {"id": 2, "name": "Mill", "status": "idle", "utilization": 10, "energy_usage": 2},
+        {"id": 3, "name": "Press", "status": "running", "utilization": 97, "energy_usage": 15},
+    ],
+    "orders": [{"id": 7, "customer": "A", "quantity": 5, "deadline": "2030-01-01T00:00:00", "status": "pending"}],
+    "energy_prices": [
+        {"timestamp": "2030-01-01T00:00:00", "price_per_kwh": 0.10},
+        {"timestamp": "2030-01-01T01:00:00", "price_per_kwh": 0.30},
+    ],
+}
+
+
+def ask(backend, agent, state=STATE):
+    return json.loads(backend.complete(build_messages(state_prompt(agent, state), "role")))
+
+
+@pytest.fixture(autouse=True)
+def plain_answers(monkeypatch):
+    monkeypatch.setattr(Config, "MODEL_STREAM", False)
+
+
+def test_same_state_gives_the_same_decision():
+    backend = StubBackend()
+    shuffled = {**STATE, "machines": list(reversed(STATE["machines"]))}
+
+    assert ask(backend, "ProductionAgent") == ask(StubBackend(seed=5), "ProductionAgent", shuffled)
+
+
+@pytest.mark.parametrize(
+    "agent, actions",
+    [
+        ("ProductionAgent", [(1, "increase_speed"), (3, "reduce_speed"), (2, "reassign_job")]),
+        ("EnergyAgent", [(3, "reduce_speed"), (1, "reduce_speed")]),
+        ("QualityAgent", [(3, "reduce_speed")]),
+        ("MaintenanceAgent", [(3, "schedule_maintenance")]),
+        ("SupplyChainAgent", [(2, "reassign_job")]),
+        ("UnknownAgent", []),
+    ],
+)
+def test_agent_policies(agent, actions):
+    decision = ask(StubBackend(), agent)
+
+    assert [(a["machine_id"], a["action"]) for a in decision["actions"]] == actions
+
+
+def test_compacted_state_is_understood():
+    machines = STATE["machines"]
+    compact = {
+        **STATE,
+        "machines": {"cols": list(machines[0]), "rows": [list(m.values()) for m in machines]},
+    }
+
+    assert ask(StubBackend(), "QualityAgent", compact) == ask(StubBackend(), "QualityAgent")
+
+
+def test_injected_failures_are_repeatable():
+    def outcomes(backend):
+        results = []
+        for _ in range(200):
+            try:
+                answer = backend.complete(build_messages(state_prompt("QualityAgent", STATE), "role"))
+                results.append("ok" if answer.startswith("{") else "invalid")
+            except ModelRateLimitError:
+                results.append("rate_limit")
+            except ModelTransportError:
+                results.append("transport")
+        return results
+
+    first = outcomes(StubBackend(failure_rate=0.3, invalid_rate=0.2, seed=42))
+
+    assert first == outcomes(StubBackend(failure_rate=0.3, invalid_rate=0.2, seed=42))
+    assert {"ok", "invalid", "transport", "rate_limit"} == set(first)
+    assert 40 <= first.count("invalid") + first.count("transport") <= 120
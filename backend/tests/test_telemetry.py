@@ -0,0 +1,137 @@
+# backend\tests\test_telemetry.py
+
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from src.blueprints import data
+from src.models import db, Machine, MachineTelemetry
+from src.services.telemetry import (
+    BINARY_RECORD, STATUS_UNSET, TelemetryBuffer, TelemetryBufferFull, parse_binary, parse_ndjson,
+    write_readings,
+)
+
+T = datetime(2030, 1, 1, 12, 0)  # 1893499200 as unix seconds
+
+
+def ndjson(*items):
+    return "\n".join(json.dumps(item) for item in items)
+
+
+def machine(machine_id):
+    db.session.expire_all()
+    return db.session.get(Machine, machine_id)
+
+
+def test_parse_ndjson():
+    body = ndjson(
+        {"machine_id": 1, "ts": "2030-01-01T13:00:00+01:00", "utilization": 50, "status": "idle"},
+        {"machine_id": "2", "ts": 1893499200, "energy_usage": 3.5},
+    ) + "\n\n"
+
+    assert parse_ndjson(body) == [
+        (1, T, 50.0, None, "idle"),
+        (2, T, None, 3.5, None),
+    ]
+
+
+@pytest.mark.parametrize(
+    "line",
+    ['{"ts": 0}', '{"machine_id": 1, "status": "on fire"}', "not json", '{"machine_id": 1, "ts": "yesterday"}'],
+)
+def test_parse_ndjson_rejects_bad_lines(line):
+    with pytest.raises(ValueError, match="line 2"):
+        parse_ndjson(ndjson({"machine_id": 1}) + "\n" + line)
+
+
+def test_parse_binary():
+    records = np.array(
+        [(1, 1893499200, 50, np.nan, 1), (2, 1893499200, np.nan, 3.5, STATUS_UNSET)],
+        dtype=BINARY_RECORD,
+    )
+
+    assert parse_binary(records.tobytes()) == [
+        (1, T, 50.0, None, "running"),
+        (2, T, None, 3.5, None),
+    ]
+    with pytest.raises(ValueError, match="multiple"):
+        parse_binary(records.tobytes()[:-1])
+    records[1]["status"] = 7
+    with pytest.raises(ValueError, match="status"):
+        parse_binary(records.tobytes())
+
+
+def test_write_readings_keeps_history_and_newest_values(app):
+    result = write_readings(
+        [
+            (1, T.replace(minute=5), 80.0, None, None),
+            (1, T, 10.0, 2.0, "idle"),
+            (2, T, None, None, "running"),
+        ]
+    )
+
+    assert result == {"readings": 3, "machines": 2}
+    lathe = machine(1)
+    assert (lathe.utilization, lathe.energy_usage, lathe.status) == (80.0, 2.0, "idle")
+    assert lathe.last_seen_at == T.replace(minute=5)
+    assert machine(2).status == "running"
+    assert db.session.query(MachineTelemetry).count() == 3
+
+
+def test_out_of_order_batch_does_not_roll_machines_back(app):
+    write_readings([(1, T, 80.0, None, "running")])
+    version = machine(1).version
+
+    result = write_readings([(1, T.replace(hour=11), 5.0, None, "idle")])
+
+    assert result["machines"] == 0
+    assert (machine(1).utilization, machine(1).status, machine(1).version) == (80.0, "running", version)
+    assert db.session.query(MachineTelemetry).count() == 2  # still kept as history
+
+
+def test_buffer_refuses_more_than_max_buffered(app):
+    buffer = TelemetryBuffer(flush_interval=60, max_buffered=2)
+    buffer.app = app
+
+    assert buffer.add([(1, T, 1.0, None, None)]) == 1
+    with pytest.raises(TelemetryBufferFull):
+        buffer.add([(1, T, 2.0, None, None), (2, T, 3.0, None, None)])
+    assert buffer.flush() == {"readings": 1, "machines": 1}
+    buffer.shutdown()
+
+
+def test_ingest_endpoint_rejects_unknown_machines_and_flushes(client):
+    body = ndjson({"machine_id": 3, "ts": T.isoformat(), "utilization": 42}, {"machine_id": 99, "utilization": 1})
+
+    response = client.post("/api/data/telemetry?flush=1", data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == 202
+    assert response.json["accepted"] == 1 and response.json["rejected"] == 1
+    assert response.json["written"]["readings"] >= 1
+    history = client.get("/api/data/machines/3/telemetry").json
+    assert history[0] == {"ts": T.isoformat(), "utilization": 42.0, "energy_usage": None, "status": None}
+
+
+def test_ingest_endpoint_accepts_binary_batches(client):
+    record = np.array([(4, 1893499200, 12.5, np.nan, 0)], dtype=BINARY_RECORD)
+
+    response = client.post(
+        "/api/data/telemetry?flush=1", data=record.tobytes(), content_type="application/octet-stream"
+    )
+
+    assert response.status_code == 202
+    assert (machine(4).utilization, machine(4).status) == (12.5, "idle")
+
+
+def test_ingest_endpoint_answers_400_and_503(client, app, monkeypatch):
+    assert client.post("/api/data/telemetry", data="{oops").status_code == 400
+
+    full = TelemetryBuffer(max_buffered=0)
+    full.app = app
+    monkeypatch.setattr(data, "telemetry_buffer", full)
+    response = client.post("/api/data/telemetry", data=ndjson({"machine_id": 1}))
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
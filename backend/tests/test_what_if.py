@@ -0,0 +1,64 @@
+# backend\tests\test_what_if.py
+
+import pytest
+
+from src.models import db, Machine
+from src.services.what_if import base_simulation, evaluate_actions, evaluate_proposals
+
+
+def test_no_actions_matches_the_baseline(app):
+    result = evaluate_actions([], horizon_hours=4)
+
+    assert result["applied_actions"] == 0
+    assert result["throughput_change_percent"] == 0
+    assert result["energy_change_percent"] == 0
+    assert result["deadline_risk"]["delta"] == 0
+
+
+def test_proposals_are_compared_on_the_same_noise(app):
+    results = evaluate_proposals(
+        {
+            "slower": [{"machine_id": 1, "action": "reduce_speed", "value": 40}],
+            "faster": [{"machine_id": 2, "action": "increase_speed", "value": 40}],
+            "idle": [],
+        },
+        horizon_hours=4,
+    )
+
+    assert results["slower"]["throughput_change_percent"] < 0
+    assert results["slower"]["energy_change_percent"] < 0
+    assert results["faster"]["applied_actions"] == 1
+    assert results["idle"]["throughput_change_percent"] == 0
+    # Repeating the evaluation gives the same numbers
+    assert evaluate_proposals({"slower": [{"machine_id": 1, "action": "reduce_speed", "value": 40}]}, 4) == {
+        "slower": results["slower"]
+    }
+
+
+def test_evaluation_writes_nothing(app):
+    before = [(m.id, m.status, m.utilization, m.version) for m in Machine.query.order_by(Machine.id)]
+    base_utilization = base_simulation().utilization.copy()
+
+    evaluate_actions([{"machine_id": 3, "action": "schedule_maintenance"}], horizon_hours=8)
+    db.session.expire_all()
+
+    assert [(m.id, m.status, m.utilization, m.version) for m in Machine.query.order_by(Machine.id)] == before
+    assert (base_simulation().utilization == base_utilization).all()
+
+
+def test_evaluate_endpoint(client):
+    response = client.post(
+        "/api/agents/evaluate",
+        json={"proposals": {"a": [{"machine_id": 1, "action": "reduce_speed", "value": 10}], "b": []}},
+    )
+
+    assert response.status_code == 200
+    assert set(response.get_json()) == {"a", "b"}
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [[], "x", {"actions": "abc"}, {"actions": [1]}, {"proposals": []}, {"proposals": {"a": [None]}}],
+)
+def test_evaluate_rejects_bad_payloads(client, payload):
+    assert client.post("/api/agents/evaluate", json=payload).status_code == 400
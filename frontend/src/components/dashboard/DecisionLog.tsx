@@ -1,10 +1,15 @@
-import type { AgentDecision } from "../../lib/types";
+import type { AgentDecision, DecisionPayload } from "../../lib/types";
 import { Clock, Zap, Activity, List, MessageSquare } from "lucide-react";
 
-type ParsedDecision = {
-	actions?: Array<{ action: string; machine_id?: string | number; value?: string | number }>;
-	impact?: { energy_change_percent?: number; throughput_change_percent?: number; notes?: string };
-};
+// Decisions arrive as objects; strings only come from older backends
+function parseDecision(decision: AgentDecision["decision"] | string): DecisionPayload | null {
+	if (typeof decision !== "string") return decision ?? null;
+	try {
+		return JSON.parse(decision) as DecisionPayload;
+	} catch {
+		return null;
+	}
+}
 
 function ImpactPill({ icon, children, color }: { icon: React.ReactElement; children: React.ReactNode; color?: string }) {
 	return (
@@ -27,12 +32,7 @@ export default function DecisionLog({ decisions }: { decisions: AgentDecision[]
 
 			<ul className="max-h-56 overflow-y-auto space-y-3">
 				{decisions.map((d) => {
-					let parsed: ParsedDecision | null = null;
-					try {
-						parsed = JSON.parse(d.decision) as ParsedDecision;
-					} catch {
-						parsed = null;
-					}
+					const parsed = parseDecision(d.decision);
 
 					return (
 						<li
@@ -86,7 +86,7 @@ export default function DecisionLog({ decisions }: { decisions: AgentDecision[]
 												</div>
 											</div>
 										) : (
-											<pre className="bg-slate-100 text-xs p-2 rounded-md overflow-x-auto">{typeof d.decision === 'string' ? d.decision : JSON.stringify(d.decision, null, 2)}</pre>
+											<pre className="bg-slate-100 text-xs p-2 rounded-md overflow-x-auto">{String(d.decision)}</pre>
 										)}
 									</div>
 								</div>
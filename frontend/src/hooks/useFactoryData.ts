@@ -8,10 +8,20 @@ import type {
 	EnergyPrice,
 	AgentDecision,
 	DecisionEvent,
-	StateUpdateEvent,
+	MachineDeltaEvent,
 } from "../lib/types";
 import { subscribeToEvents } from "../lib/sse";
 
+async function loadFactoryData() {
+	const [machines, orders, energy, decisions] = await Promise.all([
+		getMachines(),
+		getOrders(),
+		getEnergy(),
+		getDecisions(),
+	]);
+	return { machines, orders, energy, decisions };
+}
+
 export function useFactoryData() {
 	const [machines, setMachines] = useState<Machine[]>([]);
 	const [orders, setOrders] = useState<Order[]>([]);
@@ -24,16 +34,11 @@ export function useFactoryData() {
 		async function fetchInitial() {
 			setLoading(true);
 			try {
-				const [m, o, e, d] = await Promise.all([
-					getMachines(),
-					getOrders(),
-					getEnergy(),
-					getDecisions(),
-				]);
-				setMachines(m);
-				setOrders(o);
-				setEnergy(e);
-				setDecisions(d);
+				const data = await loadFactoryData();
+				setMachines(data.machines);
+				setOrders(data.orders);
+				setEnergy(data.energy);
+				setDecisions(data.decisions);
 			} catch (err) {
 				console.error("Failed to fetch initial data", err);
 			} finally {
@@ -48,37 +53,36 @@ export function useFactoryData() {
 		const evtSource = subscribeToEvents((event: MessageEvent) => {
 			if (event.type === "decision") {
 				const data: DecisionEvent = JSON.parse(event.data);
-				// normalize decision to a JSON string so components that expect a string
-				// (from initial fetch) don't receive a raw object from SSE
-				const decisionString =
-					typeof data.decision === "string"
-						? data.decision
-						: JSON.stringify(data.decision);
 
 				setDecisions((prev) => [
 					{
 						id: Date.now(),
 						agent: data.agent,
-						decision: decisionString,
+						decision: data.decision,
 						created_at: data.created_at,
 					},
 					...prev,
 				]);
 			}
 
+			// Events were missed: deltas can't be trusted until everything is refetched
+			if (event.type === "resync") {
+				loadFactoryData()
+					.then((data) => {
+						setMachines(data.machines);
+						setOrders(data.orders);
+						setEnergy(data.energy);
+						setDecisions(data.decisions);
+					})
+					.catch((err) => console.error("Failed to refetch data after resync", err));
+			}
 
-			if (event.type === "state_update") {
-				const data: StateUpdateEvent[] = JSON.parse(event.data);
+			if (event.type === "machine_delta") {
+				const data: MachineDeltaEvent = JSON.parse(event.data);
 				setMachines((prev) =>
 					prev.map((m) => {
-						const upd = data.find((u) => u.machine_id === m.id);
-						return upd
-							? {
-									...m,
-									status: upd.new_status as Machine["status"],
-									utilization: upd.new_utilization,
-							  }
-							: m;
+						const upd = data.machines.find((u) => u.machine_id === m.id);
+						return upd ? { ...m, ...upd.changes } : m;
 					})
 				);
 			}
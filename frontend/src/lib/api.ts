@@ -6,6 +6,23 @@ const api = axios.create({
 	baseURL: API_BASE_URL,
 });
 
+// Energy readings the dashboard chart shows
+const ENERGY_HISTORY_POINTS = 48;
+// Largest page the data endpoints serve (API_MAX_PAGE_SIZE)
+const MAX_PAGE_SIZE = 1000;
+
+// Fetch every page of a keyset-paginated list, following X-Next-Cursor
+async function getAllPages<T>(path: string): Promise<T[]> {
+	const items: T[] = [];
+	let cursor: string | undefined;
+	do {
+		const res = await api.get(path, { params: { limit: MAX_PAGE_SIZE, cursor } });
+		items.push(...res.data);
+		cursor = res.headers["x-next-cursor"];
+	} while (cursor);
+	return items;
+}
+
 // ---- Data fetchers ----
 export async function getMachines(): Promise<Machine[]> {
 	const res = await api.get("/data/machines");
@@ -13,13 +30,13 @@ export async function getMachines(): Promise<Machine[]> {
 }
 
 export async function getOrders(): Promise<Order[]> {
-	const res = await api.get("/data/orders");
-	return res.data;
+	return getAllPages<Order>("/data/orders");
 }
 
+// The latest readings, oldest first (the API pages newest first)
 export async function getEnergy(): Promise<EnergyPrice[]> {
-	const res = await api.get("/data/energy");
-	return res.data;
+	const res = await api.get("/data/energy", { params: { limit: ENERGY_HISTORY_POINTS } });
+	return [...res.data].reverse();
 }
 
 export async function getDecisions(): Promise<AgentDecision[]> {
@@ -13,8 +13,14 @@ export function subscribeToEvents(onEvent: (event: MessageEvent) => void) {
 		onEvent(e);
 	});
 
-	evtSource.addEventListener("state_update", (e) => {
-		console.log("State update:", JSON.parse(e.data));
+	// the client missed events (slow, reconnected to another worker, bus reconnect): refetch
+	evtSource.addEventListener("resync", (e) => {
+		console.log("Resync requested:", JSON.parse(e.data));
+		onEvent(e);
+	});
+
+	// coalesced per-machine changes (only changed fields unless `full`)
+	evtSource.addEventListener("machine_delta", (e) => {
 		onEvent(e);
 	});
 
@@ -24,11 +24,21 @@ export interface EnergyPrice {
 	price_per_kwh: number;
 }
 
+// Agent decision document (actions + impact) as returned by the agent
+export interface DecisionPayload {
+	actions?: Array<{ action: string; machine_id?: string | number; value?: string | number }>;
+	impact?: { energy_change_percent?: number; throughput_change_percent?: number; notes?: string };
+	[key: string]: unknown;
+}
+
 // Agent decision record
 export interface AgentDecision {
 	id: number;
 	agent: string;
-	decision: string; // JSON string stored in DB
+	decision: DecisionPayload; // stored as JSON(B), returned as an object
+	throughput_change_percent?: number | null;
+	energy_change_percent?: number | null;
+	notes?: string | null;
 	created_at: string;
 }
 
@@ -36,13 +46,20 @@ export interface AgentDecision {
 // SSE event payloads
 export interface DecisionEvent {
 	agent: string;
-	decision: Record<string, unknown>; // actual JSON object from SSE
+	decision: DecisionPayload;
 	created_at: string;
 }
 
 
-export interface StateUpdateEvent {
+export interface MachineDelta {
 	machine_id: number;
-	new_status: string;
-	new_utilization: number;
+	version: number;
+	base?: number; // version this delta applies to
+	full?: boolean; // true when `changes` holds the whole record
+	changes: Partial<Omit<Machine, "id">>;
+}
+
+export interface MachineDeltaEvent {
+	keyframe: boolean;
+	machines: MachineDelta[];
 }
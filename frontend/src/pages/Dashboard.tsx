@@ -7,9 +7,8 @@ import EnergyChart from "../components/dashboard/EnergyChart";
 import DecisionLog from "../components/dashboard/DecisionLog";
 import ControlPanel from "../components/dashboard/ControlPanel";
 import { useFactoryData } from "../hooks/useFactoryData";
-import type { Machine, StateUpdateEvent } from "../lib/types";
+import type { Machine } from "../lib/types";
 import { updateMachine, suggestAgent, applyActions } from "../lib/api";
-import { subscribeToEvents } from "../lib/sse";
 
 export default function Dashboard() {
 	const { machines, orders, energy, decisions, loading } = useFactoryData();
@@ -19,7 +18,8 @@ export default function Dashboard() {
 	const [selectedId, setSelectedId] = useState<number | null>(null);
 	const [showSidebar, setShowSidebar] = useState(true);
 
-	// Sync incoming machines into local state (preserve user edits while new data arrives)
+	// Sync incoming machines into local state (preserve user edits while new data arrives).
+	// useFactoryData applies the SSE machine deltas and refetches on resync.
 	useEffect(() => {
 		setLocalMachines(machines.map((m) => ({ ...m })));
 	}, [machines]);
@@ -33,55 +33,6 @@ export default function Dashboard() {
 		setSelectedId((s) => (s === id ? null : id));
 	}
 
-	// Listen for server-sent events and merge machine updates into localMachines
-	useEffect(() => {
-		const es = subscribeToEvents((event: MessageEvent) => {
-			try {
-				if (event.type === "machine_update") {
-					// backend may send a single update object or an array; parse as unknown and narrow
-					const parsedRaw = JSON.parse(event.data) as unknown;
-					const rawArr = Array.isArray(parsedRaw) ? parsedRaw : [parsedRaw];
-					const updates = rawArr as Record<string, unknown>[];
-					setLocalMachines((prev) =>
-						prev.map((m) => {
-							const u = updates.find((x) => {
-								const mid = typeof x.machine_id === "number" ? (x.machine_id as number) : typeof x.id === "number" ? (x.id as number) : undefined;
-								return mid === m.id;
-							});
-							if (!u) return m;
-							const newStatus = typeof u.new_status === "string" ? (u.new_status as string) : typeof u.status === "string" ? (u.status as string) : m.status;
-							const newUtil = typeof u.new_utilization === "number" ? (u.new_utilization as number) : typeof u.utilization === "number" ? (u.utilization as number) : m.utilization;
-							return {
-								...m,
-								status: newStatus as Machine["status"],
-								utilization: newUtil,
-							};
-						})
-					);
-				}
-
-				if (event.type === "state_update") {
-					const data = JSON.parse(event.data) as StateUpdateEvent[];
-					setLocalMachines((prev) =>
-						prev.map((m) => {
-							const u = data.find((x) => x.machine_id === m.id);
-							if (!u) return m;
-							return {
-								...m,
-								status: (u.new_status ?? m.status) as Machine["status"],
-								utilization: u.new_utilization ?? m.utilization,
-							};
-						})
-					);
-				}
-			} catch (err) {
-				console.error("Failed to process SSE event", err);
-			}
-		});
-
-		return () => es.close();
-	}, []);
-
 	// Apply a local update and persist to backend
 	function applyLocalUpdate(updates: Partial<Machine> & { id: number }) {
 		setLocalMachines((prev) => prev.map((m) => (m.id === updates.id ? { ...m, ...updates } : m)));